@@ -1,6 +1,7 @@
 import logging
 
 import bhamon_orchestra_model.database.import_export as database_import_export
+from bhamon_orchestra_model.run_retention import RunRetention
 from bhamon_orchestra_model.serialization.json_serializer import JsonSerializer
 
 
@@ -19,13 +20,29 @@ def register_commands(subparsers):
 	command_parser = subparsers.add_parser("import-database", help = "import the database")
 	command_parser.add_argument("--simulate", action = "store_true", help = "perform a simulation (dry-run)")
 	command_parser.add_argument("--source", required = True, help = "set the source directory")
+	command_parser.add_argument("--batch-size", type = int, default = 1000, metavar = "<count>", help = "set how many rows to insert at once")
 	command_parser.set_defaults(handler = import_database)
 
 	command_parser = subparsers.add_parser("export-database", help = "export the database")
 	command_parser.add_argument("--simulate", action = "store_true", help = "perform a simulation (dry-run)")
 	command_parser.add_argument("--output", required = True, help = "set the output directory")
+	command_parser.add_argument("--format", choices = database_import_export.all_file_formats, default = "ndjson", help = "set the file format")
+	command_parser.add_argument("--compression", choices = list(database_import_export.all_compression_extensions), help = "set the file compression")
+	command_parser.add_argument("--thread-count", type = int, default = 4, metavar = "<count>", help = "set how many tables to export in parallel")
 	command_parser.set_defaults(handler = export_database)
 
+	command_parser = subparsers.add_parser("apply-retention", help = "archive runs according to retention policies")
+	command_parser.add_argument("--simulate", action = "store_true", help = "perform a simulation (dry-run)")
+	command_parser.add_argument("--run-limit", type = int, metavar = "<count>", help = "set how many runs to keep for jobs without a policy")
+	command_parser.add_argument("--age-limit", type = int, metavar = "<days>", help = "set how many days to keep runs for jobs without a policy")
+	command_parser.add_argument("--delete-logs", action = "store_true", help = "delete the logs of archived runs instead of compressing them")
+	command_parser.add_argument("--limit", type = int, metavar = "<count>", help = "set how many runs to archive at most")
+	command_parser.set_defaults(handler = apply_retention)
+
+	command_parser = subparsers.add_parser("rebuild-revision-status", help = "recompute the revision statuses from their runs")
+	command_parser.add_argument("--project", metavar = "<identifier>", help = "set the project to rebuild the revision statuses for (default: all)")
+	command_parser.set_defaults(handler = rebuild_revision_status)
+
 
 def initialize_database(application, arguments):
 	with application.database_administration_factory() as database_administration:
@@ -38,12 +55,32 @@ def upgrade_database(application, arguments):
 
 
 def import_database(application, arguments):
-	serializer = JsonSerializer(indent = 4)
+	serializer = JsonSerializer()
 	with application.database_client_factory() as database_client:
-		database_import_export.import_database(database_client, serializer, arguments.source, simulate = arguments.simulate)
+		database_import_export.import_database(database_client, serializer, arguments.source, simulate = arguments.simulate, batch_size = arguments.batch_size)
 
 
 def export_database(application, arguments):
-	serializer = JsonSerializer(indent = 4)
+	serializer = JsonSerializer(indent = 4 if arguments.format == "json" else None)
+	database_import_export.export_database(application.database_client_factory, serializer, arguments.output, simulate = arguments.simulate,
+		file_format = arguments.format, compression = arguments.compression, thread_count = arguments.thread_count)
+
+
+def apply_retention(application, arguments):
+	default_policy = { "run_limit": arguments.run_limit, "age_limit_days": arguments.age_limit }
+	default_policy = { key: value for key, value in default_policy.items() if value is not None }
+
+	run_retention = RunRetention(application.job_provider, application.run_provider, application.schedule_provider, application.date_time_provider,
+		default_policy = default_policy, delete_logs = arguments.delete_logs)
+
+	with application.database_client_factory() as database_client:
+		all_archived_runs = run_retention.apply(database_client, limit = arguments.limit, simulate = arguments.simulate)
+
+	return { "archived_run_count": len(all_archived_runs) }
+
+
+def rebuild_revision_status(application, arguments):
 	with application.database_client_factory() as database_client:
-		database_import_export.export_database(database_client, serializer, arguments.output, simulate = arguments.simulate)
+		revision_count = application.revision_status_provider.rebuild(database_client, project = arguments.project)
+
+	return { "revision_count": revision_count }
@@ -0,0 +1,35 @@
+import logging
+import os
+import subprocess
+import uuid
+
+
+logger = logging.getLogger("Main")
+
+
+def configure_argument_parser(environment, configuration, subparsers): # pylint: disable = unused-argument
+	parser = subparsers.add_parser("benchmark", help = "run the database benchmark")
+	parser.add_argument("--identifier", default = str(uuid.uuid4()), metavar = "<identifier>", help = "specify a identifier for the run (default to a GUID)")
+	parser.add_argument("--database", nargs = "+", metavar = "<database>", help = "specify the databases to benchmark")
+	parser.add_argument("--run-count", type = int, metavar = "<count>", help = "specify how many runs to generate")
+	parser.set_defaults(func = run)
+
+
+def run(environment, configuration, arguments): # pylint: disable = unused-argument
+	python_executable = environment["python3_executable"]
+	result_directory = os.path.join(configuration["artifact_directory"], "benchmark_results")
+	result_file_path = os.path.join(result_directory, arguments.identifier + ".json")
+
+	command = [ python_executable, "-m", "test.benchmark.database_benchmark" ]
+	command += [ "--label", configuration["project_version"]["full"], "--output", result_file_path ]
+	if arguments.database:
+		command += [ "--database" ] + arguments.database
+	if arguments.run_count is not None:
+		command += [ "--run-count", str(arguments.run_count) ]
+
+	logger.info("+ %s", " ".join(("'" + x + "'") if " " in x else x for x in command))
+
+	if not arguments.simulate:
+		os.makedirs(result_directory, exist_ok = True)
+		subprocess.check_call(command)
+		logger.info("Benchmark results saved to '%s'", result_file_path)
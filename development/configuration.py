@@ -145,6 +145,7 @@ def list_package_data(package, pattern_collection):
 def load_commands():
 	all_modules = [
 		"development.commands.artifact",
+		"development.commands.benchmark",
 		"development.commands.clean",
 		"development.commands.develop",
 		"development.commands.distribute",
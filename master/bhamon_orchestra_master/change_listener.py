@@ -0,0 +1,112 @@
+import asyncio
+import logging
+from typing import Callable, List, Optional, Tuple
+
+from bhamon_orchestra_model.database.database_client import DatabaseClient
+
+
+logger = logging.getLogger("ChangeListener")
+
+
+class ChangeListener:
+	""" Listener for database changes, to wake up a task polling the database as soon as the tables it reads change.
+
+	Watches call back from their own threads, the listener forwards their notifications to the event loop,
+	after calling the change callback if one is provided, from those threads.
+	Polling should be kept as a safety net, for changes which were missed or if the database does not support watching them.
+
+	Changes made through the same database client factory can be ignored, for a task which already knows about the changes it makes,
+	when the database tells them apart. Wakeups are rate limited, so that a busy database does not keep the task updating.
+
+	"""
+
+
+	def __init__(self, database_client_factory: Callable[[], DatabaseClient],
+			change_callback: Optional[Callable[[dict], None]] = None, ignore_own_changes: bool = False) -> None:
+		self._database_client_factory = database_client_factory
+		self._change_callback = change_callback
+		self._ignore_own_changes = ignore_own_changes
+		self._database_client = None
+		self._all_watches = []
+		self._change_event = None
+		self._loop = None
+		self._last_wakeup_time = None
+
+		self.minimum_wakeup_interval_seconds = 1
+
+
+	async def start(self, watch_collection: List[Tuple[str,dict]]) -> None:
+		""" Start watching tables for changes, with their filter, for the running event loop """
+
+		self._loop = asyncio.get_running_loop()
+		self._change_event = asyncio.Event()
+
+		try:
+			if not await self._loop.run_in_executor(None, self._start_watches, watch_collection):
+				logger.info("Watching changes is not supported by the database, relying on polling only")
+				self.dispose()
+		except NotImplementedError:
+			logger.info("Watching changes is not supported by the database, relying on polling only")
+			self.dispose()
+		except Exception: # pylint: disable = broad-except
+			logger.warning("Failed to watch changes, relying on polling only", exc_info = True)
+			self.dispose()
+
+
+	async def wait(self, timeout: float) -> bool:
+		""" Wait for a change until the timeout expires, and return if there was one """
+
+		if self._change_event is None:
+			await asyncio.sleep(timeout)
+			return False
+
+		try:
+			await asyncio.wait_for(self._change_event.wait(), timeout)
+		except asyncio.TimeoutError:
+			return False
+
+		if self._last_wakeup_time is not None:
+			await asyncio.sleep(self._last_wakeup_time + self.minimum_wakeup_interval_seconds - self._loop.time())
+
+		self._change_event.clear()
+		self._last_wakeup_time = self._loop.time()
+		return True
+
+
+	def dispose(self) -> None:
+		""" Stop watching changes and close the database client """
+
+		all_watches = list(self._all_watches)
+		self._all_watches.clear()
+
+		for watch in all_watches:
+			watch.close()
+
+		if self._database_client is not None:
+			self._database_client.close()
+			self._database_client = None
+
+
+	def _start_watches(self, watch_collection: List[Tuple[str,dict]]) -> bool:
+		self._database_client = self._database_client_factory()
+
+		if not self._database_client.is_watch_supported():
+			return False
+
+		for table, filter in watch_collection: # pylint: disable = redefined-builtin
+			self._all_watches.append(self._database_client.watch(table, filter, self._handle_change))
+
+		return True
+
+
+	def _handle_change(self, change: dict) -> None:
+		if self._ignore_own_changes and change.get("is_own_change", False):
+			return
+
+		if self._change_callback is not None:
+			self._change_callback(change)
+
+		try:
+			self._loop.call_soon_threadsafe(self._change_event.set)
+		except RuntimeError:
+			pass # The event loop was closed
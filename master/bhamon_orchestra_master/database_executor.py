@@ -0,0 +1,87 @@
+import asyncio
+import concurrent.futures
+import functools
+import logging
+import threading
+from typing import Any, Callable
+
+from bhamon_orchestra_model.database.database_client import DatabaseClient
+
+
+logger = logging.getLogger("DatabaseExecutor")
+
+
+class DatabaseExecutor:
+	""" Executor running database operations in a bounded thread pool, so that they do not block the event loop.
+
+	Each thread keeps its own database client, created on first use, so that clients are never shared between threads.
+	A client is discarded when an operation raises a database error, since its connection may not be usable anymore.
+	Other exceptions, such as invalid requests from workers, keep the client.
+	Operations are run one at a time for clients which are not thread safe, such as the memory client shared by its factory.
+
+	"""
+
+
+	def __init__(self, database_client_factory: Callable[[], DatabaseClient], thread_limit: int = 4) -> None:
+		self._database_client_factory = database_client_factory
+		self._thread_pool = concurrent.futures.ThreadPoolExecutor(max_workers = thread_limit, thread_name_prefix = "Database")
+		self._thread_data = threading.local()
+		self._all_clients = []
+		self._lock = threading.Lock()
+		self._serial_lock = threading.Lock()
+
+
+	async def run(self, function: Callable[..., Any], *arguments, **keyword_arguments) -> Any:
+		""" Call a function in the thread pool, with a database client as its first argument, and return its result """
+
+		loop = asyncio.get_running_loop()
+		return await loop.run_in_executor(self._thread_pool, functools.partial(self._run_with_client, function, *arguments, **keyword_arguments))
+
+
+	def dispose(self) -> None:
+		""" Wait for the pending operations and close all database clients """
+
+		self._thread_pool.shutdown(wait = True)
+
+		with self._lock:
+			all_clients = list(self._all_clients)
+			self._all_clients.clear()
+
+		for database_client in all_clients:
+			try:
+				database_client.close()
+			except Exception: # pylint: disable = broad-except
+				logger.warning("Failed to close database client", exc_info = True)
+
+
+	def _run_with_client(self, function: Callable[..., Any], *arguments, **keyword_arguments) -> Any:
+		database_client = getattr(self._thread_data, "database_client", None)
+
+		if database_client is None:
+			database_client = self._database_client_factory()
+			self._thread_data.database_client = database_client
+			with self._lock:
+				self._all_clients.append(database_client)
+
+		try:
+			if not database_client.is_thread_safe():
+				with self._serial_lock:
+					return function(database_client, *arguments, **keyword_arguments)
+			return function(database_client, *arguments, **keyword_arguments)
+		except Exception as exception:
+			if database_client.is_database_error(exception):
+				self._discard_client(database_client)
+			raise
+
+
+	def _discard_client(self, database_client: DatabaseClient) -> None:
+		self._thread_data.database_client = None
+
+		with self._lock:
+			if database_client in self._all_clients:
+				self._all_clients.remove(database_client)
+
+		try:
+			database_client.close()
+		except Exception: # pylint: disable = broad-except
+			logger.warning("Failed to close database client", exc_info = True)
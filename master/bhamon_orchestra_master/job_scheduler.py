@@ -2,10 +2,12 @@ import asyncio
 import datetime
 import logging
 
-from typing import Callable, List
+from typing import List, Optional
 
 import pycron
 
+from bhamon_orchestra_master.change_listener import ChangeListener
+from bhamon_orchestra_master.database_executor import DatabaseExecutor
 from bhamon_orchestra_master.supervisor import Supervisor
 from bhamon_orchestra_master.worker_selector import WorkerSelector
 from bhamon_orchestra_model.date_time_provider import DateTimeProvider
@@ -18,24 +20,27 @@ from bhamon_orchestra_model.schedule_provider import ScheduleProvider
 logger = logging.getLogger("JobScheduler")
 
 
-class JobScheduler:
+class JobScheduler: # pylint: disable = too-many-instance-attributes
 	""" Trigger timed schedules and dispatch pending runs to workers """
 
 
 	def __init__(self, # pylint: disable = too-many-arguments
-			database_client_factory: Callable[[], DatabaseClient],
+			database_executor: DatabaseExecutor,
 			job_provider: JobProvider, run_provider: RunProvider, schedule_provider: ScheduleProvider,
-			supervisor: Supervisor, worker_selector: WorkerSelector, date_time_provider: DateTimeProvider) -> None:
+			supervisor: Supervisor, worker_selector: WorkerSelector, date_time_provider: DateTimeProvider,
+			change_listener: Optional[ChangeListener] = None) -> None:
 
-		self._database_client_factory = database_client_factory
+		self._database_executor = database_executor
 		self._job_provider = job_provider
 		self._run_provider = run_provider
 		self._schedule_provider = schedule_provider
 		self._supervisor = supervisor
 		self._worker_selector = worker_selector
 		self._date_time_provider = date_time_provider
+		self._change_listener = change_listener
 
 		self.update_interval_seconds = 10
+		self.change_delay_seconds = 0.1
 		self.run_expiration = datetime.timedelta(days = 1)
 		self.pending_order_by = [ ("creation_date", "ascending") ]
 
@@ -43,52 +48,93 @@ class JobScheduler:
 	async def run(self) -> None:
 		""" Perform updates until cancelled """
 
-		while True:
-			try:
-				with self._database_client_factory() as database_client:
-					await asyncio.gather(self.update(database_client), asyncio.sleep(self.update_interval_seconds))
-			except asyncio.CancelledError: # pylint: disable = try-except-raise
-				raise
-			except Exception: # pylint: disable = broad-except
-				logger.error("Unhandled exception", exc_info = True)
-				await asyncio.sleep(self.update_interval_seconds)
+		# Updates are performed as soon as runs, schedules or workers change, if the database supports watching them,
+		# and regularly otherwise, since timed schedules and run expiration do not depend on changes.
+
+		if self._change_listener is not None:
+			await self._change_listener.start([
+				("run", { "status": "pending" }),
+				("run", { "should_abort": True }),
+				("schedule", {}),
+				("worker", { "is_enabled": True }),
+			])
+
+		try:
+			while True:
+				try:
+					await asyncio.gather(self.update(), self._wait_for_next_update())
+				except asyncio.CancelledError: # pylint: disable = try-except-raise
+					raise
+				except Exception: # pylint: disable = broad-except
+					logger.error("Unhandled exception", exc_info = True)
+					await asyncio.sleep(self.update_interval_seconds)
+
+		finally:
+			if self._change_listener is not None:
+				self._change_listener.dispose()
 
 
-	async def update(self, database_client: DatabaseClient) -> None:
+	async def update(self) -> None:
 		""" Perform a single update """
 
 		now = self._date_time_provider.now()
 
-		all_active_schedules = self._list_active_schedules(database_client)
+		await self._database_executor.run(self._trigger_schedules, now)
 
-		for schedule in all_active_schedules:
-			if self._should_schedule_trigger(database_client, schedule, now):
-				logger.info("Triggering run for schedule '%s'", schedule["identifier"])
-				source = { "type": "schedule", "identifier": schedule["identifier"] }
-				run = self._run_provider.create(database_client, schedule["project"], schedule["job"], schedule["parameters"], source)
-				self._schedule_provider.update_status(database_client, schedule, last_run = run["identifier"])
+		all_pending_runs = await self._database_executor.run(self._list_pending_runs)
+		all_cancelled_runs = [ run for run in all_pending_runs if run["should_cancel"] ]
 
-		all_pending_runs = self._list_pending_runs(database_client)
+		if len(all_cancelled_runs) > 0:
+			for run in all_cancelled_runs:
+				logger.info("Cancelling run '%s'", run["identifier"])
+			await self._database_executor.run(self._run_provider.cancel_pending)
 
 		for run in all_pending_runs:
-			if run["should_cancel"] or now > run["creation_date"] + self.run_expiration:
+			if run["should_cancel"]:
+				continue
+
+			if now > run["creation_date"] + self.run_expiration:
 				logger.info("Cancelling run '%s'", run["identifier"])
-				self._run_provider.update_status(database_client, run, status = "cancelled")
+				await self._database_executor.run(self._run_provider.update_status, run, status = "cancelled")
 				continue
 
 			try:
-				self.trigger_run(database_client, run)
+				await self.trigger_run(run)
 			except Exception: # pylint: disable = broad-except
 				logger.error("Run trigger '%s' raised an exception", run["identifier"], exc_info = True)
-				self._run_provider.update_status(database_client, run, status = "exception")
+				await self._database_executor.run(self._run_provider.update_status, run, status = "exception")
 
-		all_active_runs = self._list_active_runs(database_client)
+		all_active_runs = await self._database_executor.run(self._list_active_runs)
 
 		for run in all_active_runs:
 			if run["should_abort"]:
 				self.abort_run(run)
 
 
+	async def _wait_for_next_update(self) -> None:
+		""" Wait for the update interval, or for changes with a short delay to group them """
+
+		if self._change_listener is None:
+			await asyncio.sleep(self.update_interval_seconds)
+			return
+
+		await asyncio.sleep(self.change_delay_seconds)
+		await self._change_listener.wait(self.update_interval_seconds - self.change_delay_seconds)
+
+
+	def _trigger_schedules(self, database_client: DatabaseClient, now: datetime.datetime) -> None:
+		""" Create runs for the active schedules which should trigger """
+
+		all_active_schedules = self._list_active_schedules(database_client)
+
+		for schedule in all_active_schedules:
+			if self._should_schedule_trigger(database_client, schedule, now):
+				logger.info("Triggering run for schedule '%s'", schedule["identifier"])
+				source = { "type": "schedule", "identifier": schedule["identifier"] }
+				run = self._run_provider.create(database_client, schedule["project"], schedule["job"], schedule["parameters"], source)
+				self._schedule_provider.update_status(database_client, schedule, last_run = run["identifier"])
+
+
 	def _list_active_schedules(self, database_client: DatabaseClient) -> List[dict]:
 		""" Retrieve all active schedules from the database """
 		all_schedules = self._schedule_provider.get_list(database_client)
@@ -132,22 +178,22 @@ class JobScheduler:
 		return True
 
 
-	def trigger_run(self, database_client: DatabaseClient, run: dict) -> bool:
+	async def trigger_run(self, run: dict) -> bool:
 		""" Try to start a run execution """
 
 		if run["status"] != "pending":
 			raise ValueError("Run '%s' cannot be triggered (Status: '%s')" % (run["identifier"], run["status"]))
 
-		job = self._job_provider.get(database_client, run["project"], run["job"])
+		job = await self._database_executor.run(self._job_provider.get, run["project"], run["job"])
 		if not job["is_enabled"]:
 			return False
 
-		selected_worker = self._worker_selector(job, run)
+		selected_worker = await self._worker_selector(job, run)
 		if selected_worker is None:
 			return False
 
 		logger.info("Assigning run '%s' to worker '%s'", run["identifier"], selected_worker)
-		self._supervisor.get_worker(selected_worker).assign_run(job, run)
+		await self._supervisor.get_worker(selected_worker).assign_run(job, run)
 		return True
 
 
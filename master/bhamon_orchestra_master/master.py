@@ -1,13 +1,18 @@
 import asyncio
 import logging
 
-from typing import Callable
+from typing import Callable, Optional
 
+from bhamon_orchestra_master.change_listener import ChangeListener
+from bhamon_orchestra_master.database_executor import DatabaseExecutor
 from bhamon_orchestra_master.job_scheduler import JobScheduler
 from bhamon_orchestra_master.supervisor import Supervisor
 from bhamon_orchestra_model.database.database_client import DatabaseClient
+from bhamon_orchestra_model.database.database_statistics import DatabaseStatistics
 from bhamon_orchestra_model.job_provider import JobProvider
 from bhamon_orchestra_model.project_provider import ProjectProvider
+from bhamon_orchestra_model.record_cache import RecordCache
+from bhamon_orchestra_model.run_retention import RunRetention
 from bhamon_orchestra_model.schedule_provider import ScheduleProvider
 from bhamon_orchestra_model.worker_provider import WorkerProvider
 
@@ -15,7 +20,7 @@ from bhamon_orchestra_model.worker_provider import WorkerProvider
 logger = logging.getLogger("Master")
 
 
-class Master:
+class Master: # pylint: disable = too-many-instance-attributes
 	""" Main class for the master application """
 
 
@@ -23,7 +28,9 @@ class Master:
 			database_client_factory: Callable[[], DatabaseClient],
 			project_provider: ProjectProvider, job_provider: JobProvider,
 			schedule_provider: ScheduleProvider, worker_provider: WorkerProvider,
-			job_scheduler: JobScheduler, supervisor: Supervisor) -> None:
+			job_scheduler: JobScheduler, supervisor: Supervisor,
+			database_executor: Optional[DatabaseExecutor] = None, database_statistics: Optional[DatabaseStatistics] = None,
+			run_retention: Optional[RunRetention] = None, record_cache: Optional[RecordCache] = None) -> None:
 
 		self._database_client_factory = database_client_factory
 		self._project_provider = project_provider
@@ -32,13 +39,25 @@ class Master:
 		self._worker_provider = worker_provider
 		self._job_scheduler = job_scheduler
 		self._supervisor = supervisor
+		self._database_executor = database_executor
+		self._database_statistics = database_statistics
+		self._run_retention = run_retention
+		self._record_cache = record_cache
+
+		self.statistics_log_interval_seconds = 600
+		self.retention_interval_seconds = 3600
+		self.retention_batch_size = 100
 
 
 	async def run(self, address: str, port: int) -> None:
 		""" Run the master """
 
+		cache_change_listener = await self._watch_cached_tables() if self._record_cache is not None else None
+
 		job_scheduler_future = asyncio.ensure_future(self._job_scheduler.run())
 		supervisor_future = asyncio.ensure_future(self._supervisor.run_server(address, port))
+		statistics_future = asyncio.ensure_future(self._log_database_statistics()) if self._database_statistics is not None else None
+		retention_future = asyncio.ensure_future(self._apply_run_retention()) if self._run_retention is not None and self._database_executor is not None else None
 
 		try:
 			await asyncio.wait([ job_scheduler_future, supervisor_future ], return_when = asyncio.FIRST_COMPLETED)
@@ -47,6 +66,14 @@ class Master:
 			job_scheduler_future.cancel()
 			supervisor_future.cancel()
 
+			if retention_future is not None:
+				retention_future.cancel()
+
+				try:
+					await retention_future
+				except asyncio.CancelledError:
+					pass
+
 			try:
 				await job_scheduler_future
 			except asyncio.CancelledError:
@@ -61,6 +88,57 @@ class Master:
 			except Exception: # pylint: disable = broad-except
 				logger.error("Unhandled exception from supervisor", exc_info = True)
 
+			if cache_change_listener is not None:
+				cache_change_listener.dispose()
+
+			if self._database_executor is not None:
+				self._database_executor.dispose()
+
+			if statistics_future is not None:
+				statistics_future.cancel()
+
+				try:
+					await statistics_future
+				except asyncio.CancelledError:
+					pass
+
+				self._database_statistics.log_summary()
+
+
+	async def _apply_run_retention(self) -> None:
+		""" Archive expired runs regularly, by batches so that the database is not held for too long """
+
+		while True:
+			try:
+				while True:
+					all_archived_runs = await self._database_executor.run(self._run_retention.apply, limit = self.retention_batch_size)
+					if len(all_archived_runs) < self.retention_batch_size:
+						break
+			except asyncio.CancelledError: # pylint: disable = try-except-raise
+				raise
+			except Exception: # pylint: disable = broad-except
+				logger.error("Unhandled exception while applying run retention", exc_info = True)
+
+			await asyncio.sleep(self.retention_interval_seconds)
+
+
+	async def _watch_cached_tables(self) -> ChangeListener:
+		""" Invalidate the cached records when their tables are changed by other processes, such as the service, providers invalidating them for their own changes """
+
+		def invalidate_records(change: dict) -> None:
+			self._record_cache.invalidate(change["table"])
+
+		all_tables = [ self._project_provider.table, self._job_provider.table, self._worker_provider.table ]
+		change_listener = ChangeListener(self._database_client_factory, change_callback = invalidate_records, ignore_own_changes = True)
+		await change_listener.start([ (table, {}) for table in all_tables ])
+		return change_listener
+
+
+	async def _log_database_statistics(self) -> None:
+		while True:
+			await asyncio.sleep(self.statistics_log_interval_seconds)
+			self._database_statistics.log_summary()
+
 
 	def apply_configuration(self, configuration: dict) -> None:
 		""" Save the provided configuration to the database """
@@ -1,17 +1,24 @@
 import functools
-from typing import Callable
+from typing import Callable, Optional
 
+from bhamon_orchestra_master.change_listener import ChangeListener
+from bhamon_orchestra_master.database_executor import DatabaseExecutor
 from bhamon_orchestra_master.job_scheduler import JobScheduler
 from bhamon_orchestra_master.master import Master
 from bhamon_orchestra_master.protocol import WebSocketServerProtocol
 from bhamon_orchestra_master.supervisor import Supervisor
 from bhamon_orchestra_master.worker_selector import WorkerSelector
 from bhamon_orchestra_model.database.database_client import DatabaseClient
+from bhamon_orchestra_model.database.database_statistics import DatabaseStatistics
 from bhamon_orchestra_model.database.file_data_storage import FileDataStorage
+from bhamon_orchestra_model.database.instrumented_database_client import InstrumentedDatabaseClient
 from bhamon_orchestra_model.date_time_provider import DateTimeProvider
 from bhamon_orchestra_model.job_provider import JobProvider
 from bhamon_orchestra_model.project_provider import ProjectProvider
+from bhamon_orchestra_model.record_cache import RecordCache
+from bhamon_orchestra_model.revision_status_provider import RevisionStatusProvider
 from bhamon_orchestra_model.run_provider import RunProvider
+from bhamon_orchestra_model.run_retention import RunRetention
 from bhamon_orchestra_model.schedule_provider import ScheduleProvider
 from bhamon_orchestra_model.users.authentication_provider import AuthenticationProvider
 from bhamon_orchestra_model.users.authorization_provider import AuthorizationProvider
@@ -20,23 +27,34 @@ from bhamon_orchestra_model.worker_provider import WorkerProvider
 
 
 def create_application( # pylint: disable = too-many-locals
-		database_client_factory: Callable[[], DatabaseClient], file_storage_path: str):
+		database_client_factory: Callable[[], DatabaseClient], file_storage_path: str, database_statistics: Optional[DatabaseStatistics] = None,
+		run_retention_configuration: Optional[dict] = None):
 
+	if database_statistics is not None:
+		database_client_factory = InstrumentedDatabaseClient.wrap_factory(database_client_factory, database_statistics)
+
+	database_executor = DatabaseExecutor(database_client_factory)
 	data_storage = FileDataStorage(file_storage_path)
 	date_time_provider = DateTimeProvider()
+	record_cache = RecordCache(date_time_provider)
 
 	authentication_provider = AuthenticationProvider(date_time_provider)
 	authorization_provider = AuthorizationProvider()
-	job_provider = JobProvider(date_time_provider)
-	project_provider = ProjectProvider(date_time_provider)
-	run_provider = RunProvider(data_storage, date_time_provider)
+	job_provider = JobProvider(date_time_provider, record_cache)
+	project_provider = ProjectProvider(date_time_provider, record_cache)
+	revision_status_provider = RevisionStatusProvider(date_time_provider)
+	run_provider = RunProvider(data_storage, date_time_provider, revision_status_provider = revision_status_provider)
 	schedule_provider = ScheduleProvider(date_time_provider)
 	user_provider = UserProvider(date_time_provider)
-	worker_provider = WorkerProvider(date_time_provider)
+	worker_provider = WorkerProvider(date_time_provider, record_cache)
+
+	# Changes waking the supervisor and the job scheduler invalidate the cached records before, so that their update reads the new ones
+	def invalidate_records(change: dict) -> None:
+		record_cache.invalidate(change["table"])
 
 	protocol_factory = functools.partial(
 		WebSocketServerProtocol,
-		database_client_factory = database_client_factory,
+		database_executor = database_executor,
 		user_provider = user_provider,
 		authentication_provider = authentication_provider,
 		authorization_provider = authorization_provider,
@@ -44,25 +62,35 @@ def create_application( # pylint: disable = too-many-locals
 
 	supervisor = Supervisor(
 		protocol_factory = protocol_factory,
-		database_client_factory = database_client_factory,
+		database_executor = database_executor,
 		worker_provider = worker_provider,
 		run_provider = run_provider,
+		change_listener = ChangeListener(database_client_factory, change_callback = invalidate_records, ignore_own_changes = True),
 	)
 
 	worker_selector = WorkerSelector(
-		database_client_factory = database_client_factory,
+		database_executor = database_executor,
 		worker_provider = worker_provider,
 		supervisor = supervisor,
 	)
 
 	job_scheduler = JobScheduler(
-		database_client_factory = database_client_factory,
+		database_executor = database_executor,
 		job_provider = job_provider,
 		run_provider = run_provider,
 		schedule_provider = schedule_provider,
 		supervisor = supervisor,
 		worker_selector = worker_selector,
 		date_time_provider = date_time_provider,
+		change_listener = ChangeListener(database_client_factory, change_callback = invalidate_records, ignore_own_changes = True),
+	)
+
+	run_retention = RunRetention(
+		job_provider = job_provider,
+		run_provider = run_provider,
+		schedule_provider = schedule_provider,
+		date_time_provider = date_time_provider,
+		**(run_retention_configuration if run_retention_configuration is not None else {}),
 	)
 
 	master = Master(
@@ -73,6 +101,10 @@ def create_application( # pylint: disable = too-many-locals
 		worker_provider = worker_provider,
 		job_scheduler = job_scheduler,
 		supervisor = supervisor,
+		database_executor = database_executor,
+		database_statistics = database_statistics,
+		run_retention = run_retention,
+		record_cache = record_cache,
 	)
 
 	return master
@@ -8,6 +8,7 @@ from websockets.datastructures import Headers
 from websockets.legacy.server import HTTPResponse as HttpResponse
 from websockets.legacy.server import WebSocketServerProtocol as BaseWebSocketServerProtocol
 
+from bhamon_orchestra_master.database_executor import DatabaseExecutor
 from bhamon_orchestra_model.database.database_client import DatabaseClient
 from bhamon_orchestra_model.users.authentication_provider import AuthenticationProvider
 from bhamon_orchestra_model.users.authorization_provider import AuthorizationProvider
@@ -23,12 +24,12 @@ class WebSocketServerProtocol(BaseWebSocketServerProtocol):
 
 	def __init__(self, # pylint: disable = too-many-arguments
 			ws_handler: Callable[["WebSocketServerProtocol", str], Awaitable[Any]], ws_server: "WebSocketServer",
-			database_client_factory: Callable[[], DatabaseClient], user_provider: UserProvider,
+			database_executor: DatabaseExecutor, user_provider: UserProvider,
 			authentication_provider: AuthenticationProvider, authorization_provider: AuthorizationProvider, **kwargs) -> None:
 
 		super().__init__(ws_handler, ws_server, **kwargs)
 
-		self._database_client_factory = database_client_factory
+		self._database_executor = database_executor
 		self._user_provider = user_provider
 		self._authentication_provider = authentication_provider
 		self._authorization_provider = authorization_provider
@@ -43,8 +44,7 @@ class WebSocketServerProtocol(BaseWebSocketServerProtocol):
 
 		try:
 			try:
-				with self._database_client_factory() as database_client:
-					self._authorize_request(database_client, request_headers)
+				await self._database_executor.run(self._authorize_request, request_headers)
 			except ValueError as exception:
 				raise HttpError(HttpStatus.UNAUTHORIZED) from exception
 		except HttpError as exception:
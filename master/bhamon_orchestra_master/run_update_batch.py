@@ -0,0 +1,60 @@
+from typing import List, Optional
+
+
+class RunUpdateBatch:
+	""" Unit of work coalescing the updates received for a run, so that they are saved with a single database write.
+
+	Updates are merged in the order they were received: later status fields and results replace earlier ones,
+	log chunks are concatenated and events are kept in order. Events are handled after the run changes and log chunks,
+	so a batch should end with its events, updates received after an event starting a new batch.
+
+	"""
+
+
+	def __init__(self) -> None:
+		self.status = {}
+		self.results = None
+		self.log_chunk_collection = []
+		self.event_collection = []
+
+
+	@staticmethod
+	def split(update_collection: List[dict]) -> List["RunUpdateBatch"]:
+		""" Merge updates into batches, starting a new batch after each event so that events are handled in the order they were received """
+
+		all_batches = [ RunUpdateBatch() ]
+
+		for update in update_collection:
+			all_batches[-1].add(update)
+			if "event" in update:
+				all_batches.append(RunUpdateBatch())
+
+		return [ batch for batch in all_batches if not batch.is_empty() ]
+
+
+	def add(self, update: dict) -> None:
+		""" Merge an update into the batch """
+
+		if "status" in update:
+			self.status.update(update["status"])
+		if "results" in update:
+			self.results = update["results"]
+		if "log_chunk" in update:
+			self.log_chunk_collection.append(update["log_chunk"])
+		if "event" in update:
+			self.event_collection.append(update["event"])
+
+
+	def is_empty(self) -> bool:
+		""" Check if the batch has no updates """
+		return not self.has_run_changes() and len(self.log_chunk_collection) == 0 and len(self.event_collection) == 0
+
+
+	def has_run_changes(self) -> bool:
+		""" Check if the batch has changes to save to the run record """
+		return len(self.status) > 0 or self.results is not None
+
+
+	def get_log_chunk(self) -> Optional[str]:
+		""" Return the concatenated log chunks, if any """
+		return "".join(self.log_chunk_collection) if len(self.log_chunk_collection) > 0 else None
@@ -1,9 +1,11 @@
 import asyncio
 import logging
-from typing import Any, Callable, List
+from typing import Any, Callable, List, Optional
 
 import websockets.server
 
+from bhamon_orchestra_master.change_listener import ChangeListener
+from bhamon_orchestra_master.database_executor import DatabaseExecutor
 from bhamon_orchestra_master.protocol import WebSocketServerProtocol
 from bhamon_orchestra_master.worker import Worker
 from bhamon_orchestra_model.database.database_client import DatabaseClient
@@ -25,37 +27,47 @@ class Supervisor:
 	""" Supervisor managing worker connections to the master """
 
 
-	def __init__(self, protocol_factory: Callable[[Any], WebSocketServerProtocol],
-			database_client_factory: Callable[[], DatabaseClient], run_provider: RunProvider, worker_provider: WorkerProvider) -> None:
+	def __init__(self, # pylint: disable = too-many-arguments
+			protocol_factory: Callable[[Any], WebSocketServerProtocol],
+			database_executor: DatabaseExecutor, run_provider: RunProvider, worker_provider: WorkerProvider,
+			change_listener: Optional[ChangeListener] = None) -> None:
 
 		self._protocol_factory = protocol_factory
-		self._database_client_factory = database_client_factory
+		self._database_executor = database_executor
 		self._run_provider = run_provider
 		self._worker_provider = worker_provider
+		self._change_listener = change_listener
 
 		self._active_workers = {}
 		self.update_interval_seconds = 10
+		self.change_delay_seconds = 0.1
 
 
 	async def run_server(self, address: str, port: int) -> None:
 		""" Run the websocket server to handle worker connections """
 
-		with self._database_client_factory() as database_client:
-			for worker_record in self._worker_provider.get_list(database_client):
-				if worker_record["is_active"]:
-					self._worker_provider.update_status(database_client, worker_record, is_active = False, should_disconnect = False)
+		await self._database_executor.run(self._worker_provider.deactivate_all)
 
-		logger.info("Listening for workers on '%s:%s'", address, port)
-		async with websockets.server.serve(self._try_process_connection, address, port, create_protocol = self._protocol_factory):
-			while True:
-				try:
-					with self._database_client_factory() as database_client:
-						await asyncio.gather(self.update(database_client), asyncio.sleep(self.update_interval_seconds))
-				except asyncio.CancelledError: # pylint: disable = try-except-raise
-					raise
-				except Exception: # pylint: disable = broad-except
-					logger.error("Unhandled exception", exc_info = True)
-					await asyncio.sleep(self.update_interval_seconds)
+		# Updates are performed as soon as workers are requested to disconnect, if the database supports watching changes
+
+		if self._change_listener is not None:
+			await self._change_listener.start([ ("worker", { "should_disconnect": True }) ])
+
+		try:
+			logger.info("Listening for workers on '%s:%s'", address, port)
+			async with websockets.server.serve(self._try_process_connection, address, port, create_protocol = self._protocol_factory):
+				while True:
+					try:
+						await asyncio.gather(self.update(), self._wait_for_next_update())
+					except asyncio.CancelledError: # pylint: disable = try-except-raise
+						raise
+					except Exception: # pylint: disable = broad-except
+						logger.error("Unhandled exception", exc_info = True)
+						await asyncio.sleep(self.update_interval_seconds)
+
+		finally:
+			if self._change_listener is not None:
+				self._change_listener.dispose()
 
 
 	def get_worker(self, worker_identifier: str) -> dict:
@@ -64,27 +76,43 @@ class Supervisor:
 		return self._active_workers[worker_identifier]
 
 
+	def is_worker_active(self, worker_identifier: str) -> bool:
+		""" Check if a worker is connected and active """
+		return worker_identifier in self._active_workers
+
+
 	def is_worker_available(self, database_client: DatabaseClient, worker_identifier: str) -> bool:
 		""" Check if a worker is available to execute runs """
 
-		if worker_identifier not in self._active_workers:
+		if not self.is_worker_active(worker_identifier):
 			return False
 
 		worker_record = self._worker_provider.get(database_client, worker_identifier)
 		return worker_record["is_enabled"] and not worker_record["should_disconnect"]
 
 
-	async def update(self, database_client: DatabaseClient) -> None:
+	async def update(self) -> None:
 		""" Perform a single update """
 
-		all_worker_records = self._list_workers(database_client)
+		all_worker_records = await self._database_executor.run(self._list_workers)
 
 		for worker_record in all_worker_records:
-			worker_instance = self._active_workers[worker_record["identifier"]]
-			if worker_record["should_disconnect"]:
+			worker_instance = self._active_workers.get(worker_record["identifier"], None)
+			if worker_instance is not None and worker_record["should_disconnect"]:
 				worker_instance.should_disconnect = True
 
 
+	async def _wait_for_next_update(self) -> None:
+		""" Wait for the update interval, or for changes with a short delay to group them """
+
+		if self._change_listener is None:
+			await asyncio.sleep(self.update_interval_seconds)
+			return
+
+		await asyncio.sleep(self.change_delay_seconds)
+		await self._change_listener.wait(self.update_interval_seconds - self.change_delay_seconds)
+
+
 	def _list_workers(self, database_client: DatabaseClient) -> List[dict]:
 		""" Retrieve all worker records from the database """
 
@@ -107,28 +135,31 @@ class Supervisor:
 
 		logger.info("Worker '%s' connected (User: '%s', RemoteAddress: '%s')", connection.worker_identifier, connection.user_identifier, connection.remote_address[0])
 
-		with self._database_client_factory() as database_client:
-			try:
-				worker_record = self._register_worker(database_client, connection.worker_identifier, connection.worker_version, connection.user_identifier)
-			except RegistrationError:
-				logger.error("Worker '%s' registration was refused", exc_info = True)
-				return
+		try:
+			worker_record = await self._database_executor.run(self._register_worker,
+				connection.worker_identifier, connection.worker_version, connection.user_identifier)
 
-		worker_instance = self._instantiate_worker(worker_record, connection)
+			# Check again since another connection for the same worker may have been registered in the meantime
+			if connection.worker_identifier in self._active_workers:
+				raise RegistrationError("Worker '%s' is already active" % connection.worker_identifier)
 
-		with self._database_client_factory() as database_client:
-			self._worker_provider.update_status(database_client, worker_record, is_active = True, should_disconnect = False)
-		self._active_workers[connection.worker_identifier] = worker_instance
+		except RegistrationError:
+			logger.error("Worker '%s' registration was refused", connection.worker_identifier, exc_info = True)
+			return
 
-		logger.info("Worker '%s' is now active", connection.worker_identifier)
+		worker_instance = self._instantiate_worker(worker_record, connection)
+		self._active_workers[connection.worker_identifier] = worker_instance
 
 		try:
+			await self._database_executor.run(self._worker_provider.update_status, worker_record, is_active = True, should_disconnect = False)
+
+			logger.info("Worker '%s' is now active", connection.worker_identifier)
+
 			await worker_instance.run()
 
 		finally:
 			del self._active_workers[connection.worker_identifier]
-			with self._database_client_factory() as database_client:
-				self._worker_provider.update_status(database_client, worker_record, is_active = False, should_disconnect = False)
+			await self._database_executor.run(self._worker_provider.update_status, worker_record, is_active = False, should_disconnect = False)
 
 		logger.info("Worker '%s' disconnected", connection.worker_identifier)
 
@@ -159,7 +190,7 @@ class Supervisor:
 
 		serializer_instance = JsonSerializer()
 		messenger_instance = Messenger(serializer_instance, connection.remote_address[0], WebSocketConnection(connection))
-		worker_instance = Worker(worker_record["identifier"], messenger_instance, self._database_client_factory, self._run_provider, self._worker_provider)
+		worker_instance = Worker(worker_record["identifier"], messenger_instance, self._database_executor, self._run_provider, self._worker_provider)
 		messenger_instance.update_handler = worker_instance.receive_update
 
 		return worker_instance
@@ -1,9 +1,11 @@
 import asyncio
 import logging
-from typing import Any, Callable, List, Optional
+from typing import Any, List, Optional
 
 import websockets
 
+from bhamon_orchestra_master.database_executor import DatabaseExecutor
+from bhamon_orchestra_master.run_update_batch import RunUpdateBatch
 from bhamon_orchestra_model.database.database_client import DatabaseClient
 from bhamon_orchestra_model.network.messenger import Messenger
 from bhamon_orchestra_model.run_provider import RunProvider
@@ -19,12 +21,12 @@ class Worker:
 
 	def __init__(self, # pylint: disable = too-many-arguments
 			identifier: str, messenger: Messenger,
-			database_client_factory: Callable[[], DatabaseClient],
+			database_executor: DatabaseExecutor,
 			run_provider: RunProvider, worker_provider: WorkerProvider) -> None:
 
 		self.identifier = identifier
 		self._messenger = messenger
-		self._database_client_factory = database_client_factory
+		self._database_executor = database_executor
 		self._run_provider = run_provider
 		self._worker_provider = worker_provider
 
@@ -32,11 +34,10 @@ class Worker:
 		self.executors = []
 
 
-	def assign_run(self, job: dict, run: dict) -> None:
+	async def assign_run(self, job: dict, run: dict) -> None:
 		""" Assign a pending run to the worker """
 
-		with self._database_client_factory() as database_client:
-			self._run_provider.update_status(database_client, run, worker = self.identifier)
+		await self._database_executor.run(self._run_provider.update_status, run, worker = self.identifier)
 
 		executor = {
 			"job": job,
@@ -91,12 +92,10 @@ class Worker:
 
 
 	async def _run_worker(self) -> None:
-		with self._database_client_factory() as database_client:
-			await self._update_properties(database_client)
+		await self._update_properties()
 
 		try:
-			with self._database_client_factory() as database_client:
-				self.executors += await self._recover_executors(database_client)
+			self.executors += await self._recover_executors()
 		except asyncio.CancelledError: # pylint: disable = try-except-raise
 			raise
 		except Exception: # pylint: disable = broad-except
@@ -106,8 +105,7 @@ class Worker:
 			all_executors = list(self.executors)
 			for executor in all_executors:
 				try:
-					with self._database_client_factory() as database_client:
-						await self._process_executor(database_client, executor)
+					await self._process_executor(executor)
 				except asyncio.CancelledError: # pylint: disable = try-except-raise
 					raise
 				except Exception: # pylint: disable = broad-except
@@ -135,14 +133,14 @@ class Worker:
 		raise KeyError("Executor not found for %s" % run_identifier)
 
 
-	async def _update_properties(self, database_client: DatabaseClient) -> None:
+	async def _update_properties(self) -> None:
 		worker_properties = await self._execute_remote_command("describe")
 		if not isinstance(worker_properties, dict):
 			raise TypeError("Describe command result must be a dict")
-		self._worker_provider.update_properties(database_client, { "identifier": self.identifier }, **worker_properties)
+		await self._database_executor.run(self._worker_provider.update_properties, { "identifier": self.identifier }, **worker_properties)
 
 
-	async def _recover_executors(self, database_client: DatabaseClient) -> List[dict]:
+	async def _recover_executors(self) -> List[dict]:
 		""" Retrieve the executor list from the remote worker """
 
 		recovered_executors = []
@@ -150,12 +148,12 @@ class Worker:
 		if not isinstance(runs_to_recover, list):
 			raise TypeError("Describe command result must be a list")
 		for run_information in runs_to_recover:
-			executor = await self._recover_execution(database_client, **run_information)
+			executor = await self._recover_execution(**run_information)
 			recovered_executors.append(executor)
 		return recovered_executors
 
 
-	async def _process_executor(self, database_client: DatabaseClient, executor: dict) -> None:
+	async def _process_executor(self, executor: dict) -> None:
 		""" Perform a update for a single executor """
 
 		if executor["local_status"] == "pending":
@@ -186,17 +184,20 @@ class Worker:
 			await self._finish_execution(executor["run"])
 			executor["local_status"] = "done"
 
-		for update in executor["received_updates"]:
-			await self._process_update(database_client, executor, update)
-		executor["received_updates"].clear()
+		if len(executor["received_updates"]) > 0:
+			all_update_batches = RunUpdateBatch.split(executor["received_updates"])
+			executor["received_updates"].clear()
 
+			for update_batch in all_update_batches:
+				await self._process_update_batch(executor, update_batch)
 
-	async def _recover_execution(self, database_client: DatabaseClient, run_identifier: str) -> dict:
+
+	async def _recover_execution(self, run_identifier: str) -> dict:
 		""" Recover the state for an executor from the remote worker """
 
 		logger.info("(%s) Recovering run '%s'", self.identifier, run_identifier)
 		run_request = await self._retrieve_request(run_identifier)
-		run = self._run_provider.get(database_client, run_request["project_identifier"], run_identifier)
+		run = await self._database_executor.run(self._run_provider.get, run_request["project_identifier"], run_identifier)
 
 		return {
 			"job": run_request["job_definition"],
@@ -262,27 +263,26 @@ class Worker:
 		executor["received_updates"].append(update)
 
 
-	async def _process_update(self, database_client: DatabaseClient, executor: dict, update: dict) -> None:
-		if "status" in update:
-			self._update_status(database_client, executor["run"], update["status"])
-		if "results" in update:
-			self._update_results(database_client, executor["run"], update["results"])
-		if "log_chunk" in update:
-			self._update_log_file(executor["run"], update["log_chunk"])
-		if "event" in update:
-			self._handle_event(executor, update["event"])
+	async def _process_update_batch(self, executor: dict, update_batch: RunUpdateBatch) -> None:
+		""" Process the updates received for an executor since the last tick, with a single database write for the run """
 
+		if update_batch.has_run_changes():
+			await self._database_executor.run(self._update_run, executor["run"], update_batch.status, update_batch.results)
 
-	def _update_status(self, database_client: DatabaseClient, run: dict, status: dict) -> None:
-		""" Process an update for the run status """
+		log_chunk = update_batch.get_log_chunk()
+		if log_chunk is not None:
+			self._update_log_file(executor["run"], log_chunk)
 
-		properties_to_update = [ "status", "start_date", "completion_date" ]
-		self._run_provider.update_status(database_client, run, ** { key: value for key, value in status.items() if key in properties_to_update })
+		for event in update_batch.event_collection:
+			self._handle_event(executor, event)
 
 
-	def _update_results(self, database_client: DatabaseClient, run: dict, results: dict) -> None:
-		""" Process an update for the run results """
-		self._run_provider.set_results(database_client, run, results)
+	def _update_run(self, database_client: DatabaseClient, run: dict, status: dict, results: Optional[dict]) -> None:
+		""" Process an update for the run status and results """
+
+		properties_to_update = [ "status", "start_date", "completion_date" ]
+		status = { key: value for key, value in status.items() if key in properties_to_update }
+		self._run_provider.update_status(database_client, run, results = results, **status)
 
 
 	def _update_log_file(self, run: dict, log_chunk: str) -> None:
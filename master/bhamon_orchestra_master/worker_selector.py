@@ -1,8 +1,9 @@
 import logging
 import random
 
-from typing import Callable, Optional
+from typing import List, Optional
 
+from bhamon_orchestra_master.database_executor import DatabaseExecutor
 from bhamon_orchestra_master.supervisor import Supervisor
 from bhamon_orchestra_model.database.database_client import DatabaseClient
 from bhamon_orchestra_model.worker_provider import WorkerProvider
@@ -19,30 +20,34 @@ class WorkerSelector:
 	"""
 
 
-	def __init__(self, database_client_factory: Callable[[], DatabaseClient],
-			worker_provider: WorkerProvider, supervisor: Supervisor) -> None:
-
-		self._database_client_factory = database_client_factory
+	def __init__(self, database_executor: DatabaseExecutor, worker_provider: WorkerProvider, supervisor: Supervisor) -> None:
+		self._database_executor = database_executor
 		self._worker_provider = worker_provider
 		self._supervisor = supervisor
 
 
-	def __call__(self, job: dict, run: dict) -> Optional[str]:
-		return self.select_worker(job, run)
+	async def __call__(self, job: dict, run: dict) -> Optional[str]:
+		return await self.select_worker(job, run)
 
 
-	def select_worker(self, job: dict, run: dict) -> Optional[str]:
+	async def select_worker(self, job: dict, run: dict) -> Optional[str]:
 		""" Find an available and suitable worker to execute the specified run """
 
-		with self._database_client_factory() as database_client:
-			all_workers = self._worker_provider.get_list(database_client)
-			all_available_workers = [ worker for worker in all_workers if self._supervisor.is_worker_available(database_client, worker["identifier"]) ]
+		all_available_workers = await self._database_executor.run(self._list_available_workers)
+
+		# Workers may have disconnected while their records were being retrieved
+		all_available_workers = [ worker for worker in all_available_workers if self._supervisor.is_worker_active(worker["identifier"]) ]
 
 		random.shuffle(all_available_workers)
 
 		return next((worker["identifier"] for worker in all_available_workers if self.are_compatible(worker, job, run)), None)
 
 
+	def _list_available_workers(self, database_client: DatabaseClient) -> List[dict]:
+		all_workers = self._worker_provider.get_list(database_client)
+		return [ worker for worker in all_workers if self._supervisor.is_worker_available(database_client, worker["identifier"]) ]
+
+
 	def are_compatible(self, worker: dict, job: dict, run: dict) -> bool: # pylint: disable = unused-argument
 		""" Check if a worker is able to execute the specified run """
 
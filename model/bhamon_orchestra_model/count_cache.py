@@ -0,0 +1,17 @@
+from bhamon_orchestra_model.database.database_client import DatabaseClient
+from bhamon_orchestra_model.table_cache import TableCache
+
+
+class CountCache(TableCache):
+	""" In-process cache for the item counts of tables, by filter.
+
+	Entries are invalidated when the process writes to the table, and expire after a short time
+	since other processes can write to the same tables. Counts can therefore be slightly out of date,
+	which is acceptable for displaying pagination.
+
+	"""
+
+
+	def count(self, database_client: DatabaseClient, table: str, filter: dict) -> int: # pylint: disable = redefined-builtin
+		""" Return how many items are in a table, after applying a filter, from the cache if possible """
+		return self._read_through((table, repr(sorted(filter.items()))), lambda: database_client.count(table, filter))
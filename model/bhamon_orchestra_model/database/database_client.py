@@ -1,5 +1,9 @@
 import abc
-from typing import List, Optional, Tuple
+import functools
+import heapq
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from bhamon_orchestra_model.database.database_watch import DatabaseWatch
 
 
 class DatabaseClient(abc.ABC):
@@ -19,16 +23,28 @@ class DatabaseClient(abc.ABC):
 		""" Return how many items are in a table, after applying a filter """
 
 
+	# Results can be paginated with start_after, holding the values of the order-by keys for the last item of the previous page.
+	# The order-by expression should end with unique keys, so that items are never skipped or repeated between pages.
+
 	@abc.abstractmethod
 	def find_many(self, # pylint: disable = too-many-arguments
 			table: str, filter: dict, # pylint: disable = redefined-builtin
-			skip: int = 0, limit: Optional[int] = None, order_by: Optional[List[Tuple[str,str]]] = None) -> List[dict]:
-		""" Return a list of items from a table, after applying a filter, with options for limiting and sorting results """
+			skip: int = 0, limit: Optional[int] = None, order_by: Optional[List[Tuple[str,str]]] = None, fields: Optional[List[str]] = None,
+			start_after: Optional[dict] = None) -> List[dict]:
+		""" Return a list of items from a table, after applying a filter, with options for limiting, sorting and selecting fields """
 
 
 	@abc.abstractmethod
-	def find_one(self, table: str, filter: dict) -> Optional[dict]: # pylint: disable = redefined-builtin
-		""" Return a single item (or nothing) from a table, after applying a filter """
+	def find_iter(self, # pylint: disable = too-many-arguments
+			table: str, filter: dict, # pylint: disable = redefined-builtin
+			skip: int = 0, limit: Optional[int] = None, order_by: Optional[List[Tuple[str,str]]] = None, fields: Optional[List[str]] = None,
+			start_after: Optional[dict] = None, batch_size: int = 1000) -> Iterator[dict]:
+		""" Iterate over items from a table, after applying a filter, with options for limiting, sorting and selecting fields, fetching them by batches """
+
+
+	@abc.abstractmethod
+	def find_one(self, table: str, filter: dict, fields: Optional[List[str]] = None) -> Optional[dict]: # pylint: disable = redefined-builtin
+		""" Return a single item (or nothing) from a table, after applying a filter, with an option for selecting fields """
 
 
 	@abc.abstractmethod
@@ -46,16 +62,83 @@ class DatabaseClient(abc.ABC):
 		""" Update a single item (or nothing) from a table, after applying a filter """
 
 
+	@abc.abstractmethod
+	def update_many(self, table: str, filter: dict, data: dict) -> None: # pylint: disable = redefined-builtin
+		""" Update all items from a table, after applying a filter """
+
+
+	@abc.abstractmethod
+	def upsert_one(self, table: str, filter: dict, data: dict, insert_data: Optional[dict] = None) -> None: # pylint: disable = redefined-builtin
+		""" Update a single item from a table, after applying a filter, or insert it from the filter, data and insert data if there is none """
+
+
+	# Increments are applied by the database in the same operation as the update, so that changes from several clients are not lost.
+	# Their keys can refer to a field nested one level deep, such as "counts.value", missing values counting as zero.
+
+	@abc.abstractmethod
+	def increment_one(self, # pylint: disable = too-many-arguments
+			table: str, filter: dict, increments: Dict[str,int], # pylint: disable = redefined-builtin
+			data: Optional[dict] = None, insert_data: Optional[dict] = None) -> Optional[dict]:
+		""" Increment and update a single item from a table, after applying a filter, or insert it if there is none, and return it once changed """
+
+
 	@abc.abstractmethod
 	def delete_one(self, table: str, filter: dict) -> None: # pylint: disable = redefined-builtin
 		""" Delete a single item (or nothing) from a table, after applying a filter """
 
 
+	@abc.abstractmethod
+	def delete_many(self, table: str, filter: dict) -> None: # pylint: disable = redefined-builtin
+		""" Delete all items from a table, after applying a filter """
+
+
+	# Watches notify about items inserted or updated which match the filter once changed, and about deleted items.
+	# They may notify about other changes too, depending on what the database can filter, and callbacks may run on another thread.
+
+	@abc.abstractmethod
+	def watch(self, table: str, filter: dict, callback: Callable[[dict], None]) -> DatabaseWatch: # pylint: disable = redefined-builtin
+		""" Watch a table for changes, calling back with the table and operation for each change until the watch is closed """
+
+
+	def is_watch_supported(self) -> bool:
+		""" Check if the database supports watching changes, callers relying on polling only otherwise """
+		return True
+
+
+	def is_thread_safe(self) -> bool:
+		""" Check if clients from the same factory can be used by several threads at once, callers running operations one at a time otherwise """
+		return True
+
+
 	@abc.abstractmethod
 	def close(self) -> None:
 		""" Close the database connection """
 
 
+	def is_database_error(self, exception: Exception) -> bool: # pylint: disable = unused-argument
+		""" Check if an exception was raised by the database or its driver, in which case the client may not be usable anymore """
+		return False
+
+
+	def _apply_increments(self, row: dict, increments: Dict[str,int]) -> dict:
+		""" Return the fields of an item changed by increments, missing values counting as zero """
+
+		updated_fields = {}
+
+		for key, value in increments.items():
+			all_key_parts = key.split(".")
+
+			if len(all_key_parts) == 1:
+				updated_fields[key] = (row.get(key, None) or 0) + value
+			elif len(all_key_parts) == 2:
+				field = updated_fields.setdefault(all_key_parts[0], dict(row.get(all_key_parts[0], None) or {}))
+				field[all_key_parts[1]] = (field.get(all_key_parts[1], None) or 0) + value
+			else:
+				raise ValueError("Increment key '%s' is nested more than one level deep" % key)
+
+		return updated_fields
+
+
 	def _normalize_order_by_expression(self, expression: Optional[List[Tuple[str,str]]]) -> Optional[List[Tuple[str,str]]]:
 		""" Normalize an order-by expression to simplify its interpretation """
 
@@ -75,3 +158,104 @@ class DatabaseClient(abc.ABC):
 			else:
 				raise ValueError("Invalid order_by item '%s'" % str(item))
 		return normalized_expression
+
+
+	def _normalize_start_after(self, expression: Optional[List[Tuple[str,str]]], start_after: Optional[dict]) -> Optional[List[Tuple[str,str,Any]]]:
+		""" Normalize a start-after item to a list of order-by keys, directions and values, to paginate results """
+
+		if start_after is None:
+			return None
+
+		expression = self._normalize_order_by_expression(expression)
+		if expression is None or len(expression) == 0:
+			raise ValueError("Invalid start_after without order_by")
+
+		for key, direction in expression:
+			if key not in start_after:
+				raise ValueError("Invalid start_after, missing key '%s'" % key)
+
+		return [ (key, direction, start_after[key]) for key, direction in expression ]
+
+
+	def _is_after_start(self, row: dict, start_after: List[Tuple[str,str,Any]], get_value: Callable[[dict,str],Any]) -> bool:
+		""" Check if an item comes after a normalized start-after item, with null values first """
+
+		for key, direction, start_value in start_after:
+			value = get_value(row, key)
+			value_key, start_value_key = (value is not None, value), (start_value is not None, start_value)
+			if value_key != start_value_key:
+				return value_key > start_value_key if direction in [ "asc", "ascending" ] else value_key < start_value_key
+
+		return False
+
+
+	def _apply_order_by(self, row_collection: List[dict], expression: Optional[List[Tuple[str,str]]], limit: Optional[int] = None) -> List[dict]:
+		""" Sort items according to an order-by expression, with null values first, computing the sort keys once per item.
+
+		If a limit is set, only the first items are returned, selected with a heap rather than a full sort when they are few.
+
+		"""
+
+		expression = self._normalize_order_by_expression(expression)
+		if expression is None or len(expression) == 0:
+			return row_collection[ : limit ]
+		if limit == 0:
+			return []
+
+		all_key_paths = [ key.split(".") for key, direction in expression ]
+		all_descending_flags = [ direction in [ "desc", "descending" ] for key, direction in expression ]
+		all_key_groups = self._group_sort_keys(all_descending_flags)
+		get_sort_key = functools.partial(self._get_sort_key, all_key_paths = all_key_paths)
+
+		if limit is not None and limit * 4 < len(row_collection):
+			select_function = heapq.nlargest if all_descending_flags[0] else heapq.nsmallest
+
+			if len(all_key_groups) == 1:
+				return select_function(limit, row_collection, key = get_sort_key)
+
+			# With mixed directions, keep only the items which can be selected according to the first keys, before sorting them
+			get_first_sort_key = functools.partial(self._get_sort_key, all_key_paths = all_key_paths[ : all_key_groups[0][1] // 2 ])
+			row_collection = self._select_before_boundary(row_collection, limit, get_first_sort_key, all_descending_flags[0])
+
+		if len(all_key_groups) == 1:
+			return sorted(row_collection, key = get_sort_key, reverse = all_descending_flags[0])[ : limit ]
+
+		# With mixed directions, sort once per group of keys, starting from the last one, relying on the sort stability
+		decorated_collection = [ (get_sort_key(row), row) for row in row_collection ]
+		for start_index, end_index, is_descending in reversed(all_key_groups):
+			decorated_collection.sort(key = lambda item, start_index = start_index, end_index = end_index: item[0][ start_index : end_index ], reverse = is_descending)
+		return [ row for sort_key, row in decorated_collection[ : limit ] ]
+
+
+	def _group_sort_keys(self, all_descending_flags: List[bool]) -> List[Tuple[int,int,bool]]:
+		""" Group consecutive keys with the same direction, as slices of a flat sort key with a null flag and a value for each key """
+
+		all_key_groups = []
+		for key_index, is_descending in enumerate(all_descending_flags):
+			if len(all_key_groups) > 0 and all_key_groups[-1][2] == is_descending:
+				all_key_groups[-1] = (all_key_groups[-1][0], key_index * 2 + 2, is_descending)
+			else:
+				all_key_groups.append((key_index * 2, key_index * 2 + 2, is_descending))
+		return all_key_groups
+
+
+	def _get_sort_key(self, row: dict, all_key_paths: List[List[str]]) -> tuple:
+		""" Compute the flat sort key for an item, with a null flag and a value for each key """
+
+		sort_key = []
+		for key_path in all_key_paths:
+			value = row
+			for key_part in key_path:
+				value = value.get(key_part) if isinstance(value, dict) else None
+			sort_key += [ value is not None, value ]
+		return tuple(sort_key)
+
+
+	def _select_before_boundary(self, row_collection: List[dict], limit: int, get_sort_key: Callable[[dict],tuple], is_descending: bool) -> List[dict]:
+		""" Keep only the items which come before or with the last of the first items according to a sort key """
+
+		select_function = heapq.nlargest if is_descending else heapq.nsmallest
+		boundary = get_sort_key(select_function(limit, row_collection, key = get_sort_key)[-1])
+		if is_descending:
+			return [ row for row in row_collection if get_sort_key(row) >= boundary ]
+		return [ row for row in row_collection if get_sort_key(row) <= boundary ]
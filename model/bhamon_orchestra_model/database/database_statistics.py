@@ -0,0 +1,93 @@
+import bisect
+import logging
+import threading
+from typing import List, Optional
+
+
+logger = logging.getLogger("DatabaseStatistics")
+
+
+class DatabaseStatistics:
+	""" Collector for the statistics of database operations, aggregated by table and operation.
+
+	Each aggregate holds the call count, the row count and a latency histogram, with buckets defined by their upper bound in seconds.
+	Operations taking longer than the slow operation threshold are logged with the keys of their filter, but not its values.
+
+	"""
+
+
+	def __init__(self, slow_operation_threshold: float = 1.0, histogram_bounds: Optional[List[float]] = None) -> None:
+		self.slow_operation_threshold = slow_operation_threshold
+		self.histogram_bounds = histogram_bounds if histogram_bounds is not None else [ 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0 ]
+
+		self._lock = threading.Lock()
+		self._aggregates = {}
+
+
+	def record(self, # pylint: disable = too-many-arguments
+			table: str, operation: str, duration: float, row_count: int, filter: Optional[dict] = None) -> None: # pylint: disable = redefined-builtin
+		""" Record a database operation """
+
+		with self._lock:
+			aggregate = self._aggregates.get((table, operation), None)
+			if aggregate is None:
+				aggregate = { "call_count": 0, "row_count": 0, "total_duration": 0.0, "maximum_duration": 0.0, "histogram": [ 0 ] * (len(self.histogram_bounds) + 1) }
+				self._aggregates[(table, operation)] = aggregate
+
+			aggregate["call_count"] += 1
+			aggregate["row_count"] += row_count
+			aggregate["total_duration"] += duration
+			aggregate["maximum_duration"] = max(aggregate["maximum_duration"], duration)
+			aggregate["histogram"][bisect.bisect_left(self.histogram_bounds, duration)] += 1
+
+		if duration >= self.slow_operation_threshold:
+			logger.warning("Slow database operation %s on %s (Duration: %.3fs, Rows: %s, Filter: %s)",
+				operation, table, duration, row_count, self.get_filter_shape(filter))
+
+
+	def get_snapshot(self) -> List[dict]:
+		""" Return the aggregated statistics, sorted by table and operation """
+
+		with self._lock:
+			aggregate_collection = sorted(self._aggregates.items())
+
+		snapshot = []
+		for (table, operation), aggregate in aggregate_collection:
+			histogram = [ { "upper_bound": bound, "count": count } for bound, count in zip(self.histogram_bounds + [ None ], aggregate["histogram"]) ]
+
+			snapshot.append({
+				"table": table,
+				"operation": operation,
+				"call_count": aggregate["call_count"],
+				"row_count": aggregate["row_count"],
+				"total_duration": aggregate["total_duration"],
+				"average_duration": aggregate["total_duration"] / aggregate["call_count"],
+				"maximum_duration": aggregate["maximum_duration"],
+				"histogram": histogram,
+			})
+
+		return snapshot
+
+
+	def reset(self) -> None:
+		""" Remove all the recorded statistics """
+
+		with self._lock:
+			self._aggregates.clear()
+
+
+	def log_summary(self) -> None:
+		""" Write the aggregated statistics to the log, starting with the operations with the highest total duration """
+
+		snapshot = sorted(self.get_snapshot(), key = lambda aggregate: aggregate["total_duration"], reverse = True)
+
+		logger.info("Database statistics (Operations: %s)", len(snapshot))
+		for aggregate in snapshot:
+			logger.info("%s on %s (Calls: %s, Rows: %s, Total: %.3fs, Average: %.3fs, Maximum: %.3fs)",
+				aggregate["operation"], aggregate["table"], aggregate["call_count"], aggregate["row_count"],
+				aggregate["total_duration"], aggregate["average_duration"], aggregate["maximum_duration"])
+
+
+	def get_filter_shape(self, filter: Optional[dict]) -> Optional[List[str]]: # pylint: disable = redefined-builtin
+		""" Return the keys used by a filter, so that it can be logged without its values """
+		return sorted(filter.keys()) if filter is not None else None
@@ -0,0 +1,128 @@
+import logging
+import threading
+from typing import Callable, Optional
+
+
+logger = logging.getLogger("DatabaseWatch")
+
+
+class DatabaseWatch:
+	""" Handle for watching changes to a database table, calling back for each change until closed.
+
+	Changes are listened to either by callbacks from the database client or by a thread started for the watch,
+	in which case the callback is called from that thread. Notifications are hints that the data may have changed:
+	they can be raised for changes outside of the watch filter, so callers should read the data again to know the actual changes.
+
+	When the database client knows whether the change was made by a client from the same factory, the change includes it as is_own_change.
+
+	"""
+
+
+	def __init__(self, table: str, filter: dict, callback: Callable[[dict], None]) -> None: # pylint: disable = redefined-builtin
+		self.table = table
+		self.filter = filter
+		self.callback = callback
+
+		self._ready_event = threading.Event()
+		self._close_event = threading.Event()
+		self._close_handlers = []
+		self._thread = None
+		self._start_exception = None
+		self.close_timeout = 5
+
+
+	def __enter__(self):
+		return self
+
+
+	def __exit__(self, exception_type, exception_value, traceback):
+		self.close()
+
+
+	def start(self, target: Callable[["DatabaseWatch"], None], name: Optional[str] = None) -> None:
+		""" Start a thread listening for changes, running the target until it returns, which it should do once the watch is closed.
+
+		The target should call set_ready once it listens for changes, so that no change made after starting the watch is missed.
+		Exceptions raised by the target before that are raised again for the caller.
+
+		"""
+
+		if self._thread is not None:
+			raise RuntimeError("Database watch for table '%s' is already started" % self.table)
+
+		self._thread = threading.Thread(target = self._run, args = (target,), name = name or ("DatabaseWatch-" + self.table), daemon = True)
+		self._thread.start()
+		self._ready_event.wait()
+
+		if self._start_exception is not None:
+			self._close_event.set()
+			raise self._start_exception
+
+
+	def set_ready(self) -> None:
+		""" Signal the thread started for the watch is listening for changes """
+		self._ready_event.set()
+
+
+	def add_close_handler(self, handler: Callable[[], None]) -> None:
+		""" Add a function to call when the watch is closed, to release the resources used for listening """
+		self._close_handlers.append(handler)
+
+
+	def notify(self, operation: str, is_own_change: Optional[bool] = None) -> None:
+		""" Call back for a change to the table """
+
+		if self.is_closed():
+			return
+
+		change = { "table": self.table, "operation": operation }
+		if is_own_change is not None:
+			change["is_own_change"] = is_own_change
+
+		try:
+			self.callback(change)
+		except Exception: # pylint: disable = broad-except
+			logger.error("Unhandled exception in callback for table '%s'", self.table, exc_info = True)
+
+
+	def is_closed(self) -> bool:
+		""" Check if the watch was closed """
+		return self._close_event.is_set()
+
+
+	def wait(self, timeout: float) -> bool:
+		""" Wait until the watch is closed or the timeout expires, and return if it was closed """
+		return self._close_event.wait(timeout)
+
+
+	def close(self) -> None:
+		""" Stop listening for changes """
+
+		if self.is_closed():
+			return
+
+		self._close_event.set()
+
+		all_handlers = list(self._close_handlers)
+		self._close_handlers.clear()
+
+		for handler in all_handlers:
+			try:
+				handler()
+			except Exception: # pylint: disable = broad-except
+				logger.warning("Failed to release resources for table '%s'", self.table, exc_info = True)
+
+		if self._thread is not None and self._thread is not threading.current_thread():
+			self._thread.join(self.close_timeout)
+
+
+	def _run(self, target: Callable[["DatabaseWatch"], None]) -> None:
+		try:
+			target(self)
+		except Exception as exception: # pylint: disable = broad-except
+			if not self._ready_event.is_set():
+				self._start_exception = exception
+			elif not self.is_closed():
+				logger.error("Stopped watching table '%s' after an unhandled exception", self.table, exc_info = True)
+		finally:
+			self._ready_event.set()
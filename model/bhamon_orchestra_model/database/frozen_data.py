@@ -0,0 +1,70 @@
+import copy
+import datetime
+from typing import Any, NoReturn
+
+
+# Frozen data is read-only, so that it can be shared between readers instead of being copied for each of them.
+# Frozen containers are still dictionaries and lists, for comparing and serializing them,
+# and copying them with the copy module returns regular containers which can be modified.
+
+immutable_types = (str, bytes, int, float, bool, type(None), datetime.date, datetime.time, datetime.timedelta)
+
+
+def freeze(value: Any) -> Any:
+	""" Copy a value to frozen containers, sharing the immutable values it holds """
+
+	if isinstance(value, (FrozenDict, FrozenList)):
+		return value
+	if isinstance(value, dict):
+		return FrozenDict((key, freeze(item)) for key, item in value.items())
+	if isinstance(value, list):
+		return FrozenList(freeze(item) for item in value)
+	if isinstance(value, immutable_types):
+		return value
+	return copy.deepcopy(value)
+
+
+def _raise_read_only(self, *args, **kwargs) -> NoReturn: # pylint: disable = unused-argument
+	raise TypeError("%s is read-only, it should be copied before being modified" % type(self).__name__)
+
+
+class FrozenDict(dict):
+	""" Read-only dictionary """
+
+	__slots__ = ()
+
+	__setitem__ = __delitem__ = __ior__ = _raise_read_only
+	clear = pop = popitem = setdefault = update = _raise_read_only
+
+
+	def __copy__(self) -> dict:
+		return dict(self)
+
+
+	def __deepcopy__(self, memo: dict) -> dict:
+		return { key: copy.deepcopy(item, memo) for key, item in self.items() }
+
+
+	def __reduce_ex__(self, protocol: int) -> tuple:
+		return (dict, (dict(self),))
+
+
+class FrozenList(list):
+	""" Read-only list """
+
+	__slots__ = ()
+
+	__setitem__ = __delitem__ = __iadd__ = __imul__ = _raise_read_only
+	append = clear = extend = insert = pop = remove = reverse = sort = _raise_read_only
+
+
+	def __copy__(self) -> list:
+		return list(self)
+
+
+	def __deepcopy__(self, memo: dict) -> list:
+		return [ copy.deepcopy(item, memo) for item in self ]
+
+
+	def __reduce_ex__(self, protocol: int) -> tuple:
+		return (list, (list(self),))
@@ -1,7 +1,10 @@
+import concurrent.futures
+import gzip
+import itertools
 import logging
 import os
 
-from typing import List
+from typing import Callable, Iterable, Iterator, List, Optional, TextIO
 
 from bhamon_orchestra_model.database.database_client import DatabaseClient
 from bhamon_orchestra_model.serialization.serializer import Serializer
@@ -10,7 +13,17 @@ from bhamon_orchestra_model.serialization.serializer import Serializer
 logger = logging.getLogger("Database")
 
 
-def import_database(database_client: DatabaseClient, serializer: Serializer, source_directory: str, simulate: bool = False) -> None:
+# Tables are exported as newline-delimited JSON (NDJSON) by default, with one row per line,
+# so that both exporting and importing handle a single row at a time, whatever the table size.
+# The json format writes each table as a single list, as done by earlier versions, and is still supported for imports.
+
+all_file_formats = [ "json", "ndjson" ]
+all_compression_extensions = { "gzip": ".gz", "zstd": ".zst" }
+
+
+def import_database(database_client: DatabaseClient, # pylint: disable = too-many-arguments
+		serializer: Serializer, source_directory: str, simulate: bool = False, batch_size: int = 1000) -> None:
+
 	logger.info("Importing database")
 
 	if not os.path.exists(source_directory):
@@ -19,11 +32,19 @@ def import_database(database_client: DatabaseClient, serializer: Serializer, sou
 	all_tables = []
 	all_tables += [ "user", "user_authentication" ]
 	all_tables += [ "project", "job", "run", "schedule", "worker" ]
+	all_tables += [ "run_archive", "revision_status" ]
+
+	# Tables added after the first exports are optional when importing
+	all_optional_tables = [ "run_archive", "revision_status" ]
 
 	check_if_empty(database_client, all_tables)
 
 	for table in all_tables:
-		import_table(database_client, serializer, table, source_directory, simulate = simulate)
+		if table in all_optional_tables and find_table_file(serializer, table, source_directory) is None:
+			logger.info("Skipping table '%s'", table)
+			continue
+
+		import_table(database_client, serializer, table, source_directory, simulate = simulate, batch_size = batch_size)
 
 
 def check_if_empty(database_client: DatabaseClient, all_tables: List[str]) -> None:
@@ -38,18 +59,50 @@ def check_if_empty(database_client: DatabaseClient, all_tables: List[str]) -> No
 		raise ValueError("Database is not empty")
 
 
-def import_table(database_client: DatabaseClient, serializer: Serializer, table: str, source_directory: str, simulate: bool = False) -> None:
+def import_table(database_client: DatabaseClient, # pylint: disable = too-many-arguments
+		serializer: Serializer, table: str, source_directory: str, simulate: bool = False, batch_size: int = 1000) -> None:
+
 	logger.info("Importing table '%s'", table)
 
-	source_file_path = os.path.join(source_directory, table + serializer.get_file_extension())
-	dataset = serializer.deserialize_from_file(source_file_path)
+	if batch_size < 1:
+		raise ValueError("Invalid batch size: '%s'" % batch_size)
+
+	source_file = find_table_file(serializer, table, source_directory)
+	if source_file is None:
+		raise ValueError("Source file does not exist for table '%s'" % table)
+
+	source_file_path, file_format, compression = source_file
+
+	if file_format == "ndjson":
+		with open_file(source_file_path, "r", compression) as source_file:
+			_insert_in_batches(database_client, table, _read_rows(serializer, source_file), batch_size, simulate)
+
+	else:
+		dataset = serializer.deserialize_from_file(source_file_path)
+		_insert_in_batches(database_client, table, dataset, batch_size, simulate)
 
-	if not simulate:
-		if len(dataset) > 0:
-			database_client.insert_many(table, dataset)
 
+def find_table_file(serializer: Serializer, table: str, source_directory: str) -> Optional[tuple]:
+	""" Find the file for a table in an export, and return its path, format and compression """
+
+	for compression in [ None ] + list(all_compression_extensions):
+		file_path = os.path.join(source_directory, get_file_name(serializer, table, "ndjson", compression))
+		if os.path.exists(file_path):
+			return (file_path, "ndjson", compression)
+
+	file_path = os.path.join(source_directory, get_file_name(serializer, table, "json", None))
+	if os.path.exists(file_path):
+		return (file_path, "json", None)
+
+	return None
+
+
+def export_database(database_client_factory: Callable[[], DatabaseClient], # pylint: disable = too-many-arguments
+		serializer: Serializer, output_directory: str, simulate: bool = False,
+		file_format: str = "ndjson", compression: Optional[str] = None, thread_count: int = 4) -> None:
+
+	""" Export all tables, each in its own thread and with its own database client """
 
-def export_database(database_client: DatabaseClient, serializer: Serializer, output_directory: str, simulate: bool = False) -> None:
 	logger.info("Exporting database")
 
 	if os.path.exists(output_directory):
@@ -60,16 +113,100 @@ def export_database(database_client: DatabaseClient, serializer: Serializer, out
 
 	all_tables = [ "project", "job", "schedule", "run", "worker" ]
 	all_tables += [ "user", "user_authentication" ]
+	all_tables += [ "run_archive", "revision_status" ]
 
-	for table in all_tables:
-		export_table(database_client, serializer, table, output_directory, simulate = simulate)
+	def export_table_with_client(table: str) -> None:
+		with database_client_factory() as database_client:
+			export_table(database_client, serializer, table, output_directory, simulate = simulate, file_format = file_format, compression = compression)
+
+	with concurrent.futures.ThreadPoolExecutor(max_workers = thread_count, thread_name_prefix = "DatabaseExport") as executor:
+		all_futures = [ executor.submit(export_table_with_client, table) for table in all_tables ]
+
+		for future in all_futures:
+			future.result()
 
 
-def export_table(database_client: DatabaseClient, serializer: Serializer, table: str, output_directory: str, simulate: bool = False) -> None:
+def export_table(database_client: DatabaseClient, # pylint: disable = too-many-arguments
+		serializer: Serializer, table: str, output_directory: str, simulate: bool = False,
+		file_format: str = "ndjson", compression: Optional[str] = None) -> None:
+
 	logger.info("Exporting table '%s'", table)
 
-	dataset = database_client.find_many(table, {})
-	output_file_path = os.path.join(output_directory, table + serializer.get_file_extension())
+	output_file_path = os.path.join(output_directory, get_file_name(serializer, table, file_format, compression))
 
-	if not simulate:
-		serializer.serialize_to_file(output_file_path, dataset)
+	if simulate:
+		return
+
+	if file_format == "ndjson":
+		with open_file(output_file_path + ".tmp", "w", compression) as output_file:
+			_write_rows(serializer, output_file, database_client.find_iter(table, {}))
+		os.replace(output_file_path + ".tmp", output_file_path)
+
+	else:
+		serializer.serialize_collection_to_file(output_file_path, database_client.find_iter(table, {}))
+
+
+def get_file_name(serializer: Serializer, table: str, file_format: str, compression: Optional[str]) -> str:
+	if file_format not in all_file_formats:
+		raise ValueError("Unsupported file format: '%s'" % file_format)
+	if compression is not None and compression not in all_compression_extensions:
+		raise ValueError("Unsupported compression: '%s'" % compression)
+	if file_format == "json" and compression is not None:
+		raise ValueError("Compression is supported only for the ndjson file format")
+
+	if file_format == "json":
+		return table + serializer.get_file_extension()
+	return table + ".ndjson" + all_compression_extensions.get(compression, "")
+
+
+def open_file(path: str, mode: str, compression: Optional[str]) -> TextIO:
+	""" Open a text file, compressed or not, for reading or writing it as a stream """
+
+	if compression is None:
+		return open(path, mode = mode, encoding = "utf-8")
+
+	if compression == "gzip":
+		return gzip.open(path, mode = mode + "t", encoding = "utf-8")
+
+	if compression == "zstd":
+		try:
+			import zstandard # pylint: disable = import-outside-toplevel
+		except ImportError:
+			raise ValueError("The zstandard package is required for the zstd compression") from None
+
+		return zstandard.open(path, mode = mode + "t", encoding = "utf-8")
+
+	raise ValueError("Unsupported compression: '%s'" % compression)
+
+
+def _read_rows(serializer: Serializer, source_file: TextIO) -> Iterator[dict]:
+	for line in source_file:
+		if line.strip() != "":
+			yield serializer.deserialize_from_string(line)
+
+
+def _write_rows(serializer: Serializer, output_file: TextIO, row_collection: Iterable[dict]) -> None:
+	for row in row_collection:
+		line = serializer.serialize_to_string(row)
+		if "\n" in line:
+			raise ValueError("Serializer must write rows on a single line for the ndjson file format")
+
+		output_file.write(line)
+		output_file.write("\n")
+
+
+def _insert_in_batches(database_client: DatabaseClient, table: str, row_collection: Iterable[dict], batch_size: int, simulate: bool) -> None:
+	row_iterator = iter(row_collection)
+	row_count = 0
+
+	while True:
+		batch = list(itertools.islice(row_iterator, batch_size))
+		if len(batch) == 0:
+			break
+
+		if not simulate:
+			database_client.insert_many(table, batch)
+
+		row_count += len(batch)
+
+	logger.debug("Imported %s rows into table '%s'", row_count, table)
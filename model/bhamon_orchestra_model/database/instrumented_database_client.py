@@ -0,0 +1,182 @@
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from bhamon_orchestra_model.database.database_client import DatabaseClient
+from bhamon_orchestra_model.database.database_statistics import DatabaseStatistics
+from bhamon_orchestra_model.database.database_watch import DatabaseWatch
+
+
+class InstrumentedDatabaseClient(DatabaseClient):
+	""" Database client decorator recording the duration of operations and the rows they return or insert.
+
+	It can wrap clients from any factory, see wrap_factory, with the statistics shared between all clients of an application.
+
+	"""
+
+
+	def __init__(self, database_client: DatabaseClient, statistics: DatabaseStatistics) -> None:
+		self.database_client = database_client
+		self.statistics = statistics
+
+
+	@staticmethod
+	def wrap_factory(database_client_factory: Callable[[], DatabaseClient], statistics: DatabaseStatistics) -> Callable[[], DatabaseClient]:
+		""" Create a factory for instrumented clients, wrapping the clients from another factory """
+		return lambda: InstrumentedDatabaseClient(database_client_factory(), statistics)
+
+
+	def count(self, table: str, filter: dict) -> int: # pylint: disable = redefined-builtin
+		""" Return how many items are in a table, after applying a filter """
+
+		start_time = time.perf_counter()
+		result = self.database_client.count(table, filter)
+		self.statistics.record(table, "count", time.perf_counter() - start_time, 0, filter)
+		return result
+
+
+	def find_many(self, # pylint: disable = too-many-arguments
+			table: str, filter: dict, # pylint: disable = redefined-builtin
+			skip: int = 0, limit: Optional[int] = None, order_by: Optional[List[Tuple[str,str]]] = None, fields: Optional[List[str]] = None,
+			start_after: Optional[dict] = None) -> List[dict]:
+		""" Return a list of items from a table, after applying a filter, with options for limiting, sorting and selecting fields """
+
+		start_time = time.perf_counter()
+		result = self.database_client.find_many(table, filter, skip = skip, limit = limit, order_by = order_by, fields = fields, start_after = start_after)
+		self.statistics.record(table, "find_many", time.perf_counter() - start_time, len(result), filter)
+		return result
+
+
+	def find_iter(self, # pylint: disable = too-many-arguments
+			table: str, filter: dict, # pylint: disable = redefined-builtin
+			skip: int = 0, limit: Optional[int] = None, order_by: Optional[List[Tuple[str,str]]] = None, fields: Optional[List[str]] = None,
+			start_after: Optional[dict] = None, batch_size: int = 1000) -> Iterator[dict]:
+		""" Iterate over items from a table, after applying a filter, with options for limiting, sorting and selecting fields, fetching them by batches """
+
+		start_time = time.perf_counter()
+		iterator = self.database_client.find_iter(table, filter,
+			skip = skip, limit = limit, order_by = order_by, fields = fields, start_after = start_after, batch_size = batch_size)
+		return self._iterate(table, filter, iterator, time.perf_counter() - start_time)
+
+
+	def find_one(self, table: str, filter: dict, fields: Optional[List[str]] = None) -> Optional[dict]: # pylint: disable = redefined-builtin
+		""" Return a single item (or nothing) from a table, after applying a filter, with an option for selecting fields """
+
+		start_time = time.perf_counter()
+		result = self.database_client.find_one(table, filter, fields = fields)
+		self.statistics.record(table, "find_one", time.perf_counter() - start_time, 0 if result is None else 1, filter)
+		return result
+
+
+	def insert_one(self, table: str, data: dict) -> None:
+		""" Insert a new item into a table """
+
+		start_time = time.perf_counter()
+		self.database_client.insert_one(table, data)
+		self.statistics.record(table, "insert_one", time.perf_counter() - start_time, 1)
+
+
+	def insert_many(self, table: str, dataset: List[dict]) -> None:
+		""" Insert a list of items into a table """
+
+		start_time = time.perf_counter()
+		self.database_client.insert_many(table, dataset)
+		self.statistics.record(table, "insert_many", time.perf_counter() - start_time, len(dataset))
+
+
+	def update_one(self, table: str, filter: dict, data: dict) -> None: # pylint: disable = redefined-builtin
+		""" Update a single item (or nothing) from a table, after applying a filter """
+
+		start_time = time.perf_counter()
+		self.database_client.update_one(table, filter, data)
+		self.statistics.record(table, "update_one", time.perf_counter() - start_time, 0, filter)
+
+
+	def update_many(self, table: str, filter: dict, data: dict) -> None: # pylint: disable = redefined-builtin
+		""" Update all items from a table, after applying a filter """
+
+		start_time = time.perf_counter()
+		self.database_client.update_many(table, filter, data)
+		self.statistics.record(table, "update_many", time.perf_counter() - start_time, 0, filter)
+
+
+	def upsert_one(self, table: str, filter: dict, data: dict, insert_data: Optional[dict] = None) -> None: # pylint: disable = redefined-builtin
+		""" Update a single item from a table, after applying a filter, or insert it from the filter, data and insert data if there is none """
+
+		start_time = time.perf_counter()
+		self.database_client.upsert_one(table, filter, data, insert_data)
+		self.statistics.record(table, "upsert_one", time.perf_counter() - start_time, 0, filter)
+
+
+	def increment_one(self, # pylint: disable = too-many-arguments
+			table: str, filter: dict, increments: Dict[str,int], # pylint: disable = redefined-builtin
+			data: Optional[dict] = None, insert_data: Optional[dict] = None) -> Optional[dict]:
+		""" Increment and update a single item from a table, after applying a filter, or insert it if there is none, and return it once changed """
+
+		start_time = time.perf_counter()
+		result = self.database_client.increment_one(table, filter, increments, data, insert_data)
+		self.statistics.record(table, "increment_one", time.perf_counter() - start_time, 0, filter)
+		return result
+
+
+	def delete_one(self, table: str, filter: dict) -> None: # pylint: disable = redefined-builtin
+		""" Delete a single item (or nothing) from a table, after applying a filter """
+
+		start_time = time.perf_counter()
+		self.database_client.delete_one(table, filter)
+		self.statistics.record(table, "delete_one", time.perf_counter() - start_time, 0, filter)
+
+
+	def delete_many(self, table: str, filter: dict) -> None: # pylint: disable = redefined-builtin
+		""" Delete all items from a table, after applying a filter """
+
+		start_time = time.perf_counter()
+		self.database_client.delete_many(table, filter)
+		self.statistics.record(table, "delete_many", time.perf_counter() - start_time, 0, filter)
+
+
+	def watch(self, table: str, filter: dict, callback: Callable[[dict], None]) -> DatabaseWatch: # pylint: disable = redefined-builtin
+		""" Watch a table for changes, calling back with the table and operation for each change until the watch is closed """
+		return self.database_client.watch(table, filter, callback)
+
+
+	def is_watch_supported(self) -> bool:
+		""" Check if the database supports watching changes, callers relying on polling only otherwise """
+		return self.database_client.is_watch_supported()
+
+
+	def is_thread_safe(self) -> bool:
+		""" Check if clients from the same factory can be used by several threads at once, callers running operations one at a time otherwise """
+		return self.database_client.is_thread_safe()
+
+
+	def close(self) -> None:
+		""" Close the database connection """
+		self.database_client.close()
+
+
+	def is_database_error(self, exception: Exception) -> bool:
+		""" Check if an exception was raised by the database or its driver, in which case the client may not be usable anymore """
+		return self.database_client.is_database_error(exception)
+
+
+	def _iterate(self, table: str, filter: dict, iterator: Iterator[dict], duration: float) -> Iterator[dict]: # pylint: disable = redefined-builtin
+		# Only the time spent fetching items is recorded, not the time spent by the caller processing them
+		row_count = 0
+
+		try:
+			while True:
+				start_time = time.perf_counter()
+				try:
+					row = next(iterator)
+				except StopIteration:
+					break
+				finally:
+					duration += time.perf_counter() - start_time
+
+				row_count += 1
+				yield row
+
+		finally:
+			if hasattr(iterator, "close"):
+				iterator.close()
+			self.statistics.record(table, "find_iter", duration, row_count, filter)
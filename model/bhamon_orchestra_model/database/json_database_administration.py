@@ -59,6 +59,14 @@ class JsonDatabaseAdministration(DatabaseAdministration):
 		if not simulate:
 			self.create_index("run", "identifier_unique", [ ("project", "ascending"), ("identifier", "ascending") ], is_unique = True)
 
+		logger.info("Creating run archive index")
+		if not simulate:
+			self.create_index("run_archive", "identifier_unique", [ ("project", "ascending"), ("identifier", "ascending") ], is_unique = True)
+
+		logger.info("Creating revision status index")
+		if not simulate:
+			self.create_index("revision_status", "identifier_unique", [ ("project", "ascending"), ("revision", "ascending") ], is_unique = True)
+
 		logger.info("Creating job index")
 		if not simulate:
 			self.create_index("job", "identifier_unique", [ ("project", "ascending"), ("identifier", "ascending") ], is_unique = True)
@@ -1,12 +1,14 @@
 import contextlib
-import functools
+import copy
 import logging
 import os
-from typing import Any, List, Optional, Tuple, Union
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
 
 import filelock
 
 from bhamon_orchestra_model.database.database_client import DatabaseClient
+from bhamon_orchestra_model.database.database_watch import DatabaseWatch
+from bhamon_orchestra_model.database.json_table_cache import JsonTableCache, default_table_cache
 from bhamon_orchestra_model.serialization.json_serializer import JsonSerializer
 
 
@@ -17,38 +19,52 @@ class JsonDatabaseClient(DatabaseClient):
 	""" Client for a database storing data as json files, intended for development only. """
 
 
-	def __init__(self, serializer: JsonSerializer, data_directory: str) -> None:
+	def __init__(self, # pylint: disable = too-many-arguments
+			serializer: JsonSerializer, data_directory: str,
+			table_cache: Optional[JsonTableCache] = None, use_journal: bool = False) -> None:
+
 		self._serializer = serializer
+		self._journal_serializer = JsonSerializer()
+		self._table_cache = table_cache if table_cache is not None else default_table_cache
 		self.data_directory = data_directory
 		self.lock_timeout = 5
+		self.use_journal = use_journal
+		self.journal_size_limit = 1024 * 1024
+		self.watch_interval = 0.1
 
 
 	def count(self, table: str, filter: dict) -> int: # pylint: disable = redefined-builtin
 		""" Return how many items are in a table, after applying a filter """
-
-		with self._lock(table, timeout = self.lock_timeout):
-			return sum(1 for row in self._load(table) if self._match_filter(row, filter))
+		return sum(1 for row in self._read(table) if self._match_filter(row, filter))
 
 
 	def find_many(self, # pylint: disable = too-many-arguments
 			table: str, filter: dict, # pylint: disable = redefined-builtin
-			skip: int = 0, limit: Optional[int] = None, order_by: Optional[List[Tuple[str,str]]] = None) -> List[dict]:
-		""" Return a list of items from a table, after applying a filter, with options for limiting and sorting results """
+			skip: int = 0, limit: Optional[int] = None, order_by: Optional[List[Tuple[str,str]]] = None, fields: Optional[List[str]] = None,
+			start_after: Optional[dict] = None) -> List[dict]:
+		""" Return a list of items from a table, after applying a filter, with options for limiting, sorting and selecting fields """
 
-		with self._lock(table, timeout = self.lock_timeout):
-			start_index = skip
-			end_index = (skip + limit) if limit is not None else None
-			results = self._load(table)
-			results = self._apply_order_by(results, order_by)
-			results = [ row for row in results if self._match_filter(row, filter) ]
-			return results[ start_index : end_index ]
+		return [ copy.deepcopy(self._select_fields(row, fields)) for row in self._find_rows(table, filter, skip, limit, order_by, start_after) ]
 
 
-	def find_one(self, table: str, filter: dict) -> Optional[dict]: # pylint: disable = redefined-builtin
-		""" Return a single item (or nothing) from a table, after applying a filter """
+	def find_iter(self, # pylint: disable = too-many-arguments
+			table: str, filter: dict, # pylint: disable = redefined-builtin
+			skip: int = 0, limit: Optional[int] = None, order_by: Optional[List[Tuple[str,str]]] = None, fields: Optional[List[str]] = None,
+			start_after: Optional[dict] = None, batch_size: int = 1000) -> Iterator[dict]:
+		""" Iterate over items from a table, after applying a filter, with options for limiting, sorting and selecting fields, fetching them by batches """
+
+		# The table is parsed once and shared through the cache, which is never modified in place,
+		# so rows are copied only when reached, keeping a single copy alive at a time.
+
+		all_rows = self._find_rows(table, filter, skip, limit, order_by, start_after)
+		return ( copy.deepcopy(self._select_fields(row, fields)) for row in all_rows )
 
-		with self._lock(table, timeout = self.lock_timeout):
-			return next(( row for row in self._load(table) if self._match_filter(row, filter) ), None)
+
+	def find_one(self, table: str, filter: dict, fields: Optional[List[str]] = None) -> Optional[dict]: # pylint: disable = redefined-builtin
+		""" Return a single item (or nothing) from a table, after applying a filter, with an option for selecting fields """
+
+		row = next(( row for row in self._read(table) if self._match_filter(row, filter) ), None)
+		return copy.deepcopy(self._select_fields(row, fields)) if row is not None else None
 
 
 	def insert_one(self, table: str, data: dict) -> None:
@@ -56,17 +72,10 @@ class JsonDatabaseClient(DatabaseClient):
 
 		with self._lock(table, timeout = self.lock_timeout):
 			all_indexes = self._load_indexes(table)
-			all_rows = self._load(table)
-
-			for index in [ x for x in all_indexes if x["is_unique"] ]:
-				index_filter = { key: data[key] for key in index["field_collection"] }
-				matched_row = next(( row for row in all_rows if self._match_filter(row, index_filter) ), None)
+			all_rows = list(self._load(table))
 
-				if matched_row is not None:
-					raise ValueError("Duplicate key '%s' in table '%s' for index '%s'" % (index_filter, table, index["identifier"]))
-
-			all_rows.append(data)
-			self._save(table, all_rows)
+			self._check_unique_indexes(table, all_indexes, all_rows, [ data ])
+			self._write(table, all_rows, { "operation": "insert", "dataset": copy.deepcopy([ data ]) })
 
 
 	def insert_many(self, table: str, dataset: List[dict]) -> None:
@@ -74,46 +83,116 @@ class JsonDatabaseClient(DatabaseClient):
 
 		with self._lock(table, timeout = self.lock_timeout):
 			all_indexes = self._load_indexes(table)
-			all_rows = self._load(table)
-
-			for data in dataset:
-				for index in [ x for x in all_indexes if x["is_unique"] ]:
-					index_filter = { key: data[key] for key in index["field_collection"] }
-					matched_row = next(( row for row in all_rows if self._match_filter(row, index_filter) ), None)
+			all_rows = list(self._load(table))
 
-					if matched_row is not None:
-						raise ValueError("Duplicate key '%s' in table '%s' for index '%s'" % (index_filter, table, index["identifier"]))
-
-			all_rows.extend(dataset)
-			self._save(table, all_rows)
+			self._check_unique_indexes(table, all_indexes, all_rows, dataset)
+			self._write(table, all_rows, { "operation": "insert", "dataset": copy.deepcopy(dataset) })
 
 
 	def update_one(self, table: str, filter: dict, data: dict) -> None: # pylint: disable = redefined-builtin
 		""" Update a single item (or nothing) from a table, after applying a filter """
 
 		with self._lock(table, timeout = self.lock_timeout):
-			all_rows = self._load(table)
-			matched_row = next(( row for row in all_rows if self._match_filter(row, filter) ), None)
-			if matched_row is not None:
-				matched_row.update(data)
-				self._save(table, all_rows)
+			all_rows = list(self._load(table))
+			matched_index = next(( index for index, row in enumerate(all_rows) if self._match_filter(row, filter) ), None)
+			if matched_index is not None:
+				self._write(table, all_rows, { "operation": "update", "index_collection": [ matched_index ], "data": copy.deepcopy(data) })
+
+
+	def update_many(self, table: str, filter: dict, data: dict) -> None: # pylint: disable = redefined-builtin
+		""" Update all items from a table, after applying a filter """
+
+		with self._lock(table, timeout = self.lock_timeout):
+			all_rows = list(self._load(table))
+			all_matched_indexes = [ index for index, row in enumerate(all_rows) if self._match_filter(row, filter) ]
+			if len(all_matched_indexes) > 0:
+				self._write(table, all_rows, { "operation": "update", "index_collection": all_matched_indexes, "data": copy.deepcopy(data) })
+
+
+	def upsert_one(self, table: str, filter: dict, data: dict, insert_data: Optional[dict] = None) -> None: # pylint: disable = redefined-builtin
+		""" Update a single item from a table, after applying a filter, or insert it from the filter, data and insert data if there is none """
+
+		with self._lock(table, timeout = self.lock_timeout):
+			all_rows = list(self._load(table))
+			matched_index = next(( index for index, row in enumerate(all_rows) if self._match_filter(row, filter) ), None)
+
+			if matched_index is not None:
+				self._write(table, all_rows, { "operation": "update", "index_collection": [ matched_index ], "data": copy.deepcopy(data) })
+
+			else:
+				new_row = { **filter, **(insert_data if insert_data is not None else {}), **data }
+				self._check_unique_indexes(table, self._load_indexes(table), all_rows, [ new_row ])
+				self._write(table, all_rows, { "operation": "insert", "dataset": copy.deepcopy([ new_row ]) })
+
+
+	def increment_one(self, # pylint: disable = too-many-arguments
+			table: str, filter: dict, increments: Dict[str,int], # pylint: disable = redefined-builtin
+			data: Optional[dict] = None, insert_data: Optional[dict] = None) -> Optional[dict]:
+		""" Increment and update a single item from a table, after applying a filter, or insert it if there is none, and return it once changed """
+
+		data = data if data is not None else {}
+
+		with self._lock(table, timeout = self.lock_timeout):
+			all_rows = list(self._load(table))
+			matched_index = next(( index for index, row in enumerate(all_rows) if self._match_filter(row, filter) ), None)
+
+			if matched_index is not None:
+				update_data = { **data, **self._apply_increments(all_rows[matched_index], increments) }
+				self._write(table, all_rows, { "operation": "update", "index_collection": [ matched_index ], "data": copy.deepcopy(update_data) })
+				return copy.deepcopy({ **all_rows[matched_index], **update_data })
+
+			new_row = { **filter, **(insert_data if insert_data is not None else {}), **data }
+			new_row.update(self._apply_increments(new_row, increments))
+			self._check_unique_indexes(table, self._load_indexes(table), all_rows, [ new_row ])
+			self._write(table, all_rows, { "operation": "insert", "dataset": copy.deepcopy([ new_row ]) })
+			return copy.deepcopy(new_row)
 
 
 	def delete_one(self, table: str, filter: dict) -> None: # pylint: disable = redefined-builtin
 		""" Delete a single item (or nothing) from a table, after applying a filter """
 
 		with self._lock(table, timeout = self.lock_timeout):
-			all_rows = self._load(table)
-			matched_row = next(( row for row in all_rows if self._match_filter(row, filter) ), None)
-			if matched_row is not None:
-				all_rows.remove(matched_row)
-				self._save(table, all_rows)
+			all_rows = list(self._load(table))
+			matched_index = next(( index for index, row in enumerate(all_rows) if self._match_filter(row, filter) ), None)
+			if matched_index is not None:
+				self._write(table, all_rows, { "operation": "delete", "index_collection": [ matched_index ] })
+
+
+	def delete_many(self, table: str, filter: dict) -> None: # pylint: disable = redefined-builtin
+		""" Delete all items from a table, after applying a filter """
+
+		with self._lock(table, timeout = self.lock_timeout):
+			all_rows = list(self._load(table))
+			all_matched_indexes = [ index for index, row in enumerate(all_rows) if self._match_filter(row, filter) ]
+			if len(all_matched_indexes) > 0:
+				self._write(table, all_rows, { "operation": "delete", "index_collection": all_matched_indexes })
+
+
+	def compact(self, table: str) -> None:
+		""" Merge the table journal into the table file """
+
+		with self._lock(table, timeout = self.lock_timeout):
+			if os.path.exists(self._get_journal_path(table)):
+				self._save(table, self._load(table))
+
+
+	def watch(self, table: str, filter: dict, callback: Callable[[dict], None]) -> DatabaseWatch: # pylint: disable = redefined-builtin
+		""" Watch a table for changes, calling back with the table and operation for each change until the watch is closed """
+
+		watch = DatabaseWatch(table, filter, callback)
+		watch.start(self._poll_changes)
+		return watch
 
 
 	def close(self) -> None:
 		""" Close the database connection """
 
 
+	def is_database_error(self, exception: Exception) -> bool:
+		""" Check if an exception was raised by the database or its driver, in which case the client may not be usable anymore """
+		return isinstance(exception, OSError)
+
+
 	@contextlib.contextmanager
 	def _lock(self, table: str, timeout: Union[int,float] = 5) -> None:
 		""" Lock a table """
@@ -124,10 +203,62 @@ class JsonDatabaseClient(DatabaseClient):
 			yield
 
 
+	def _get_table_path(self, table: str) -> str:
+		return os.path.join(self.data_directory, table + ".json")
+
+
+	def _get_journal_path(self, table: str) -> str:
+		return os.path.join(self.data_directory, table + ".journal")
+
+
+	def _poll_changes(self, watch: DatabaseWatch) -> None:
+		""" Poll the table files for changes, until the watch is closed """
+
+		# Files are checked using their signature, and the items matching the filter are compared only once they were written,
+		# reusing the table cache, so that only changes to matching items are notified.
+
+		file_path_collection = [ self._get_table_path(watch.table), self._get_journal_path(watch.table) ]
+
+		signature = self._table_cache.get_signature(*file_path_collection)
+		matched_rows = [ row for row in self._read(watch.table) if self._match_filter(row, watch.filter) ]
+		watch.set_ready()
+
+		while not watch.wait(self.watch_interval):
+			new_signature = self._table_cache.get_signature(*file_path_collection)
+			if new_signature == signature:
+				continue
+
+			new_matched_rows = [ row for row in self._read(watch.table) if self._match_filter(row, watch.filter) ]
+			if new_matched_rows != matched_rows:
+				watch.notify("unknown")
+
+			signature, matched_rows = new_signature, new_matched_rows
+
+
+	def _read(self, table: str) -> List[dict]:
+		""" Load all items from a table for reading, without locking if the cached table is up to date """
+
+		file_path = self._get_table_path(table)
+		signature = self._table_cache.get_signature(file_path, self._get_journal_path(table))
+		table_data = self._table_cache.get(file_path, signature)
+		if table_data is not None:
+			return table_data
+
+		with self._lock(table, timeout = self.lock_timeout):
+			return self._load(table)
+
+
 	def _load(self, table: str) -> List[dict]:
-		""" Load all items from a table """
+		""" Load all items from a table, the returned list is shared with the cache and must not be modified """
+
+		file_path = self._get_table_path(table)
+		journal_file_path = self._get_journal_path(table)
+		signature = self._table_cache.get_signature(file_path, journal_file_path)
+
+		table_data = self._table_cache.get(file_path, signature)
+		if table_data is not None:
+			return table_data
 
-		file_path = os.path.join(self.data_directory, table + ".json")
 		table_data = None
 
 		try:
@@ -135,32 +266,170 @@ class JsonDatabaseClient(DatabaseClient):
 		except FileNotFoundError:
 			pass
 
-		return table_data if table_data is not None else []
+		table_data = table_data if table_data is not None else []
+		table_data = self._replay_journal(journal_file_path, signature[0], table_data)
+
+		self._table_cache.set(file_path, signature, table_data)
+		return table_data
+
+
+	def _write(self, table: str, all_rows: List[dict], mutation: dict) -> None:
+		""" Apply a mutation to the table items and save it, either to the table journal or by rewriting the table file """
+
+		self._apply_mutation(all_rows, mutation)
+
+		if not self.use_journal:
+			self._save(table, all_rows)
+			return
+
+		journal_size = self._append_journal(table, mutation)
+		if journal_size > self.journal_size_limit:
+			self._save(table, all_rows)
+		else:
+			file_path = self._get_table_path(table)
+			self._table_cache.set(file_path, self._table_cache.get_signature(file_path, self._get_journal_path(table)), all_rows)
 
 
 	def _save(self, table: str, table_data: List[dict]) -> None:
 		""" Save all the items from a table """
 
-		file_path = os.path.join(self.data_directory, table + ".json")
+		file_path = self._get_table_path(table)
+		journal_file_path = self._get_journal_path(table)
 		os.makedirs(os.path.dirname(file_path), exist_ok = True)
+
+		# Replacing the table file makes the journal obsolete, since the journal is bound to the table file it applies to
+		self._table_cache.invalidate(file_path)
 		self._serializer.serialize_to_file(file_path, table_data)
 
+		try:
+			os.remove(journal_file_path)
+		except FileNotFoundError:
+			pass
+
+		self._table_cache.set(file_path, self._table_cache.get_signature(file_path, journal_file_path), table_data)
 
-	def _load_indexes(self, table: str) -> List[dict]:
-		""" Load all indexes for a table """
 
-		file_path = os.path.join(self.data_directory, "admin.json")
-		administration_data = None
+	def _append_journal(self, table: str, mutation: dict) -> int:
+		""" Append a mutation to the table journal, creating it if needed, and return the journal size """
+
+		file_path = self._get_table_path(table)
+		journal_file_path = self._get_journal_path(table)
+		table_signature = self._table_cache.get_signature(file_path)[0]
+		journal_header = { "table_signature": list(table_signature) if table_signature is not None else None }
+
+		if self._load_journal_header(journal_file_path) != journal_header:
+			os.makedirs(os.path.dirname(journal_file_path), exist_ok = True)
+			with open(journal_file_path, mode = "w", encoding = "utf-8") as journal_file:
+				journal_file.write(self._journal_serializer.serialize_to_string(journal_header) + "\n")
+
+		with open(journal_file_path, mode = "a", encoding = "utf-8") as journal_file:
+			journal_file.write(self._journal_serializer.serialize_to_string(mutation) + "\n")
+			return journal_file.tell()
+
+
+	def _load_journal_header(self, journal_file_path: str) -> Optional[dict]:
+		""" Load the header from a table journal, which identifies the table file the journal applies to """
+
+		try:
+			with open(journal_file_path, mode = "r", encoding = "utf-8") as journal_file:
+				return self._journal_serializer.deserialize_from_string(journal_file.readline())
+		except (FileNotFoundError, ValueError):
+			return None
+
+
+	def _replay_journal(self, journal_file_path: str, table_signature: Optional[tuple], table_data: List[dict]) -> List[dict]:
+		""" Apply the mutations from a table journal, if it applies to the loaded table file """
 
 		try:
-			administration_data = self._serializer.deserialize_from_file(file_path)
+			with open(journal_file_path, mode = "r", encoding = "utf-8") as journal_file:
+				all_lines = journal_file.readlines()
+		except FileNotFoundError:
+			return table_data
+
+		try:
+			journal_header = self._journal_serializer.deserialize_from_string(all_lines[0])
+		except (IndexError, ValueError):
+			return table_data
+
+		if journal_header["table_signature"] != (list(table_signature) if table_signature is not None else None):
+			return table_data
+
+		for line in all_lines[1:]:
+			try:
+				mutation = self._journal_serializer.deserialize_from_string(line)
+			except ValueError:
+				logger.warning("Ignoring incomplete journal entry in '%s'", journal_file_path)
+				break
+
+			self._apply_mutation(table_data, mutation)
+
+		return table_data
+
+
+	def _apply_mutation(self, all_rows: List[dict], mutation: dict) -> None:
+		""" Apply a mutation to a list of items, without modifying the items themselves """
+
+		if mutation["operation"] == "insert":
+			all_rows.extend(mutation["dataset"])
+		elif mutation["operation"] == "update":
+			for index in mutation["index_collection"]:
+				all_rows[index] = { **all_rows[index], **mutation["data"] }
+		elif mutation["operation"] == "delete":
+			for index in sorted(mutation["index_collection"], reverse = True):
+				del all_rows[index]
+		else:
+			raise ValueError("Unsupported mutation '%s'" % mutation["operation"])
+
+
+	def _load_file(self, file_path: str) -> Optional[Any]:
+		""" Load data from a file, using the cache if the file did not change since it was last read """
+
+		signature = self._table_cache.get_signature(file_path)
+		data = self._table_cache.get(file_path, signature)
+		if data is not None:
+			return data
+
+		try:
+			data = self._serializer.deserialize_from_file(file_path)
 		except FileNotFoundError:
 			pass
 
+		if data is not None:
+			self._table_cache.set(file_path, signature, data)
+		return data
+
+
+	def _load_indexes(self, table: str) -> List[dict]:
+		""" Load all indexes for a table """
+
+		file_path = os.path.join(self.data_directory, "admin.json")
+		administration_data = self._load_file(file_path)
+
 		all_indexes = administration_data["indexes"] if administration_data is not None else []
 		return [ index for index in all_indexes if index["table"] == table ]
 
 
+	def _check_unique_indexes(self, table: str, all_indexes: List[dict], all_rows: List[dict], dataset: List[dict]) -> None:
+		""" Check that new items do not conflict with existing items or with each other for unique indexes """
+
+		all_unique_indexes = [ index for index in all_indexes if index["is_unique"] ]
+		all_existing_keys = {}
+
+		for index in all_unique_indexes:
+			field_collection = index["field_collection"]
+			all_existing_keys[index["identifier"]] = set(tuple(row[key] for key in field_collection) for row in all_rows if all(key in row for key in field_collection))
+
+		for data in dataset:
+			for index in all_unique_indexes:
+				index_filter = { key: data[key] for key in index["field_collection"] }
+				index_key = tuple(index_filter.values())
+
+				if index_key in all_existing_keys[index["identifier"]]:
+					raise ValueError("Duplicate key '%s' in table '%s' for index '%s'" % (index_filter, table, index["identifier"]))
+
+				all_existing_keys[index["identifier"]].add(index_key)
+
+
 	def _match_filter(self, row: dict, filter: dict) -> bool: # pylint: disable = redefined-builtin
 		""" Check if an item matches a filter """
 
@@ -175,22 +444,27 @@ class JsonDatabaseClient(DatabaseClient):
 		return True
 
 
-	def _apply_order_by(self, row_collection: List[dict], expression: Optional[List[Tuple[str,str]]]) -> List[dict]:
-		""" Apply an order-by expression on a list of items """
+	def _find_rows(self, # pylint: disable = too-many-arguments
+			table: str, filter: dict, # pylint: disable = redefined-builtin
+			skip: int, limit: Optional[int], order_by: Optional[List[Tuple[str,str]]], start_after: Optional[dict]) -> List[dict]:
+		""" Find the rows matching a filter, sorted and limited, without copying them """
+
+		start_index = skip
+		end_index = (skip + limit) if limit is not None else None
+		start_after = self._normalize_start_after(order_by, start_after)
+		results = [ row for row in self._read(table) if self._match_filter(row, filter) ]
+		if start_after is not None:
+			results = [ row for row in results if self._is_after_start(row, start_after, self._get_value) ]
+		results = self._apply_order_by(results, order_by, limit = end_index)
+		return results[ start_index : end_index ]
 
-		if expression is None:
-			return row_collection
 
-		def item_to_key(row, self, key):
-			value = self._get_value(row, key)
-			return value is not None, value
+	def _select_fields(self, row: dict, fields: Optional[List[str]]) -> dict:
+		""" Select fields from an item, without copying it """
 
-		for key, direction in reversed(self._normalize_order_by_expression(expression)):
-			if direction in [ "asc", "ascending" ]:
-				row_collection = sorted(row_collection, key = functools.partial(item_to_key, self = self, key = key), reverse = False)
-			elif direction in [ "desc", "descending" ]:
-				row_collection = sorted(row_collection, key = functools.partial(item_to_key, self = self, key = key), reverse = True)
-		return row_collection
+		if fields is None:
+			return row
+		return { key: row[key] for key in fields if key in row }
 
 
 	def _get_value(self, row: dict, key: str) -> Any:
@@ -0,0 +1,55 @@
+import os
+from typing import Any, Optional
+
+
+class JsonTableCache:
+	""" In-process cache for data loaded from json files.
+
+	Entries are validated against a signature made of the size, modification time and inode of the files they were loaded from,
+	so that files are parsed again only after they were written. Json files are written by replacing them or appending to them,
+	so a matching signature guarantees the cached data is up to date. Cached data is shared, callers must not modify it in place.
+
+	"""
+
+
+	def __init__(self) -> None:
+		self._entries = {}
+
+
+	def get(self, key: str, signature: tuple) -> Optional[Any]:
+		""" Return the cached data for a key if it is still valid for the provided signature """
+
+		entry = self._entries.get(key, None)
+		if entry is not None and entry[0] == signature:
+			return entry[1]
+		return None
+
+
+	def set(self, key: str, signature: tuple, data: Any) -> None:
+		""" Save the data for a key, associated to the signature taken before reading or after writing the files """
+		self._entries[key] = (signature, data)
+
+
+	def invalidate(self, key: str) -> None:
+		""" Remove the cached data for a key """
+		self._entries.pop(key, None)
+
+
+	def get_signature(self, *file_path_collection: str) -> tuple:
+		""" Return the values identifying the version of a set of files, with None for files which do not exist """
+
+		signature = []
+
+		for file_path in file_path_collection:
+			try:
+				file_status = os.stat(file_path)
+			except FileNotFoundError:
+				signature.append(None)
+				continue
+
+			signature.append((file_status.st_size, file_status.st_mtime_ns, file_status.st_ino))
+
+		return tuple(signature)
+
+
+default_table_cache = JsonTableCache()
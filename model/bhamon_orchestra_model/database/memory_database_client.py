@@ -1,83 +1,317 @@
-import copy
-import functools
+import itertools
 import logging
-from typing import List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from bhamon_orchestra_model.database.database_client import DatabaseClient
+from bhamon_orchestra_model.database.database_watch import DatabaseWatch
+from bhamon_orchestra_model.database.frozen_data import FrozenDict, freeze
+from bhamon_orchestra_model.database.memory_database_index import MemoryDatabaseIndex
 
 
 logger = logging.getLogger("MemoryDatabaseClient")
 
 
+default_index_collection = [
+	{ "table": "run", "identifier": "identifier_unique", "field_collection": [ ("project", "ascending"), ("identifier", "ascending") ], "is_unique": True },
+	{ "table": "run", "identifier": "status", "field_collection": [ ("status", "ascending") ] },
+	{ "table": "run", "identifier": "worker", "field_collection": [ ("worker", "ascending") ] },
+	{ "table": "run", "identifier": "creation_date", "field_collection": [ ("creation_date", "ascending") ] },
+	{ "table": "run", "identifier": "update_date", "field_collection": [ ("update_date", "ascending") ] },
+	{ "table": "run", "identifier": "revision", "field_collection": [ ("revision", "ascending") ] },
+	{ "table": "run_archive", "identifier": "identifier_unique",
+		"field_collection": [ ("project", "ascending"), ("identifier", "ascending") ], "is_unique": True },
+	{ "table": "revision_status", "identifier": "identifier_unique",
+		"field_collection": [ ("project", "ascending"), ("revision", "ascending") ], "is_unique": True },
+	{ "table": "job", "identifier": "identifier_unique", "field_collection": [ ("project", "ascending"), ("identifier", "ascending") ], "is_unique": True },
+	{ "table": "schedule", "identifier": "identifier_unique", "field_collection": [ ("project", "ascending"), ("identifier", "ascending") ], "is_unique": True },
+	{ "table": "user", "identifier": "identifier_unique", "field_collection": [ ("identifier", "ascending") ], "is_unique": True },
+	{ "table": "worker", "identifier": "identifier_unique", "field_collection": [ ("identifier", "ascending") ], "is_unique": True },
+]
+
+
 class MemoryDatabaseClient(DatabaseClient):
-	""" Client for a database storing data in memory, intended for development only. """
+	""" Client for a database storing data in memory, intended for development only.
+
+	Rows are stored as frozen data, which is replaced rather than modified by updates, so that reads can share it.
+	Items returned by reads are new dictionaries, their nested values are read-only and should be copied before being modified.
 
+	"""
 
-	def __init__(self) -> None:
+
+	def __init__(self, index_collection: Optional[List[dict]] = None) -> None:
 		self.database = {}
+		self.indexes = {}
+
+		self._all_watches = []
+		self._row_identifier_generator = itertools.count()
+
+		for index in index_collection if index_collection is not None else default_index_collection:
+			self.create_index(**index)
 
 
 	def count(self, table: str, filter: dict) -> int: # pylint: disable = redefined-builtin
 		""" Return how many items are in a table, after applying a filter """
-		return sum(1 for row in self.database.get(table, []) if self._match_filter(row, filter))
+
+		all_rows = self.database.get(table, {})
+		if len(filter) == 0:
+			return len(all_rows)
+
+		index = self._select_index_for_filter(table, filter)
+		if index is not None and len(index.field_collection) == len(filter):
+			return len(index.find(filter))
+
+		return sum(1 for row_identifier in self._find_row_identifiers(table, filter))
 
 
 	def find_many(self, # pylint: disable = too-many-arguments
 			table: str, filter: dict, # pylint: disable = redefined-builtin
-			skip: int = 0, limit: Optional[int] = None, order_by: Optional[List[Tuple[str,str]]] = None) -> List[dict]:
-		""" Return a list of items from a table, after applying a filter, with options for limiting and sorting results """
+			skip: int = 0, limit: Optional[int] = None, order_by: Optional[List[Tuple[str,str]]] = None, fields: Optional[List[str]] = None,
+			start_after: Optional[dict] = None) -> List[dict]:
+		""" Return a list of items from a table, after applying a filter, with options for limiting, sorting and selecting fields """
+		return [ self._select_fields(row, fields) for row in self._find_rows(table, filter, skip, limit, order_by, start_after) ]
 
-		start_index = skip
-		end_index = (skip + limit) if limit is not None else None
-		all_table_rows = self.database.get(table, [])
-		all_table_rows = self._apply_order_by(all_table_rows, order_by)
-		results = [ copy.deepcopy(row) for row in all_table_rows if self._match_filter(row, filter) ]
-		return results[ start_index : end_index ]
 
+	def find_iter(self, # pylint: disable = too-many-arguments
+			table: str, filter: dict, # pylint: disable = redefined-builtin
+			skip: int = 0, limit: Optional[int] = None, order_by: Optional[List[Tuple[str,str]]] = None, fields: Optional[List[str]] = None,
+			start_after: Optional[dict] = None, batch_size: int = 1000) -> Iterator[dict]:
+		""" Iterate over items from a table, after applying a filter, with options for limiting, sorting and selecting fields, fetching them by batches """
+
+		# Rows are matched when called, so that later changes to the table do not affect the iteration,
+		# since updates replace the rows rather than modifying them.
+
+		all_rows = self._find_rows(table, filter, skip, limit, order_by, start_after)
+		return ( self._select_fields(row, fields) for row in all_rows )
 
-	def find_one(self, table: str, filter: dict) -> Optional[dict]: # pylint: disable = redefined-builtin
-		""" Return a single item (or nothing) from a table, after applying a filter """
-		return next(( copy.deepcopy(row) for row in self.database.get(table, []) if self._match_filter(row, filter) ), None)
+
+	def find_one(self, table: str, filter: dict, fields: Optional[List[str]] = None) -> Optional[dict]: # pylint: disable = redefined-builtin
+		""" Return a single item (or nothing) from a table, after applying a filter, with an option for selecting fields """
+
+		all_rows = self.database.get(table, {})
+		row_identifier = next(iter(self._find_row_identifiers(table, filter)), None)
+		return self._select_fields(all_rows[row_identifier], fields) if row_identifier is not None else None
 
 
 	def insert_one(self, table: str, data: dict) -> None:
 		""" Insert a new item into a table """
-
-		if table not in self.database:
-			self.database[table] = []
-		self.database[table].append(copy.deepcopy(data))
+		self.insert_many(table, [ data ])
 
 
 	def insert_many(self, table: str, dataset: List[dict]) -> None:
 		""" Insert a list of items into a table """
 
-		if table not in self.database:
-			self.database[table] = []
-		self.database[table].extend(copy.deepcopy(dataset))
+		all_indexes = self.indexes.get(table, [])
+
+		for index in [ x for x in all_indexes if x.is_unique ]:
+			all_keys = set()
+
+			for data in dataset:
+				key = index.get_key(data)
+				if key in all_keys or index.contains(data):
+					index_filter = { field: data.get(field) for field in index.field_collection }
+					raise ValueError("Duplicate key '%s' in table '%s' for index '%s'" % (index_filter, table, index.identifier))
+				all_keys.add(key)
+
+		all_rows = self.database.setdefault(table, {})
+
+		for data in [ freeze(data) for data in dataset ]:
+			row_identifier = next(self._row_identifier_generator)
+			all_rows[row_identifier] = data
+			for index in all_indexes:
+				index.insert(row_identifier, data)
+
+		self._notify(table, "insert", dataset)
 
 
 	def update_one(self, table: str, filter: dict, data: dict) -> None: # pylint: disable = redefined-builtin
 		""" Update a single item (or nothing) from a table, after applying a filter """
 
-		all_rows = self.database.get(table, [])
-		matched_row = next(( row for row in all_rows if self._match_filter(row, filter) ), None)
-		if matched_row is not None:
-			matched_row.update(data)
+		row_identifier = next(iter(self._find_row_identifiers(table, filter)), None)
+		if row_identifier is not None:
+			self._update_rows(table, [ row_identifier ], data)
+
+
+	def update_many(self, table: str, filter: dict, data: dict) -> None: # pylint: disable = redefined-builtin
+		""" Update all items from a table, after applying a filter """
+		self._update_rows(table, list(self._find_row_identifiers(table, filter)), data)
+
+
+	def upsert_one(self, table: str, filter: dict, data: dict, insert_data: Optional[dict] = None) -> None: # pylint: disable = redefined-builtin
+		""" Update a single item from a table, after applying a filter, or insert it from the filter, data and insert data if there is none """
+
+		row_identifier = next(iter(self._find_row_identifiers(table, filter)), None)
+		if row_identifier is not None:
+			self._update_rows(table, [ row_identifier ], data)
+		else:
+			self.insert_one(table, { **filter, **(insert_data if insert_data is not None else {}), **data })
+
+
+	def increment_one(self, # pylint: disable = too-many-arguments
+			table: str, filter: dict, increments: Dict[str,int], # pylint: disable = redefined-builtin
+			data: Optional[dict] = None, insert_data: Optional[dict] = None) -> Optional[dict]:
+		""" Increment and update a single item from a table, after applying a filter, or insert it if there is none, and return it once changed """
+
+		data = data if data is not None else {}
+		row_identifier = next(iter(self._find_row_identifiers(table, filter)), None)
+
+		if row_identifier is not None:
+			self._update_rows(table, [ row_identifier ], { **data, **self._apply_increments(self.database[table][row_identifier], increments) })
+			return dict(self.database[table][row_identifier])
+
+		new_row = { **filter, **(insert_data if insert_data is not None else {}), **data }
+		new_row.update(self._apply_increments(new_row, increments))
+		self.insert_one(table, new_row)
+		return self.find_one(table, filter)
 
 
 	def delete_one(self, table: str, filter: dict) -> None: # pylint: disable = redefined-builtin
 		""" Delete a single item (or nothing) from a table, after applying a filter """
 
-		all_rows = self.database.get(table, [])
-		matched_row = next(( row for row in all_rows if self._match_filter(row, filter) ), None)
-		if matched_row is not None:
-			all_rows.remove(matched_row)
+		row_identifier = next(iter(self._find_row_identifiers(table, filter)), None)
+		if row_identifier is not None:
+			self._delete_rows(table, [ row_identifier ])
+
+
+	def delete_many(self, table: str, filter: dict) -> None: # pylint: disable = redefined-builtin
+		""" Delete all items from a table, after applying a filter """
+		self._delete_rows(table, list(self._find_row_identifiers(table, filter)))
+
+
+	def create_index(self, table: str, identifier: str, field_collection: List[Tuple[str,str]], is_unique: bool = False) -> None:
+		""" Create an index to speed up lookups and sorting on a table """
+
+		all_indexes = self.indexes.setdefault(table, [])
+
+		existing_index = next(( index for index in all_indexes if index.identifier == identifier ), None)
+		if existing_index is not None:
+			raise ValueError("Index '%s' already exists for table '%s'" % (identifier, table))
+
+		index = MemoryDatabaseIndex(identifier, field_collection, is_unique = is_unique)
+		for row_identifier, row in self.database.get(table, {}).items():
+			index.insert(row_identifier, row)
+
+		all_indexes.append(index)
+
+
+	def watch(self, table: str, filter: dict, callback: Callable[[dict], None]) -> DatabaseWatch: # pylint: disable = redefined-builtin
+		""" Watch a table for changes, calling back with the table and operation for each change until the watch is closed """
+
+		# Callbacks are called synchronously by the operations changing items matching the filter
+
+		watch = DatabaseWatch(table, filter, callback)
+		watch.add_close_handler(lambda: self._all_watches.remove(watch))
+		self._all_watches.append(watch)
+		return watch
+
+
+	def is_thread_safe(self) -> bool:
+		""" Check if clients from the same factory can be used by several threads at once, callers running operations one at a time otherwise """
+
+		# Factories return the same client, to share the data, and its tables and indexes are not locked
+		return False
 
 
 	def close(self) -> None:
 		""" Close the database connection """
 
 
+	def _update_rows(self, table: str, all_row_identifiers: List[int], data: dict) -> None:
+		""" Update rows and their index entries """
+
+		all_rows = self.database.get(table, {})
+		data = freeze(data)
+		updated_fields = set(data.keys())
+		all_updated_indexes = [ index for index in self.indexes.get(table, []) if any(field.split(".")[0] in updated_fields for field in index.field_collection) ]
+
+		for row_identifier in all_row_identifiers:
+			matched_row = all_rows[row_identifier]
+			updated_row = FrozenDict({ **matched_row, **data })
+
+			for index in all_updated_indexes:
+				index.remove(row_identifier, matched_row)
+			all_rows[row_identifier] = updated_row
+			for index in all_updated_indexes:
+				index.insert(row_identifier, updated_row)
+
+		self._notify(table, "update", [ all_rows[row_identifier] for row_identifier in all_row_identifiers ])
+
+
+	def _delete_rows(self, table: str, all_row_identifiers: List[int]) -> None:
+		""" Delete rows and their index entries """
+
+		all_rows = self.database.get(table, {})
+		all_deleted_rows = [ all_rows[row_identifier] for row_identifier in all_row_identifiers ]
+
+		for row_identifier in all_row_identifiers:
+			for index in self.indexes.get(table, []):
+				index.remove(row_identifier, all_rows[row_identifier])
+			del all_rows[row_identifier]
+
+		self._notify(table, "delete", all_deleted_rows)
+
+
+	def _notify(self, table: str, operation: str, row_collection: List[dict]) -> None:
+		""" Call back the watches for a table if the changed rows match their filter """
+
+		for watch in list(self._all_watches):
+			if watch.table == table and any(self._match_filter(row, watch.filter) for row in row_collection):
+				watch.notify(operation)
+
+
+	def _find_rows(self, # pylint: disable = too-many-arguments
+			table: str, filter: dict, # pylint: disable = redefined-builtin
+			skip: int, limit: Optional[int], order_by: Optional[List[Tuple[str,str]]], start_after: Optional[dict]) -> List[dict]:
+		""" Find the rows matching a filter, sorted and limited, without copying them """
+
+		start_index = skip
+		end_index = (skip + limit) if limit is not None else None
+		start_after = self._normalize_start_after(order_by, start_after)
+		all_rows = self.database.get(table, {})
+
+		if order_by is not None and self._select_index_for_filter(table, filter) is None:
+			order_by = self._normalize_order_by_expression(order_by)
+			index, reverse = self._select_index_for_order_by(table, order_by)
+
+			if index is not None:
+				all_row_identifiers = index.iterate_ordered(reverse = reverse)
+				results = ( all_rows[row_identifier] for row_identifier in all_row_identifiers if self._match_filter(all_rows[row_identifier], filter) )
+				if start_after is not None:
+					results = ( row for row in results if self._is_after_start(row, start_after, self._get_value) )
+				return list(itertools.islice(results, start_index, end_index))
+
+		results = [ all_rows[row_identifier] for row_identifier in self._find_row_identifiers(table, filter) ]
+		if start_after is not None:
+			results = [ row for row in results if self._is_after_start(row, start_after, self._get_value) ]
+		results = self._apply_order_by(results, order_by, limit = end_index)
+		return results[ start_index : end_index ]
+
+
+	def _find_row_identifiers(self, table: str, filter: dict) -> Iterable[int]: # pylint: disable = redefined-builtin
+		""" Find the identifiers of the rows matching a filter, in insertion order, using an index if possible """
+
+		all_rows = self.database.get(table, {})
+		index = self._select_index_for_filter(table, filter)
+		candidates = index.find(filter) if index is not None else all_rows.keys()
+		return ( row_identifier for row_identifier in candidates if self._match_filter(all_rows[row_identifier], filter) )
+
+
+	def _select_index_for_filter(self, table: str, filter: dict) -> Optional[MemoryDatabaseIndex]: # pylint: disable = redefined-builtin
+		""" Select the index covering the most fields from a filter """
+
+		all_indexes = [ index for index in self.indexes.get(table, []) if all(field in filter for field in index.field_collection) ]
+		return max(all_indexes, key = lambda index: len(index.field_collection), default = None)
+
+
+	def _select_index_for_order_by(self, table: str, expression: List[Tuple[str,str]]) -> Tuple[Optional[MemoryDatabaseIndex],bool]:
+		""" Select an index matching a normalized order-by expression """
+
+		for index in self.indexes.get(table, []):
+			reverse = index.get_order_direction(expression)
+			if reverse is not None:
+				return index, reverse
+		return None, False
+
+
 	def _match_filter(self, row: dict, filter: dict) -> bool: # pylint: disable = redefined-builtin
 		""" Check if an item matches a filter """
 
@@ -92,18 +326,20 @@ class MemoryDatabaseClient(DatabaseClient):
 		return True
 
 
-	def _apply_order_by(self, row_collection: List[dict], expression: Optional[List[Tuple[str,str]]]) -> List[dict]:
-		""" Apply an order-by expression on a list of items """
+	def _get_value(self, row: dict, key: str) -> Any:
+		""" Get a value from the item using its key """
+
+		data = row
+		for key_part in key.split("."):
+			if key_part not in data.keys():
+				return None
+			data = data[key_part]
+		return data
 
-		if expression is None:
-			return row_collection
 
-		def item_to_key(row, key):
-			return row[key] is not None, row[key]
+	def _select_fields(self, row: dict, fields: Optional[List[str]]) -> dict:
+		""" Select fields from an item, to a new dictionary sharing its values """
 
-		for key, direction in reversed(self._normalize_order_by_expression(expression)):
-			if direction in [ "asc", "ascending" ]:
-				row_collection = sorted(row_collection, key = functools.partial(item_to_key, key = key), reverse = False)
-			elif direction in [ "desc", "descending" ]:
-				row_collection = sorted(row_collection, key = functools.partial(item_to_key, key = key), reverse = True)
-		return row_collection
+		if fields is None:
+			return dict(row)
+		return { key: row[key] for key in fields if key in row }
@@ -0,0 +1,121 @@
+import bisect
+from typing import Any, Iterator, List, Optional, Tuple
+
+
+class MemoryDatabaseIndex:
+	""" Index for a table in a memory database, supporting equality lookups and ordered iteration.
+
+	Rows are referenced by their identifier in the table, which is an increasing integer reflecting the insertion order.
+	Equality lookups use a hash map of the indexed values, ordered iteration uses a list of sort keys kept sorted.
+
+	"""
+
+
+	def __init__(self, identifier: str, field_collection: List[Tuple[str,str]], is_unique: bool = False) -> None:
+		self.identifier = identifier
+		self.field_collection = [ field for field, direction in field_collection ]
+		self.is_unique = is_unique
+
+		self._buckets = {}
+		self._sorted_entries = []
+
+
+	def insert(self, row_identifier: int, row: dict) -> None:
+		""" Add a row to the index """
+
+		bucket = self._buckets.setdefault(self.get_key(row), [])
+		bisect.insort(bucket, row_identifier)
+		bisect.insort(self._sorted_entries, (self.get_sort_key(row), row_identifier))
+
+
+	def remove(self, row_identifier: int, row: dict) -> None:
+		""" Remove a row from the index, the row must have the same values as when it was inserted """
+
+		key = self.get_key(row)
+		bucket = self._buckets[key]
+		del bucket[bisect.bisect_left(bucket, row_identifier)]
+		if len(bucket) == 0:
+			del self._buckets[key]
+
+		entry = (self.get_sort_key(row), row_identifier)
+		del self._sorted_entries[bisect.bisect_left(self._sorted_entries, entry)]
+
+
+	def contains(self, row: dict) -> bool:
+		""" Check if the index has rows with the same indexed values as the provided one """
+		return self.get_key(row) in self._buckets
+
+
+	def find(self, filter: dict) -> List[int]: # pylint: disable = redefined-builtin
+		""" Return the identifiers of the rows matching the filter values for the indexed fields, in insertion order """
+		return self._buckets.get(tuple(_freeze(filter[field]) for field in self.field_collection), [])
+
+
+	def iterate_ordered(self, reverse: bool = False) -> Iterator[int]:
+		""" Iterate over row identifiers, sorted by the indexed values, with ties kept in insertion order """
+
+		if not reverse:
+			for sort_key, row_identifier in self._sorted_entries: # pylint: disable = unused-variable
+				yield row_identifier
+			return
+
+		group_end = len(self._sorted_entries)
+		while group_end > 0:
+			group_start = group_end - 1
+			sort_key = self._sorted_entries[group_start][0]
+			while group_start > 0 and self._sorted_entries[group_start - 1][0] == sort_key:
+				group_start -= 1
+			for entry in self._sorted_entries[group_start : group_end]:
+				yield entry[1]
+			group_end = group_start
+
+
+	def get_key(self, row: dict) -> tuple:
+		""" Compute the hashable key for the indexed values of a row """
+		return tuple(_freeze(_get_value(row, field, _missing)) for field in self.field_collection)
+
+
+	def get_sort_key(self, row: dict) -> tuple:
+		""" Compute the sort key for the indexed values of a row, with null values first """
+
+		sort_key = []
+		for field in self.field_collection:
+			value = _get_value(row, field, None)
+			sort_key.append((value is not None, value))
+		return tuple(sort_key)
+
+
+	def get_order_direction(self, expression: List[Tuple[str,str]]) -> Optional[bool]:
+		""" Check if the index can be used for a normalized order-by expression and return if it should be iterated in reverse """
+
+		if [ key for key, direction in expression ] != self.field_collection:
+			return None
+		if all(direction in [ "asc", "ascending" ] for key, direction in expression):
+			return False
+		if all(direction in [ "desc", "descending" ] for key, direction in expression):
+			return True
+		return None
+
+
+class _Missing: # pylint: disable = too-few-public-methods
+	""" Marker for a field missing from a row, which should not match any filter value """
+
+
+_missing = _Missing()
+
+
+def _get_value(row: dict, key: str, default: Any) -> Any:
+	data = row
+	for key_part in key.split("."):
+		if not isinstance(data, dict) or key_part not in data:
+			return default
+		data = data[key_part]
+	return data
+
+
+def _freeze(value: Any) -> Any:
+	if isinstance(value, dict):
+		return (dict, tuple(sorted((key, _freeze(item)) for key, item in value.items())))
+	if isinstance(value, list):
+		return (list, tuple(_freeze(item) for item in value))
+	return value
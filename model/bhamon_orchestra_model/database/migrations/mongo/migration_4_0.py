@@ -1,9 +1,13 @@
+import datetime
 import logging
 
 from bson.codec_options import CodecOptions
 import dateutil.parser
 import pymongo
 
+from bhamon_orchestra_model.revision_status_provider import compute_revision_status
+from bhamon_orchestra_model.run_provider import get_revision_from_results
+
 
 logger = logging.getLogger("MongoMigration")
 
@@ -30,6 +34,11 @@ def upgrade(mongo_client: pymongo.MongoClient, simulate: bool = False) -> None:
 	convert_datetimes(mongo_client, "worker", "creation_date", simulate = simulate)
 	convert_datetimes(mongo_client, "worker", "update_date", simulate = simulate)
 
+	create_run_indexes(mongo_client, simulate = simulate)
+	create_run_archive_indexes(mongo_client, simulate = simulate)
+	add_run_revision(mongo_client, simulate = simulate)
+	create_revision_status_table(mongo_client, simulate = simulate)
+
 
 def convert_datetimes(mongo_client: pymongo.MongoClient, table: str, key: str, simulate: bool = False) -> None:
 	logger.info("Converting datetime '%s.%s'", table, key)
@@ -44,3 +53,78 @@ def convert_datetimes(mongo_client: pymongo.MongoClient, table: str, key: str, s
 
 			if not simulate:
 				database[table].update_one({ "_id": entry["_id"] }, { "$set": update_values })
+
+
+def create_run_indexes(mongo_client: pymongo.MongoClient, simulate: bool = False) -> None:
+	logger.info("Creating run indexes")
+
+	database = mongo_client.get_database(codec_options = CodecOptions(tz_aware = True))
+
+	if not simulate:
+		database["run"].create_index([ ("status", pymongo.ASCENDING), ("creation_date", pymongo.ASCENDING) ], name = "status_creation_date")
+		database["run"].create_index([ ("worker", pymongo.ASCENDING), ("status", pymongo.ASCENDING) ], name = "worker_status")
+		database["run"].create_index([ ("project", pymongo.ASCENDING), ("update_date", pymongo.ASCENDING) ], name = "project_update_date")
+		database["run"].create_index([ ("update_date", pymongo.ASCENDING) ], name = "update_date")
+		database["run"].create_index([ ("project", pymongo.ASCENDING), ("job", pymongo.ASCENDING), ("creation_date", pymongo.ASCENDING) ],
+			name = "project_job_creation_date")
+
+
+def create_run_archive_indexes(mongo_client: pymongo.MongoClient, simulate: bool = False) -> None:
+	logger.info("Creating run archive indexes")
+
+	database = mongo_client.get_database(codec_options = CodecOptions(tz_aware = True))
+
+	if not simulate:
+		database["run_archive"].create_index([ ("project", pymongo.ASCENDING), ("identifier", pymongo.ASCENDING) ], name = "identifier_unique", unique = True)
+
+
+def add_run_revision(mongo_client: pymongo.MongoClient, simulate: bool = False) -> None:
+	logger.info("Adding field 'run.revision'")
+
+	database = mongo_client.get_database(codec_options = CodecOptions(tz_aware = True))
+
+	table_entries = database["run"].find({}, projection = [ "results" ])
+
+	for entry in table_entries:
+		update_values = { "revision": get_revision_from_results(entry.get("results", None)) }
+
+		if not simulate:
+			database["run"].update_one({ "_id": entry["_id"] }, { "$set": update_values })
+
+	if not simulate:
+		database["run"].create_index([ ("project", pymongo.ASCENDING), ("revision", pymongo.ASCENDING) ], name = "project_revision")
+
+
+def create_revision_status_table(mongo_client: pymongo.MongoClient, simulate: bool = False) -> None:
+	logger.info("Filling table 'revision_status'")
+
+	database = mongo_client.get_database(codec_options = CodecOptions(tz_aware = True))
+
+	table_entries = database["run"].find({}, projection = [ "project", "status", "results" ])
+
+	now = datetime.datetime.now(datetime.timezone.utc).replace(microsecond = 0)
+	all_status_counts = {}
+
+	for entry in table_entries:
+		revision = get_revision_from_results(entry.get("results", None))
+		if revision is not None:
+			status_counts = all_status_counts.setdefault((entry["project"], revision), {})
+			status_counts[entry["status"]] = status_counts.get(entry["status"], 0) + 1
+
+	for (project, revision), status_counts in all_status_counts.items():
+		insert_values = {
+			"project": project,
+			"revision": revision,
+			"status_counts": status_counts,
+			"status": compute_revision_status(status_counts),
+			"creation_date": now,
+			"update_date": now,
+		}
+
+		if not simulate:
+			database["revision_status"].insert_one(insert_values)
+
+	logger.info("Creating revision status indexes")
+
+	if not simulate:
+		database["revision_status"].create_index([ ("project", pymongo.ASCENDING), ("revision", pymongo.ASCENDING) ], name = "identifier_unique", unique = True)
@@ -1,12 +1,15 @@
+import datetime
 import logging
 
 from alembic.operations import Operations
 import dateutil.parser
 import sqlalchemy
-from sqlalchemy.schema import Column, MetaData, Table
-from sqlalchemy.types import String
+from sqlalchemy.schema import Column, ForeignKeyConstraint, MetaData, PrimaryKeyConstraint, Table
+from sqlalchemy.types import Boolean, JSON, String
 
 from bhamon_orchestra_model.database.sql_types import UtcDateTime
+from bhamon_orchestra_model.revision_status_provider import compute_revision_status
+from bhamon_orchestra_model.run_provider import get_revision_from_results
 
 
 logger = logging.getLogger("SqlMigration")
@@ -34,6 +37,11 @@ def upgrade(operations: Operations, simulate: bool = False) -> None:
 	convert_datetimes(operations, "worker", "creation_date", nullable = False, simulate = simulate)
 	convert_datetimes(operations, "worker", "update_date", nullable = False, simulate = simulate)
 
+	create_run_indexes(operations, simulate = simulate)
+	create_run_archive_table(operations, simulate = simulate)
+	add_run_revision(operations, simulate = simulate)
+	create_revision_status_table(operations, simulate = simulate)
+
 
 def convert_datetimes(operations: Operations, table: str, column: str, nullable: bool, simulate: bool = False) -> None:
 	logger.info("Converting datetime column '%s.%s'", table, column)
@@ -68,3 +76,123 @@ def convert_datetimes(operations: Operations, table: str, column: str, nullable:
 	if not simulate:
 		operations.drop_column(table.name, column)
 		operations.alter_column(table.name, column + "_converting", new_column_name = column, nullable = nullable)
+
+
+def create_run_indexes(operations: Operations, simulate: bool = False) -> None:
+	logger.info("Creating run indexes")
+
+	if not simulate:
+		operations.create_index("run_status_creation_date", "run", [ "status", "creation_date" ])
+		operations.create_index("run_worker_status", "run", [ "worker", "status" ])
+		operations.create_index("run_project_update_date", "run", [ "project", "update_date" ])
+		operations.create_index("run_update_date", "run", [ "update_date" ])
+		operations.create_index("run_project_job_creation_date", "run", [ "project", "job", "creation_date" ])
+
+
+def create_run_archive_table(operations: Operations, simulate: bool = False) -> None:
+	logger.info("Creating table 'run_archive'")
+
+	if not simulate:
+		operations.create_table("run_archive",
+			Column("project", String, nullable = False),
+			Column("identifier", String, nullable = False),
+			Column("job", String, nullable = False),
+			Column("parameters", JSON, nullable = False),
+			Column("source", JSON, nullable = False),
+			Column("worker", String, nullable = True),
+			Column("status", String, nullable = False),
+			Column("start_date", UtcDateTime, nullable = True),
+			Column("completion_date", UtcDateTime, nullable = True),
+			Column("results", JSON, nullable = True),
+			Column("revision", String, nullable = True),
+			Column("should_cancel", Boolean, nullable = False),
+			Column("should_abort", Boolean, nullable = False),
+			Column("creation_date", UtcDateTime, nullable = False),
+			Column("update_date", UtcDateTime, nullable = False),
+			Column("archive_date", UtcDateTime, nullable = False),
+			PrimaryKeyConstraint("project", "identifier"),
+		)
+
+
+def add_run_revision(operations: Operations, simulate: bool = False) -> None:
+	logger.info("Adding column 'run.revision'")
+
+	connection = operations.get_bind()
+
+	table_columns = [
+		Column("project", String),
+		Column("identifier", String),
+		Column("results", JSON),
+		Column("revision", String),
+	]
+
+	if simulate:
+		table_columns.remove(table_columns[3])
+
+	table = Table("run", MetaData(), *table_columns)
+
+	if not simulate:
+		operations.add_column(table.name, Column("revision", String, nullable = True))
+		operations.create_index("run_project_revision", "run", [ "project", "revision" ])
+
+	select_query = sqlalchemy.select(table.c.project, table.c.identifier, table.c.results)
+	table_rows = connection.execute(select_query).mappings().fetchall()
+
+	for row in table_rows:
+		revision = get_revision_from_results(row["results"])
+
+		if revision is not None:
+			update_query = sqlalchemy.update(table).where(table.c.project == row.project).where(table.c.identifier == row.identifier).values({ "revision": revision })
+
+			if not simulate:
+				connection.execute(update_query)
+
+
+def create_revision_status_table(operations: Operations, simulate: bool = False) -> None:
+	logger.info("Creating table 'revision_status'")
+
+	connection = operations.get_bind()
+
+	if not simulate:
+		operations.create_table("revision_status",
+			Column("project", String, nullable = False),
+			Column("revision", String, nullable = False),
+			Column("status_counts", JSON, nullable = False),
+			Column("status", String, nullable = False),
+			Column("creation_date", UtcDateTime, nullable = False),
+			Column("update_date", UtcDateTime, nullable = False),
+			PrimaryKeyConstraint("project", "revision"),
+			ForeignKeyConstraint([ "project" ], [ "project.identifier" ]),
+		)
+
+	logger.info("Filling table 'revision_status'")
+
+	run_table = Table("run", MetaData(), Column("project", String), Column("status", String), Column("results", JSON))
+	revision_status_table = Table("revision_status", MetaData(),
+		Column("project", String), Column("revision", String), Column("status_counts", JSON), Column("status", String),
+		Column("creation_date", UtcDateTime), Column("update_date", UtcDateTime))
+
+	select_query = sqlalchemy.select(run_table.c.project, run_table.c.status, run_table.c.results)
+	table_rows = connection.execute(select_query).mappings().fetchall()
+
+	now = datetime.datetime.now(datetime.timezone.utc).replace(microsecond = 0)
+	all_status_counts = {}
+
+	for row in table_rows:
+		revision = get_revision_from_results(row["results"])
+		if revision is not None:
+			status_counts = all_status_counts.setdefault((row["project"], revision), {})
+			status_counts[row["status"]] = status_counts.get(row["status"], 0) + 1
+
+	for (project, revision), status_counts in all_status_counts.items():
+		insert_values = {
+			"project": project,
+			"revision": revision,
+			"status_counts": status_counts,
+			"status": compute_revision_status(status_counts),
+			"creation_date": now,
+			"update_date": now,
+		}
+
+		if not simulate:
+			connection.execute(sqlalchemy.insert(revision_status_table).values(insert_values))
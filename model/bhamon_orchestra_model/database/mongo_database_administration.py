@@ -62,9 +62,23 @@ class MongoDatabaseAdministration(DatabaseAdministration):
 		if not simulate:
 			database["__metadata__"].insert_one(metadata)
 
-		logger.info("Creating run index")
+		logger.info("Creating run indexes")
 		if not simulate:
 			self.create_index("run", "identifier_unique", [ ("project", "ascending"), ("identifier", "ascending") ], is_unique = True)
+			self.create_index("run", "status_creation_date", [ ("status", "ascending"), ("creation_date", "ascending") ])
+			self.create_index("run", "worker_status", [ ("worker", "ascending"), ("status", "ascending") ])
+			self.create_index("run", "project_update_date", [ ("project", "ascending"), ("update_date", "ascending") ])
+			self.create_index("run", "update_date", [ ("update_date", "ascending") ])
+			self.create_index("run", "project_job_creation_date", [ ("project", "ascending"), ("job", "ascending"), ("creation_date", "ascending") ])
+			self.create_index("run", "project_revision", [ ("project", "ascending"), ("revision", "ascending") ])
+
+		logger.info("Creating run archive index")
+		if not simulate:
+			self.create_index("run_archive", "identifier_unique", [ ("project", "ascending"), ("identifier", "ascending") ], is_unique = True)
+
+		logger.info("Creating revision status index")
+		if not simulate:
+			self.create_index("revision_status", "identifier_unique", [ ("project", "ascending"), ("revision", "ascending") ], is_unique = True)
 
 		logger.info("Creating job index")
 		if not simulate:
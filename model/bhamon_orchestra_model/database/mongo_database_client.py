@@ -1,10 +1,11 @@
 import logging
-from typing import List, Optional, Tuple
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 
 from bson.codec_options import CodecOptions
 import pymongo
 
 from bhamon_orchestra_model.database.database_client import DatabaseClient
+from bhamon_orchestra_model.database.database_watch import DatabaseWatch
 
 
 logger = logging.getLogger("MongoDatabaseClient")
@@ -27,23 +28,43 @@ class MongoDatabaseClient(DatabaseClient):
 
 	def find_many(self, # pylint: disable = too-many-arguments
 			table: str, filter: dict, # pylint: disable = redefined-builtin
-			skip: int = 0, limit: Optional[int] = None, order_by: Optional[List[Tuple[str,str]]] = None) -> List[dict]:
-		""" Return a list of items from a table, after applying a filter, with options for limiting and sorting results """
+			skip: int = 0, limit: Optional[int] = None, order_by: Optional[List[Tuple[str,str]]] = None, fields: Optional[List[str]] = None,
+			start_after: Optional[dict] = None) -> List[dict]:
+		""" Return a list of items from a table, after applying a filter, with options for limiting, sorting and selecting fields """
 
 		if limit == 0:
 			return []
 
 		limit = limit if limit is not None else 0
+		filter = self._apply_start_after(filter, order_by, start_after)
 		order_by = self._convert_order_by_expression(order_by)
 		database = self.mongo_client.get_database(codec_options = CodecOptions(tz_aware = True))
-		return list(database[table].find(filter, { "_id": False }, skip = skip, limit = limit, sort = order_by))
+		return list(database[table].find(filter, self._convert_fields(fields), skip = skip, limit = limit, sort = order_by))
 
 
-	def find_one(self, table: str, filter: dict) -> Optional[dict]: # pylint: disable = redefined-builtin
-		""" Return a single item (or nothing) from a table, after applying a filter """
+	def find_iter(self, # pylint: disable = too-many-arguments
+			table: str, filter: dict, # pylint: disable = redefined-builtin
+			skip: int = 0, limit: Optional[int] = None, order_by: Optional[List[Tuple[str,str]]] = None, fields: Optional[List[str]] = None,
+			start_after: Optional[dict] = None, batch_size: int = 1000) -> Iterator[dict]:
+		""" Iterate over items from a table, after applying a filter, with options for limiting, sorting and selecting fields, fetching them by batches """
+
+		if limit == 0:
+			return
 
+		limit = limit if limit is not None else 0
+		filter = self._apply_start_after(filter, order_by, start_after)
+		order_by = self._convert_order_by_expression(order_by)
 		database = self.mongo_client.get_database(codec_options = CodecOptions(tz_aware = True))
-		return database[table].find_one(filter, { "_id": False })
+
+		with database[table].find(filter, self._convert_fields(fields), skip = skip, limit = limit, sort = order_by, batch_size = batch_size) as cursor:
+			yield from cursor
+
+
+	def find_one(self, table: str, filter: dict, fields: Optional[List[str]] = None) -> Optional[dict]: # pylint: disable = redefined-builtin
+		""" Return a single item (or nothing) from a table, after applying a filter, with an option for selecting fields """
+
+		database = self.mongo_client.get_database(codec_options = CodecOptions(tz_aware = True))
+		return database[table].find_one(filter, self._convert_fields(fields))
 
 
 	def insert_one(self, table: str, data: dict) -> None:
@@ -70,6 +91,43 @@ class MongoDatabaseClient(DatabaseClient):
 		database[table].update_one(filter, { "$set": data })
 
 
+	def update_many(self, table: str, filter: dict, data: dict) -> None: # pylint: disable = redefined-builtin
+		""" Update all items from a table, after applying a filter """
+
+		database = self.mongo_client.get_database(codec_options = CodecOptions(tz_aware = True))
+		database[table].update_many(filter, { "$set": data })
+
+
+	def upsert_one(self, table: str, filter: dict, data: dict, insert_data: Optional[dict] = None) -> None: # pylint: disable = redefined-builtin
+		""" Update a single item from a table, after applying a filter, or insert it from the filter, data and insert data if there is none """
+
+		update = {}
+		if len(data) > 0:
+			update["$set"] = data
+		if insert_data is not None and len(insert_data) > 0:
+			update["$setOnInsert"] = insert_data
+		if len(update) == 0:
+			update["$setOnInsert"] = filter
+
+		database = self.mongo_client.get_database(codec_options = CodecOptions(tz_aware = True))
+		database[table].update_one(filter, update, upsert = True)
+
+
+	def increment_one(self, # pylint: disable = too-many-arguments
+			table: str, filter: dict, increments: Dict[str,int], # pylint: disable = redefined-builtin
+			data: Optional[dict] = None, insert_data: Optional[dict] = None) -> Optional[dict]:
+		""" Increment and update a single item from a table, after applying a filter, or insert it if there is none, and return it once changed """
+
+		update = { "$inc": increments }
+		if data is not None and len(data) > 0:
+			update["$set"] = data
+		if insert_data is not None and len(insert_data) > 0:
+			update["$setOnInsert"] = insert_data
+
+		database = self.mongo_client.get_database(codec_options = CodecOptions(tz_aware = True))
+		return database[table].find_one_and_update(filter, update, self._convert_fields(None), upsert = True, return_document = pymongo.ReturnDocument.AFTER)
+
+
 	def delete_one(self, table: str, filter: dict) -> None: # pylint: disable = redefined-builtin
 		""" Delete a single item (or nothing) from a table, after applying a filter """
 
@@ -77,11 +135,87 @@ class MongoDatabaseClient(DatabaseClient):
 		database[table].delete_one(filter)
 
 
+	def delete_many(self, table: str, filter: dict) -> None: # pylint: disable = redefined-builtin
+		""" Delete all items from a table, after applying a filter """
+
+		database = self.mongo_client.get_database(codec_options = CodecOptions(tz_aware = True))
+		database[table].delete_many(filter)
+
+
+	def watch(self, table: str, filter: dict, callback: Callable[[dict], None]) -> DatabaseWatch: # pylint: disable = redefined-builtin
+		""" Watch a table for changes, calling back with the table and operation for each change until the watch is closed """
+
+		# Change streams require a replica set. Deleted documents are not available to match the filter,
+		# so deletions are always notified, while updates are matched using the document looked up after the change.
+
+		pipeline = []
+		if len(filter) > 0:
+			document_filter = { "fullDocument." + key: value for key, value in filter.items() }
+			pipeline.append({ "$match": { "$or": [ { "operationType": "delete" }, document_filter ] } })
+
+		database = self.mongo_client.get_database(codec_options = CodecOptions(tz_aware = True))
+		change_stream = database[table].watch(pipeline, full_document = "updateLookup", max_await_time_ms = 1000)
+
+		watch = DatabaseWatch(table, filter, callback)
+		watch.add_close_handler(change_stream.close)
+		watch.start(lambda watch: self._listen_to_change_stream(watch, change_stream))
+		return watch
+
+
 	def close(self) -> None:
 		""" Close the database connection """
 		self.mongo_client.close()
 
 
+	def is_database_error(self, exception: Exception) -> bool:
+		""" Check if an exception was raised by the database or its driver, in which case the client may not be usable anymore """
+		return isinstance(exception, pymongo.errors.PyMongoError)
+
+
+	def _listen_to_change_stream(self, watch: DatabaseWatch, change_stream: Iterator[dict]) -> None:
+		""" Notify about the changes from a change stream, until the watch is closed """
+
+		watch.set_ready()
+
+		while not watch.is_closed():
+			change = change_stream.try_next()
+			if change is not None:
+				watch.notify(change["operationType"])
+
+
+	def _apply_start_after(self, filter: dict, expression: Optional[List[Tuple[str,str]]], start_after: Optional[dict]) -> dict: # pylint: disable = redefined-builtin
+		""" Add a condition to a filter to select the items after a start-after item, with null values first """
+
+		if start_after is None:
+			return filter
+
+		all_alternatives = []
+		all_previous_conditions = {}
+
+		for key, direction, value in self._normalize_start_after(expression, start_after):
+			if direction in [ "asc", "ascending" ]:
+				condition = { key: { "$ne": None } } if value is None else { key: { "$gt": value } }
+			else:
+				condition = None if value is None else { "$or": [ { key: { "$lt": value } }, { key: None } ] }
+
+			if condition is not None:
+				all_alternatives.append({ **all_previous_conditions, **condition })
+			all_previous_conditions[key] = value
+
+		if len(all_alternatives) == 0:
+			return { "$and": [ filter, { "_id": { "$exists": False } } ] }
+		return { "$and": [ filter, { "$or": all_alternatives } ] }
+
+
+	def _convert_fields(self, fields: Optional[List[str]]) -> dict:
+		""" Convert a list of fields to a projection, excluding the internal identifier """
+
+		projection = { "_id": False }
+		if fields is not None:
+			projection.update({ key: True for key in fields })
+		return projection
+
+
 	def _convert_order_by_expression(self, expression: Optional[List[Tuple[str,str]]]) -> Optional[List[Tuple[str,int]]]:
 		""" Convert a order-by expression to its pymongo representation """
 
@@ -14,6 +14,7 @@ from sqlalchemy.schema import MetaData
 
 import bhamon_orchestra_model
 import bhamon_orchestra_model.database.migrations.sql
+import bhamon_orchestra_model.database.sqlite_pragmas as sqlite_pragmas_module
 from bhamon_orchestra_model.database.database_administration import DatabaseAdministration
 
 
@@ -24,9 +25,10 @@ class SqlDatabaseAdministration(DatabaseAdministration):
 	""" Administration client for a SQL database. """
 
 
-	def __init__(self, connection: Connection, metadata: MetaData) -> None:
+	def __init__(self, connection: Connection, metadata: MetaData, sqlite_pragmas: Optional[dict] = None) -> None:
 		self.connection = connection
 		self.metadata = metadata
+		self.sqlite_pragmas = sqlite_pragmas
 
 
 	def __enter__(self):
@@ -63,6 +65,8 @@ class SqlDatabaseAdministration(DatabaseAdministration):
 
 		logger.info("Initializing" + (" (simulation)" if simulate else "")) # pylint: disable = logging-not-lazy
 
+		self.check_pragmas()
+
 		if self.get_metadata() is not None:
 			raise RuntimeError("Database is already initialized")
 
@@ -93,6 +97,8 @@ class SqlDatabaseAdministration(DatabaseAdministration):
 
 		logger.info("Upgrading" + (" (simulation)" if simulate else "")) # pylint: disable = logging-not-lazy
 
+		self.check_pragmas()
+
 		schema_metadata = self.get_metadata()
 		if schema_metadata is None:
 			raise RuntimeError("Database is not initialized")
@@ -155,5 +161,22 @@ class SqlDatabaseAdministration(DatabaseAdministration):
 		raise NotImplementedError()
 
 
+	def check_pragmas(self) -> dict:
+		""" Check the pragmas for a SQLite database match the expected ones, and return the actual values for those which do not """
+
+		if self.connection.dialect.name != "sqlite" or self.sqlite_pragmas is None:
+			return {}
+
+		all_mismatches = {}
+
+		for name, expected_value in self.sqlite_pragmas.items():
+			actual_value = self.connection.execute(sqlalchemy.text("PRAGMA %s" % name)).scalar()
+			if sqlite_pragmas_module.normalize_value(name, actual_value) != sqlite_pragmas_module.normalize_value(name, expected_value):
+				logger.warning("SQLite pragma '%s' is '%s' instead of '%s'", name, actual_value, expected_value)
+				all_mismatches[name] = actual_value
+
+		return all_mismatches
+
+
 	def close(self) -> None:
 		self.connection.close()
@@ -1,12 +1,17 @@
+import json
 import logging
-from typing import List, Optional, Tuple
+import select
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 
 import sqlalchemy
-from sqlalchemy.engine import Connection
+import sqlalchemy.dialects.postgresql
+import sqlalchemy.dialects.sqlite
+from sqlalchemy.engine import Connection, Engine
 from sqlalchemy.schema import MetaData
-from sqlalchemy.sql import ClauseElement
+from sqlalchemy.sql import ClauseElement, Select
 
 from bhamon_orchestra_model.database.database_client import DatabaseClient
+from bhamon_orchestra_model.database.database_watch import DatabaseWatch
 
 
 logger = logging.getLogger("SqlDatabaseClient")
@@ -16,9 +21,16 @@ class SqlDatabaseClient(DatabaseClient):
 	""" Client for a SQL database. """
 
 
-	def __init__(self, connection: Connection, metadata: MetaData) -> None:
+	def __init__(self, # pylint: disable = too-many-arguments
+			connection: Connection, metadata: MetaData,
+			watch_engine: Optional[Engine] = None, origin: Optional[str] = None, notify_changes: bool = False) -> None:
+
 		self.connection = connection
 		self.metadata = metadata
+		self.watch_engine = watch_engine
+		self.origin = origin
+		self.notify_changes = notify_changes
+		self.watch_interval = 0.1
 
 
 	def count(self, table: str, filter: dict) -> int: # pylint: disable = redefined-builtin
@@ -33,25 +45,40 @@ class SqlDatabaseClient(DatabaseClient):
 
 	def find_many(self, # pylint: disable = too-many-arguments
 			table: str, filter: dict, # pylint: disable = redefined-builtin
-			skip: int = 0, limit: Optional[int] = None, order_by: Optional[List[Tuple[str,str]]] = None) -> List[dict]:
-		""" Return a list of items from a table, after applying a filter, with options for limiting and sorting results """
+			skip: int = 0, limit: Optional[int] = None, order_by: Optional[List[Tuple[str,str]]] = None, fields: Optional[List[str]] = None,
+			start_after: Optional[dict] = None) -> List[dict]:
+		""" Return a list of items from a table, after applying a filter, with options for limiting, sorting and selecting fields """
 
-		query = sqlalchemy.select(self.metadata.tables[table])
-		if filter is not None and filter != {}:
-			query = query.where(self._convert_filter(table, filter))
-		if order_by is not None and order_by != []:
-			query = query.order_by(*self._convert_order_by_expression(table, order_by))
-		query = query.offset(skip).limit(limit)
+		query = self._create_select_query(table, filter, skip, limit, order_by, fields, start_after)
 
 		result = self.connection.execute(query).mappings().fetchall()
 
 		return [ dict(row) for row in result ]
 
 
-	def find_one(self, table: str, filter: dict) -> Optional[dict]: # pylint: disable = redefined-builtin
-		""" Return a single item (or nothing) from a table, after applying a filter """
+	def find_iter(self, # pylint: disable = too-many-arguments
+			table: str, filter: dict, # pylint: disable = redefined-builtin
+			skip: int = 0, limit: Optional[int] = None, order_by: Optional[List[Tuple[str,str]]] = None, fields: Optional[List[str]] = None,
+			start_after: Optional[dict] = None, batch_size: int = 1000) -> Iterator[dict]:
+		""" Iterate over items from a table, after applying a filter, with options for limiting, sorting and selecting fields, fetching them by batches """
+
+		query = self._create_select_query(table, filter, skip, limit, order_by, fields, start_after)
 
-		query = sqlalchemy.select(self.metadata.tables[table])
+		# Use a server side cursor if the dialect supports it, so that rows are fetched by batches
+		result = self.connection.execution_options(stream_results = True, max_row_buffer = batch_size).execute(query)
+
+		try:
+			for partition in result.mappings().partitions(batch_size):
+				for row in partition:
+					yield dict(row)
+		finally:
+			result.close()
+
+
+	def find_one(self, table: str, filter: dict, fields: Optional[List[str]] = None) -> Optional[dict]: # pylint: disable = redefined-builtin
+		""" Return a single item (or nothing) from a table, after applying a filter, with an option for selecting fields """
+
+		query = sqlalchemy.select(*self._convert_fields(table, fields))
 		if filter is not None and filter != {}:
 			query = query.where(self._convert_filter(table, filter))
 		query = query.limit(1)
@@ -65,50 +92,234 @@ class SqlDatabaseClient(DatabaseClient):
 		""" Insert a new item into a table """
 
 		query = sqlalchemy.insert(self.metadata.tables[table]).values(data)
-		self.connection.execute(query)
+		self._execute_write(table, "insert", query)
 
 
 	def insert_many(self, table: str, dataset: List[dict]) -> None:
 		""" Insert a list of items into a table """
 
 		query = sqlalchemy.insert(self.metadata.tables[table]).values(dataset)
-		self.connection.execute(query)
+		self._execute_write(table, "insert", query)
 
 
 	def update_one(self, table: str, filter: dict, data: dict) -> None: # pylint: disable = redefined-builtin
 		""" Update a single item (or nothing) from a table, after applying a filter """
 
-		# It is not possible to use limit on a update query with SqlAlchemy,
-		# so, in cases the filter matches several rows, we first find the row to update then use its primary key to update it.
+		query = sqlalchemy.update(self.metadata.tables[table]).where(self._convert_filter_for_single_row(table, filter)).values(data)
+		self._execute_write(table, "update", query)
+
+
+	def update_many(self, table: str, filter: dict, data: dict) -> None: # pylint: disable = redefined-builtin
+		""" Update all items from a table, after applying a filter """
+
+		query = sqlalchemy.update(self.metadata.tables[table]).values(data)
+		if filter is not None and filter != {}:
+			query = query.where(self._convert_filter(table, filter))
+		self._execute_write(table, "update", query)
+
+
+	def upsert_one(self, table: str, filter: dict, data: dict, insert_data: Optional[dict] = None) -> None: # pylint: disable = redefined-builtin
+		""" Update a single item from a table, after applying a filter, or insert it from the filter, data and insert data if there is none """
+
+		new_row = { **filter, **(insert_data if insert_data is not None else {}), **data }
+		primary_key = [ column.name for column in self.metadata.tables[table].primary_key.columns ]
+
+		# When the filter is the primary key, use the dialect native upsert if available,
+		# otherwise fall back to updating the row first and inserting it if there was none.
+
+		insert_function = self._get_dialect_insert_function()
+		if insert_function is not None and set(filter.keys()) == set(primary_key):
+			query = insert_function(self.metadata.tables[table]).values(new_row)
+			if len(data) > 0:
+				query = query.on_conflict_do_update(index_elements = primary_key, set_ = data)
+			else:
+				query = query.on_conflict_do_nothing(index_elements = primary_key)
+			self._execute_write(table, "upsert", query)
+			return
 
-		row = self.find_one(table, filter)
-		if row is None:
+		if len(data) > 0:
+			query = sqlalchemy.update(self.metadata.tables[table]).where(self._convert_filter_for_single_row(table, filter)).values(data)
+			if self._execute_write(table, "update", query) > 0:
+				return
+		elif self.find_one(table, filter) is not None:
 			return
 
-		filter = { key: row[key] for key in [ column.name for column in self.metadata.tables[table].primary_key.columns ] }
-		query = sqlalchemy.update(self.metadata.tables[table]).where(self._convert_filter(table, filter)).values(data)
-		self.connection.execute(query)
+		self.insert_one(table, new_row)
+
+
+	def increment_one(self, # pylint: disable = too-many-arguments
+			table: str, filter: dict, increments: Dict[str,int], # pylint: disable = redefined-builtin
+			data: Optional[dict] = None, insert_data: Optional[dict] = None) -> Optional[dict]:
+		""" Increment and update a single item from a table, after applying a filter, or insert it if there is none, and return it once changed """
+
+		data = data if data is not None else {}
+		update_values = { **data, **self._convert_increments(table, increments) }
+		query = sqlalchemy.update(self.metadata.tables[table]).where(self._convert_filter_for_single_row(table, filter)).values(update_values)
+
+		# When there is no row to update, insert it, or update it again if another client inserted it in the meantime
+
+		if self._execute_write(table, "update", query) == 0:
+			new_row = { **filter, **(insert_data if insert_data is not None else {}), **data }
+			new_row.update(self._apply_increments(new_row, increments))
+
+			insert_function = self._get_dialect_insert_function()
+			if insert_function is None:
+				self.insert_one(table, new_row)
+			elif self._execute_write(table, "insert", insert_function(self.metadata.tables[table]).values(new_row).on_conflict_do_nothing()) == 0:
+				self._execute_write(table, "update", query)
+
+		return self.find_one(table, filter)
 
 
 	def delete_one(self, table: str, filter: dict) -> None: # pylint: disable = redefined-builtin
 		""" Delete a single item (or nothing) from a table, after applying a filter """
 
-		# It is not possible to use limit on a delete query with SqlAlchemy,
-		# so, in cases the filter matches several rows, we first find the row to delete then use its primary key to delete it.
+		query = sqlalchemy.delete(self.metadata.tables[table]).where(self._convert_filter_for_single_row(table, filter))
+		self._execute_write(table, "delete", query)
 
-		row = self.find_one(table, filter)
-		if row is None:
-			return
 
-		filter = { key: row[key] for key in [ column.name for column in self.metadata.tables[table].primary_key.columns ] }
-		query = sqlalchemy.delete(self.metadata.tables[table]).where(self._convert_filter(table, filter))
-		self.connection.execute(query)
+	def delete_many(self, table: str, filter: dict) -> None: # pylint: disable = redefined-builtin
+		""" Delete all items from a table, after applying a filter """
+
+		query = sqlalchemy.delete(self.metadata.tables[table])
+		if filter is not None and filter != {}:
+			query = query.where(self._convert_filter(table, filter))
+		self._execute_write(table, "delete", query)
+
+
+	def watch(self, table: str, filter: dict, callback: Callable[[dict], None]) -> DatabaseWatch: # pylint: disable = redefined-builtin
+		""" Watch a table for changes, calling back with the table and operation for each change until the watch is closed """
+
+		# PostgreSQL listens to the notifications sent by clients when they change a table, if they are configured to send them.
+		# SQLite has no notifications, so the database is polled for commits from other connections.
+		# The watch uses its own connection, created outside of the pool and owned by the listening thread.
+
+		if not self.is_watch_supported():
+			raise NotImplementedError("Watching changes is not supported for dialect '%s'" % self.connection.dialect.name)
+		if table not in self.metadata.tables:
+			raise ValueError("Unknown table '%s'" % table)
+
+		listen_function = self._listen_to_notifications if self.connection.dialect.name == "postgresql" else self._poll_data_version
+		engine = self.watch_engine if self.watch_engine is not None else self.connection.engine
+
+		watch = DatabaseWatch(table, filter, callback)
+		watch.start(lambda watch: listen_function(watch, engine.connect().execution_options(isolation_level = "AUTOCOMMIT")))
+		return watch
+
+
+	def is_watch_supported(self) -> bool:
+		""" Check if the database supports watching changes, callers relying on polling only otherwise """
+		return self.connection.dialect.name in [ "postgresql", "sqlite" ]
 
 
 	def close(self) -> None:
 		self.connection.close()
 
 
+	def is_database_error(self, exception: Exception) -> bool:
+		""" Check if an exception was raised by the database or its driver, in which case the client may not be usable anymore """
+		return isinstance(exception, sqlalchemy.exc.SQLAlchemyError)
+
+
+	def _execute_write(self, table: str, operation: str, query: ClauseElement) -> int:
+		""" Execute a query changing a table and return how many rows were changed, notifying the watches if enabled and the dialect supports it """
+
+		if not self.notify_changes or self.connection.dialect.name != "postgresql":
+			return self.connection.execute(query).rowcount
+
+		# A single notification is sent for the statement, whatever the rows it changed, so that watches read the data again with their filter.
+		# It is sent in the same transaction as the change, to be delivered only once the change is committed.
+
+		payload = json.dumps({ "operation": operation, "origin": self.origin })
+
+		with self.connection.begin():
+			row_count = self.connection.execute(query).rowcount
+			if row_count > 0:
+				self.connection.execute(sqlalchemy.select(sqlalchemy.func.pg_notify(self._get_channel(table), payload)))
+
+		return row_count
+
+
+	def _listen_to_notifications(self, watch: DatabaseWatch, connection: Connection) -> None:
+		""" Listen to the notifications for a table, until the watch is closed """
+
+		with connection:
+			connection.execute(sqlalchemy.text("LISTEN \"%s\"" % self._get_channel(watch.table)))
+			dbapi_connection = connection.connection.dbapi_connection
+			watch.set_ready()
+
+			try:
+				while not watch.is_closed():
+					if select.select([ dbapi_connection ], [], [], 1) == ([], [], []):
+						continue
+
+					dbapi_connection.poll()
+					while dbapi_connection.notifies:
+						self._handle_notification(watch, dbapi_connection.notifies.pop(0).payload)
+
+			finally:
+				connection.execute(sqlalchemy.text("UNLISTEN *"))
+
+
+	def _handle_notification(self, watch: DatabaseWatch, payload: str) -> None:
+		""" Notify a watch about a change from a notification payload """
+
+		try:
+			change = json.loads(payload)
+		except ValueError:
+			watch.notify(payload) # Notification with only the operation, from an older client
+			return
+
+		is_own_change = self.origin is not None and change["origin"] == self.origin
+		watch.notify(change["operation"], is_own_change = is_own_change)
+
+
+	def _poll_data_version(self, watch: DatabaseWatch, connection: Connection) -> None:
+		""" Poll the database for commits from other connections, until the watch is closed """
+
+		# The data version changes for any commit, whatever the table and rows it changed, so each one is notified as a possible change.
+		# Checking the rows matching the filter instead would miss changes within the same second, since dates are stored to the second.
+
+		with connection:
+			data_version = connection.execute(sqlalchemy.text("PRAGMA data_version")).scalar()
+			watch.set_ready()
+
+			while not watch.wait(self.watch_interval):
+				new_data_version = connection.execute(sqlalchemy.text("PRAGMA data_version")).scalar()
+				if new_data_version != data_version:
+					watch.notify("unknown")
+					data_version = new_data_version
+
+
+	def _get_channel(self, table: str) -> str:
+		""" Return the notification channel for a table """
+		return "orchestra_" + table
+
+
+	def _create_select_query(self, # pylint: disable = too-many-arguments
+			table: str, filter: dict, # pylint: disable = redefined-builtin
+			skip: int, limit: Optional[int], order_by: Optional[List[Tuple[str,str]]], fields: Optional[List[str]], start_after: Optional[dict]) -> Select:
+		""" Create a select query for a list of items """
+
+		query = sqlalchemy.select(*self._convert_fields(table, fields))
+		if filter is not None and filter != {}:
+			query = query.where(self._convert_filter(table, filter))
+		if start_after is not None:
+			query = query.where(self._convert_start_after(table, order_by, start_after))
+		if order_by is not None and order_by != []:
+			query = query.order_by(*self._convert_order_by_expression(table, order_by))
+		query = query.offset(skip).limit(limit)
+		return query
+
+
+	def _convert_fields(self, table: str, fields: Optional[List[str]]) -> List[ClauseElement]:
+		""" Convert a list of fields to the columns to select """
+
+		if fields is None:
+			return list(self.metadata.tables[table].columns)
+		return [ self.metadata.tables[table].columns[key] for key in fields ]
+
+
 	def _convert_filter(self, table: str, filter: dict) -> Optional[ClauseElement]: # pylint: disable = redefined-builtin
 		all_conditions = []
 
@@ -124,6 +335,48 @@ class SqlDatabaseClient(DatabaseClient):
 		return sqlalchemy.and_(*all_conditions)
 
 
+	def _convert_filter_for_single_row(self, table: str, filter: dict) -> ClauseElement: # pylint: disable = redefined-builtin
+		""" Convert a filter to a condition matching at most one row, for update and delete queries """
+
+		# When the filter covers the primary key, it can match at most one row and can be used as is.
+		# It is not possible to use limit on update and delete queries with SqlAlchemy,
+		# so, in other cases, the filter is applied in a subquery selecting the primary key of the first matching row.
+
+		primary_key_columns = list(self.metadata.tables[table].primary_key.columns)
+		if all(column.name in filter for column in primary_key_columns):
+			return self._convert_filter(table, filter)
+
+		subquery = sqlalchemy.select(*primary_key_columns)
+		if filter is not None and filter != {}:
+			subquery = subquery.where(self._convert_filter(table, filter))
+		subquery = subquery.limit(1)
+
+		if len(primary_key_columns) == 1:
+			return primary_key_columns[0].in_(subquery.scalar_subquery())
+		return sqlalchemy.tuple_(*primary_key_columns).in_(subquery)
+
+
+	def _convert_start_after(self, table: str, expression: List[Tuple[str,str]], start_after: dict) -> ClauseElement:
+		""" Convert a start-after item to a condition selecting the items after it, with null values first """
+
+		all_alternatives = []
+		all_previous_conditions = []
+
+		for key, direction, value in self._normalize_start_after(expression, start_after):
+			key_selector = self._get_key_selector(table, key)
+
+			if direction in [ "asc", "ascending" ]:
+				condition = key_selector.is_not(None) if value is None else (key_selector > value)
+			else:
+				condition = None if value is None else sqlalchemy.or_(key_selector < value, key_selector.is_(None))
+
+			if condition is not None:
+				all_alternatives.append(sqlalchemy.and_(*all_previous_conditions, condition))
+			all_previous_conditions.append(key_selector.is_(None) if value is None else (key_selector == value))
+
+		return sqlalchemy.or_(sqlalchemy.false(), *all_alternatives)
+
+
 	def _convert_order_by_expression(self, table: str, expression: Optional[List[Tuple[str,str]]]) -> List[ClauseElement]:
 		""" Convert a order-by expression to its sqlalchemy representation """
 
@@ -133,11 +386,7 @@ class SqlDatabaseClient(DatabaseClient):
 		sql_order_by = []
 
 		for key, direction in self._normalize_order_by_expression(expression):
-			all_key_elements = key.split(".")
-			key_selector = self.metadata.tables[table].columns[all_key_elements[0]]
-
-			if len(all_key_elements) > 1:
-				key_selector = key_selector[all_key_elements[1:]].as_string()
+			key_selector = self._get_key_selector(table, key)
 
 			if direction in [ "asc", "ascending" ]:
 				sql_order_by.append(key_selector.asc().nullsfirst())
@@ -147,6 +396,64 @@ class SqlDatabaseClient(DatabaseClient):
 		return sql_order_by
 
 
+	def _get_key_selector(self, table: str, key: str) -> ClauseElement:
+		""" Get the column or the inner json value for a key, to sort items """
+
+		all_key_elements = key.split(".")
+		key_selector = self.metadata.tables[table].columns[all_key_elements[0]]
+
+		if len(all_key_elements) > 1:
+			key_selector = key_selector[all_key_elements[1:]].as_string()
+
+		return key_selector
+
+
+	def _convert_increments(self, table: str, increments: Dict[str,int]) -> dict:
+		""" Convert increments to the values updating the columns, incrementing the inner json values for nested keys """
+
+		all_values = {}
+
+		for key, value in increments.items():
+			all_key_parts = key.split(".")
+			column = self.metadata.tables[table].columns[all_key_parts[0]]
+
+			if len(all_key_parts) == 1:
+				all_values[column.name] = column + value
+			elif len(all_key_parts) == 2:
+				all_values[column.name] = self._increment_json_value(all_values.get(column.name, column), column, all_key_parts[1], value)
+			else:
+				raise ValueError("Increment key '%s' is nested more than one level deep" % key)
+
+		return all_values
+
+
+	def _increment_json_value(self, expression: ClauseElement, column: sqlalchemy.Column, key: str, value: int) -> ClauseElement:
+		""" Increment a value inside a json column, applied to the expression holding the other changes to the column """
+
+		new_value = sqlalchemy.func.coalesce(column[key].as_integer(), 0) + value
+
+		if self.connection.dialect.name == "postgresql":
+			expression = sqlalchemy.func.coalesce(sqlalchemy.cast(expression, sqlalchemy.dialects.postgresql.JSONB), sqlalchemy.literal_column("'{}'::jsonb"))
+			path = sqlalchemy.dialects.postgresql.array([ key ])
+			return sqlalchemy.cast(sqlalchemy.func.jsonb_set(expression, path, sqlalchemy.func.to_jsonb(new_value)), sqlalchemy.JSON)
+
+		if self.connection.dialect.name == "sqlite":
+			expression = sqlalchemy.func.coalesce(expression, sqlalchemy.literal_column("'{}'"))
+			return sqlalchemy.func.json_set(expression, "$.\"%s\"" % key, new_value)
+
+		raise NotImplementedError("Incrementing json values is not supported for dialect '%s'" % self.connection.dialect.name)
+
+
+	def _get_dialect_insert_function(self) -> Optional[Callable]:
+		""" Return the dialect specific insert function, supporting upserts with on conflict clauses, if there is one """
+
+		if self.connection.dialect.name == "postgresql":
+			return sqlalchemy.dialects.postgresql.insert
+		if self.connection.dialect.name == "sqlite":
+			return sqlalchemy.dialects.sqlite.insert
+		return None
+
+
 	def _get_sqlalchemy_type(self, value):
 		if isinstance(value, bool):
 			return sqlalchemy.Boolean
@@ -0,0 +1,100 @@
+import logging
+import uuid
+from typing import Any, Optional
+
+import sqlalchemy
+import sqlalchemy.engine
+import sqlalchemy.event
+import sqlalchemy.pool
+from sqlalchemy.schema import MetaData
+
+import bhamon_orchestra_model.database.sqlite_pragmas as sqlite_pragmas_module
+from bhamon_orchestra_model.database.sql_database_administration import SqlDatabaseAdministration
+from bhamon_orchestra_model.database.sql_database_client import SqlDatabaseClient
+
+
+logger = logging.getLogger("SqlDatabaseClientFactory")
+
+
+class SqlDatabaseClientFactory:
+	""" Factory for SQL database clients, sharing a pooled engine.
+
+	Each client holds a connection checked out from the pool, which is returned to it when the client is closed,
+	so that connections are reused across requests and updates instead of being opened every time.
+
+	For SQLite, pragmas are set on each new connection, using the default profile unless others are provided,
+	and connections can be used from any thread, since pooled connections are shared between threads.
+
+	Watches use their own connections, outside of the pool since they are held for as long as they listen,
+	and clients share an origin, so that watches can tell the changes made through the factory from the others.
+	For PostgreSQL, clients notify the watches about their changes only if the factory is configured to, since it costs a statement for each change.
+
+	"""
+
+
+	def __init__(self, # pylint: disable = too-many-arguments
+			database_uri: str, metadata: MetaData, pool_size: int = 5, max_overflow: int = 10,
+			pool_timeout: float = 30, pool_recycle: int = 3600, pool_pre_ping: bool = True,
+			sqlite_pragmas: Optional[dict] = None, notify_changes: bool = False) -> None:
+
+		self.metadata = metadata
+		self.sqlite_pragmas = None
+		self.notify_changes = notify_changes
+
+		connect_args = {}
+		if sqlalchemy.engine.make_url(database_uri).get_backend_name() == "sqlite":
+			self.sqlite_pragmas = sqlite_pragmas if sqlite_pragmas is not None else sqlite_pragmas_module.default_pragmas
+			connect_args["check_same_thread"] = False
+
+		self.engine = sqlalchemy.create_engine(database_uri,
+			poolclass = sqlalchemy.pool.QueuePool,
+			pool_size = pool_size,
+			max_overflow = max_overflow,
+			pool_timeout = pool_timeout,
+			pool_recycle = pool_recycle,
+			pool_pre_ping = pool_pre_ping,
+			connect_args = connect_args,
+		)
+
+		self.watch_engine = sqlalchemy.create_engine(database_uri, poolclass = sqlalchemy.pool.NullPool, connect_args = connect_args)
+		self.origin = uuid.uuid4().hex
+
+		if self.sqlite_pragmas is not None:
+			sqlalchemy.event.listen(self.engine, "connect", self._apply_sqlite_pragmas)
+
+
+	def __call__(self) -> SqlDatabaseClient:
+		return self.create_client()
+
+
+	def create_client(self) -> SqlDatabaseClient:
+		""" Create a database client using a connection from the pool """
+		return SqlDatabaseClient(self.engine.connect(), self.metadata, watch_engine = self.watch_engine, origin = self.origin, notify_changes = self.notify_changes)
+
+
+	def create_administration(self) -> SqlDatabaseAdministration:
+		""" Create a database administration client using a connection from the pool """
+		return SqlDatabaseAdministration(self.engine.connect(), self.metadata, sqlite_pragmas = self.sqlite_pragmas)
+
+
+	def get_pool_statistics(self) -> dict:
+		""" Return the connection pool size and usage """
+
+		return {
+			"size": self.engine.pool.size(),
+			"checked_in": self.engine.pool.checkedin(),
+			"checked_out": self.engine.pool.checkedout(),
+			"overflow": self.engine.pool.overflow(),
+		}
+
+
+	def dispose(self) -> None:
+		""" Close all connections from the pool """
+
+		logger.debug("Disposing connection pool (Statistics: %s)", self.get_pool_statistics())
+		self.engine.dispose()
+		self.watch_engine.dispose()
+
+
+	def _apply_sqlite_pragmas(self, dbapi_connection: Any, connection_record: Any) -> None: # pylint: disable = unused-argument
+		sqlite_pragmas_module.apply_pragmas(dbapi_connection, self.sqlite_pragmas)
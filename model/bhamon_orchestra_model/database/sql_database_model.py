@@ -1,4 +1,4 @@
-from sqlalchemy.schema import MetaData, Table, Column
+from sqlalchemy.schema import MetaData, Table, Column, Index
 from sqlalchemy.schema import PrimaryKeyConstraint, ForeignKeyConstraint
 from sqlalchemy.types import Boolean, String, JSON
 
@@ -48,6 +48,7 @@ run = Table("run", metadata,
 	Column("start_date", UtcDateTime, nullable = True),
 	Column("completion_date", UtcDateTime, nullable = True),
 	Column("results", JSON, nullable = True),
+	Column("revision", String, nullable = True),
 	Column("should_cancel", Boolean, nullable = False),
 	Column("should_abort", Boolean, nullable = False),
 	Column("creation_date", UtcDateTime, nullable = False),
@@ -56,6 +57,44 @@ run = Table("run", metadata,
 	ForeignKeyConstraint([ "project" ], [ "project.identifier" ]),
 	# No ForeignKeyConstraint on job, since it can be deleted
 	# No ForeignKeyConstraint on worker, since it can be deleted
+	Index("run_status_creation_date", "status", "creation_date"),
+	Index("run_worker_status", "worker", "status"),
+	Index("run_project_update_date", "project", "update_date"),
+	Index("run_update_date", "update_date"),
+	Index("run_project_job_creation_date", "project", "job", "creation_date"),
+	Index("run_project_revision", "project", "revision"),
+)
+
+run_archive = Table("run_archive", metadata,
+	Column("project", String, nullable = False),
+	Column("identifier", String, nullable = False),
+	Column("job", String, nullable = False),
+	Column("parameters", JSON, nullable = False),
+	Column("source", JSON, nullable = False),
+	Column("worker", String, nullable = True),
+	Column("status", String, nullable = False),
+	Column("start_date", UtcDateTime, nullable = True),
+	Column("completion_date", UtcDateTime, nullable = True),
+	Column("results", JSON, nullable = True),
+	Column("revision", String, nullable = True),
+	Column("should_cancel", Boolean, nullable = False),
+	Column("should_abort", Boolean, nullable = False),
+	Column("creation_date", UtcDateTime, nullable = False),
+	Column("update_date", UtcDateTime, nullable = False),
+	Column("archive_date", UtcDateTime, nullable = False),
+	PrimaryKeyConstraint("project", "identifier"),
+	# No ForeignKeyConstraint, so that archived runs do not prevent changes to other tables
+)
+
+revision_status = Table("revision_status", metadata,
+	Column("project", String, nullable = False),
+	Column("revision", String, nullable = False),
+	Column("status_counts", JSON, nullable = False),
+	Column("status", String, nullable = False),
+	Column("creation_date", UtcDateTime, nullable = False),
+	Column("update_date", UtcDateTime, nullable = False),
+	PrimaryKeyConstraint("project", "revision"),
+	ForeignKeyConstraint([ "project" ], [ "project.identifier" ]),
 )
 
 schedule = Table("schedule", metadata,
@@ -0,0 +1,43 @@
+import logging
+from typing import Any
+
+
+logger = logging.getLogger("SqlitePragmas")
+
+
+# Profile for SQLite databases shared by the service, the master and the command line.
+# WAL lets readers proceed while a write is in progress, and with synchronous set to normal it syncs only at checkpoints.
+# The busy timeout makes writers wait for each other instead of failing with "database is locked".
+
+default_pragmas = {
+	"journal_mode": "wal",
+	"synchronous": "normal",
+	"busy_timeout": 5000,
+	"cache_size": -16000, # In KiB when negative
+	"mmap_size": 256 * 1024 * 1024,
+}
+
+
+_synchronous_values = { "off": 0, "normal": 1, "full": 2, "extra": 3 }
+
+
+def apply_pragmas(dbapi_connection: Any, pragmas: dict) -> None:
+	""" Set pragmas on a new DBAPI connection to a SQLite database """
+
+	cursor = dbapi_connection.cursor()
+
+	try:
+		for name, value in pragmas.items():
+			cursor.execute("PRAGMA %s = %s" % (name, value))
+	finally:
+		cursor.close()
+
+
+def normalize_value(name: str, value: Any) -> Any:
+	""" Normalize a pragma value to the form returned when querying it """
+
+	if name == "synchronous" and isinstance(value, str):
+		return _synchronous_values.get(value.lower(), value)
+	if isinstance(value, str):
+		return value.lower()
+	return value
@@ -2,18 +2,21 @@ import logging
 
 from typing import List, Optional, Tuple
 
+from bhamon_orchestra_model import keyset_pagination
 from bhamon_orchestra_model.database.database_client import DatabaseClient
 from bhamon_orchestra_model.date_time_provider import DateTimeProvider
+from bhamon_orchestra_model.record_cache import RecordCache, RecordCacheMixin
 
 
 logger = logging.getLogger("JobProvider")
 
 
-class JobProvider:
+class JobProvider(RecordCacheMixin):
 
 
-	def __init__(self,  date_time_provider: DateTimeProvider) -> None:
+	def __init__(self, date_time_provider: DateTimeProvider, record_cache: Optional[RecordCache] = None) -> None:
 		self.date_time_provider = date_time_provider
+		self.record_cache = record_cache
 		self.table = "job"
 
 
@@ -24,15 +27,22 @@ class JobProvider:
 
 
 	def get_list(self, database_client: DatabaseClient, # pylint: disable = too-many-arguments
-			project: Optional[str] = None, skip: int = 0, limit: Optional[int] = None, order_by: Optional[List[Tuple[str,str]]] = None) -> List[dict]:
+			project: Optional[str] = None, skip: int = 0, limit: Optional[int] = None,
+			order_by: Optional[List[Tuple[str,str]]] = None, continuation_token: Optional[str] = None) -> List[dict]:
 
 		filter = { "project": project } # pylint: disable = redefined-builtin
 		filter = { key: value for key, value in filter.items() if value is not None }
-		return database_client.find_many(self.table, filter, skip = skip, limit = limit, order_by = order_by)
+		order_by = keyset_pagination.complete_order_by(order_by, [ "project", "identifier" ])
+		start_after = keyset_pagination.parse_continuation_token(continuation_token) if continuation_token is not None else None
+		return self._find_many(database_client, filter, skip = skip, limit = limit, order_by = order_by, start_after = start_after)
+
+
+	def create_continuation_token(self, job: dict, order_by: List[Tuple[str,str]]) -> str:
+		return keyset_pagination.create_continuation_token(job, keyset_pagination.complete_order_by(order_by, [ "project", "identifier" ]))
 
 
 	def get(self, database_client: DatabaseClient, project: str, job_identifier: str) -> Optional[dict]:
-		return database_client.find_one(self.table, { "project": project, "identifier": job_identifier })
+		return self._find_one(database_client, { "project": project, "identifier": job_identifier })
 
 
 	def create_or_update(self, database_client: DatabaseClient, # pylint: disable = too-many-arguments
@@ -40,38 +50,24 @@ class JobProvider:
 			definition: dict, parameters: list, properties: dict) -> dict:
 
 		now = self.date_time_provider.now()
-		job = self.get(database_client, project, job_identifier)
-
-		if job is None:
-			job = {
-				"project": project,
-				"identifier": job_identifier,
-				"display_name": display_name,
-				"description": description,
-				"definition": definition,
-				"parameters": parameters,
-				"properties": properties,
-				"is_enabled": True,
-				"creation_date": now,
-				"update_date": now,
-			}
-
-			database_client.insert_one(self.table, job)
-
-		else:
-			update_data = {
-				"display_name": display_name,
-				"description": description,
-				"definition": definition,
-				"parameters": parameters,
-				"properties": properties,
-				"update_date": now,
-			}
-
-			job.update(update_data)
-			database_client.update_one(self.table, { "project": project, "identifier": job_identifier }, update_data)
-
-		return job
+
+		update_data = {
+			"display_name": display_name,
+			"description": description,
+			"definition": definition,
+			"parameters": parameters,
+			"properties": properties,
+			"update_date": now,
+		}
+
+		insert_data = {
+			"is_enabled": True,
+			"creation_date": now,
+		}
+
+		database_client.upsert_one(self.table, { "project": project, "identifier": job_identifier }, update_data, insert_data)
+		self._invalidate_records()
+		return self.get(database_client, project, job_identifier)
 
 
 	def update_status(self, database_client: DatabaseClient, job: dict, is_enabled: Optional[bool] = None) -> None:
@@ -86,7 +82,9 @@ class JobProvider:
 
 		job.update(update_data)
 		database_client.update_one(self.table, { "project": job["project"], "identifier": job["identifier"] }, update_data)
+		self._invalidate_records()
 
 
 	def delete(self, database_client: DatabaseClient, project: str, job_identifier: str) -> None:
 		database_client.delete_one(self.table, { "project": project, "identifier": job_identifier })
+		self._invalidate_records()
@@ -0,0 +1,53 @@
+import base64
+import binascii
+from typing import Any, List, Optional, Tuple
+
+from bhamon_orchestra_model.serialization.json_serializer import JsonSerializer
+
+
+# Keyset pagination selects the items following the last item of the previous page, according to the order-by expression,
+# so that the cost of retrieving a page does not depend on its position, unlike with skip and limit.
+# Continuation tokens hold the values of the order-by keys for that last item, and are opaque to clients.
+
+serializer = JsonSerializer()
+
+
+def complete_order_by(order_by: Optional[List[Tuple[str,str]]], unique_key_collection: List[str]) -> Optional[List[Tuple[str,str]]]:
+	""" Complete an order-by expression with the keys identifying items, so that their order is deterministic """
+
+	if order_by is None or len(order_by) == 0:
+		return order_by
+
+	order_by = [ (item, "ascending") if isinstance(item, str) else tuple(item) for item in order_by ]
+	all_keys = [ item[0] for item in order_by ]
+	return order_by + [ (key, "ascending") for key in unique_key_collection if key not in all_keys ]
+
+
+def create_continuation_token(item: dict, order_by: List[Tuple[str,str]]) -> str:
+	""" Create a token to continue listing items after the provided one """
+
+	start_after = { item_key[0]: _get_value(item, item_key[0]) for item_key in order_by }
+	return base64.urlsafe_b64encode(serializer.serialize_to_string(start_after).encode("utf-8")).decode("utf-8")
+
+
+def parse_continuation_token(continuation_token: str) -> dict:
+	""" Parse a continuation token to the values of the order-by keys for the item to continue after """
+
+	try:
+		start_after = serializer.deserialize_from_string(base64.urlsafe_b64decode(continuation_token.encode("utf-8")).decode("utf-8"))
+	except (binascii.Error, UnicodeDecodeError, ValueError):
+		raise ValueError("Invalid continuation token '%s'" % continuation_token) from None
+
+	if not isinstance(start_after, dict):
+		raise ValueError("Invalid continuation token '%s'" % continuation_token)
+
+	return start_after
+
+
+def _get_value(item: dict, key: str) -> Any:
+	data = item
+	for key_part in key.split("."):
+		if not isinstance(data, dict) or key_part not in data:
+			return None
+		data = data[key_part]
+	return data
@@ -0,0 +1,53 @@
+import copy
+from typing import Any, List, Optional
+
+from bhamon_orchestra_model.database.database_client import DatabaseClient
+from bhamon_orchestra_model.table_cache import TableCache
+
+
+class RecordCache(TableCache):
+	""" In-process read-through cache for the records of tables which rarely change, by query.
+
+	Entries are invalidated when the process writes to the table, or when it is notified of changes from other processes,
+	and expire after a short time in case notifications are not available. Records can therefore be slightly out of date
+	when changed by another process. Records are copied when saved and returned, so that callers can modify them.
+
+	"""
+
+
+	def find_one(self, database_client: DatabaseClient, table: str, filter: dict) -> Optional[dict]: # pylint: disable = redefined-builtin
+		""" Return a single record (or nothing) from a table, after applying a filter, from the cache if possible """
+		return self._read_through((table, "find_one", repr(filter)), lambda: database_client.find_one(table, filter))
+
+
+	def find_many(self, database_client: DatabaseClient, table: str, filter: dict, **kwargs) -> List[dict]: # pylint: disable = redefined-builtin
+		""" Return a list of records from a table, after applying a filter and options, from the cache if possible """
+		return self._read_through((table, "find_many", repr(filter), repr(sorted(kwargs.items()))), lambda: database_client.find_many(table, filter, **kwargs))
+
+
+	def _copy_value(self, value: Any) -> Any:
+		return copy.deepcopy(value)
+
+
+class RecordCacheMixin: # pylint: disable = too-few-public-methods
+	""" Mixin for providers reading the records of their table through an optional record cache, and invalidating it when writing """
+
+	table: str
+	record_cache: Optional[RecordCache]
+
+
+	def _find_one(self, database_client: DatabaseClient, filter: dict) -> Optional[dict]: # pylint: disable = redefined-builtin
+		if self.record_cache is not None:
+			return self.record_cache.find_one(database_client, self.table, filter)
+		return database_client.find_one(self.table, filter)
+
+
+	def _find_many(self, database_client: DatabaseClient, filter: dict, **kwargs) -> List[dict]: # pylint: disable = redefined-builtin
+		if self.record_cache is not None:
+			return self.record_cache.find_many(database_client, self.table, filter, **kwargs)
+		return database_client.find_many(self.table, filter, **kwargs)
+
+
+	def _invalidate_records(self) -> None:
+		if self.record_cache is not None:
+			self.record_cache.invalidate(self.table)
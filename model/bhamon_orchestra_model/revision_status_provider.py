@@ -0,0 +1,143 @@
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from bhamon_orchestra_model.database.database_client import DatabaseClient
+from bhamon_orchestra_model.date_time_provider import DateTimeProvider
+
+
+logger = logging.getLogger("RevisionStatusProvider")
+
+
+class RevisionStatusProvider:
+	""" Provider for the status of project revisions, maintained from the status of their runs.
+
+	Each record holds how many runs have each status for a revision, and the aggregate status computed from these counts.
+	Records are updated by the run provider when a run with a revision is changed, so that reading the status
+	of a revision does not require loading its runs. Counts are incremented and decremented by the database itself,
+	so that changes from several processes, such as the master and the command line, are not lost.
+	Records can also be rebuilt from the runs, to repair them after runs were changed without the provider.
+
+	"""
+
+
+	def __init__(self, date_time_provider: DateTimeProvider) -> None:
+		self.date_time_provider = date_time_provider
+		self.table = "revision_status"
+		self.run_table = "run"
+
+
+	def get(self, database_client: DatabaseClient, project: str, revision: str) -> Optional[dict]:
+		revision_status = database_client.find_one(self.table, { "project": project, "revision": revision })
+		return self._remove_empty_counts(revision_status) if revision_status is not None else None
+
+
+	def get_list(self, database_client: DatabaseClient, # pylint: disable = too-many-arguments
+			project: Optional[str] = None, skip: int = 0, limit: Optional[int] = None, order_by: Optional[List[Tuple[str,str]]] = None) -> List[dict]:
+
+		filter = { "project": project } # pylint: disable = redefined-builtin
+		filter = { key: value for key, value in filter.items() if value is not None }
+		revision_status_collection = database_client.find_many(self.table, filter, skip = skip, limit = limit, order_by = order_by)
+		revision_status_collection = [ self._remove_empty_counts(revision_status) for revision_status in revision_status_collection ]
+		return [ revision_status for revision_status in revision_status_collection if revision_status is not None ]
+
+
+	def update_run(self, database_client: DatabaseClient, # pylint: disable = too-many-arguments
+			project: str, previous_revision: Optional[str], previous_status: Optional[str], revision: Optional[str], status: Optional[str]) -> None:
+		""" Move a run from its previous revision and status to the new ones, a run being added or removed when either is none """
+
+		if previous_revision == revision and previous_status == status:
+			return
+
+		all_increments = {}
+		if previous_revision is not None and previous_status is not None:
+			all_increments.setdefault(previous_revision, {})["status_counts." + previous_status] = -1
+		if revision is not None and status is not None:
+			increments = all_increments.setdefault(revision, {})
+			increments["status_counts." + status] = increments.get("status_counts." + status, 0) + 1
+
+		for revision_to_update, increments in all_increments.items():
+			self._increment(database_client, project, revision_to_update, increments)
+
+
+	def rebuild(self, database_client: DatabaseClient, project: Optional[str] = None) -> int:
+		""" Recompute the records for all revisions from the status of their runs, removing the records without runs, and return how many there are """
+
+		filter = { "project": project } # pylint: disable = redefined-builtin
+		filter = { key: value for key, value in filter.items() if value is not None }
+
+		all_status_counts = {}
+		for run in database_client.find_iter(self.run_table, filter, fields = [ "project", "revision", "status" ]):
+			if run.get("revision", None) is not None:
+				status_counts = all_status_counts.setdefault((run["project"], run["revision"]), {})
+				status_counts[run["status"]] = status_counts.get(run["status"], 0) + 1
+
+		for revision_status in database_client.find_many(self.table, filter, fields = [ "project", "revision" ]):
+			if (revision_status["project"], revision_status["revision"]) not in all_status_counts:
+				database_client.delete_one(self.table, { "project": revision_status["project"], "revision": revision_status["revision"] })
+
+		for (run_project, revision), status_counts in all_status_counts.items():
+			self._save(database_client, run_project, revision, status_counts)
+
+		return len(all_status_counts)
+
+
+	def _increment(self, database_client: DatabaseClient, project: str, revision: str, increments: Dict[str,int]) -> None:
+		""" Increment how many runs have each status for a revision, then update its aggregate status """
+
+		now = self.date_time_provider.now()
+		revision_filter = { "project": project, "revision": revision }
+		update_data = { "update_date": now }
+		insert_data = { "status": "unknown", "creation_date": now }
+		revision_status = database_client.increment_one(self.table, revision_filter, increments, update_data, insert_data)
+
+		# The status is computed from the counts once they are changed, so another process may have changed them in the meantime
+		# and written the status for the previous counts. The status is written again until it matches the counts read back.
+
+		while revision_status is not None and revision_status["status"] != compute_revision_status(revision_status["status_counts"]):
+			database_client.update_one(self.table, revision_filter, { "status": compute_revision_status(revision_status["status_counts"]) })
+			revision_status = database_client.find_one(self.table, revision_filter)
+
+
+	def _save(self, database_client: DatabaseClient, project: str, revision: str, status_counts: Dict[str,int]) -> None:
+		""" Save the record for a revision with how many of its runs have each status, removing it if there are none """
+
+		if len(status_counts) == 0:
+			database_client.delete_one(self.table, { "project": project, "revision": revision })
+			return
+
+		now = self.date_time_provider.now()
+
+		update_data = {
+			"status_counts": status_counts,
+			"status": compute_revision_status(status_counts),
+			"update_date": now,
+		}
+
+		insert_data = {
+			"creation_date": now,
+		}
+
+		database_client.upsert_one(self.table, { "project": project, "revision": revision }, update_data, insert_data)
+
+
+	def _remove_empty_counts(self, revision_status: dict) -> Optional[dict]:
+		""" Remove the statuses without runs left from a record, returning none if there are no runs left at all """
+
+		# Counts are decremented rather than removed, so records are kept with counts at zero until they are rebuilt
+
+		status_counts = { status: count for status, count in revision_status["status_counts"].items() if count != 0 }
+		return { **revision_status, "status_counts": status_counts } if len(status_counts) > 0 else None
+
+
+def compute_revision_status(status_counts: Dict[str,int]) -> str:
+	""" Return the aggregate status for a revision from how many of its runs have each status """
+
+	if sum(status_counts.values()) == 0:
+		return "unknown"
+	if any(status_counts.get(status, 0) > 0 for status in [ "failed", "aborted", "exception" ]):
+		return "failed"
+	if any(status_counts.get(status, 0) > 0 for status in [ "pending", "running" ]):
+		return "pending"
+	if all(status == "succeeded" for status, count in status_counts.items() if count > 0):
+		return "succeeded"
+	return "unknown"
@@ -1,3 +1,4 @@
+import gzip
 import io
 import logging
 import os
@@ -5,11 +6,14 @@ import time
 import uuid
 import zipfile
 
-from typing import List, Optional, Tuple
+from typing import Iterator, List, Optional, Tuple
 
+from bhamon_orchestra_model import keyset_pagination
+from bhamon_orchestra_model.count_cache import CountCache
 from bhamon_orchestra_model.database.database_client import DatabaseClient
 from bhamon_orchestra_model.database.data_storage import DataStorage
 from bhamon_orchestra_model.date_time_provider import DateTimeProvider
+from bhamon_orchestra_model.revision_status_provider import RevisionStatusProvider
 from bhamon_orchestra_model.serialization.serializer import Serializer
 
 
@@ -19,10 +23,19 @@ logger = logging.getLogger("RunProvider")
 class RunProvider:
 
 
-	def __init__(self, data_storage: DataStorage, date_time_provider: DateTimeProvider) -> None:
+	def __init__(self, data_storage: DataStorage, date_time_provider: DateTimeProvider,
+			count_cache: Optional[CountCache] = None, revision_status_provider: Optional[RevisionStatusProvider] = None) -> None:
 		self.data_storage = data_storage
 		self.date_time_provider = date_time_provider
+		self.count_cache = count_cache
+		self.revision_status_provider = revision_status_provider
 		self.table = "run"
+		self.archive_table = "run_archive"
+
+		self.public_fields = [
+			"identifier", "project", "job", "worker", "parameters", "source", "status", "revision",
+			"start_date", "completion_date", "should_cancel", "should_abort", "creation_date", "update_date",
+		]
 
 
 	def count(self, database_client: DatabaseClient, # pylint: disable = too-many-arguments
@@ -30,30 +43,49 @@ class RunProvider:
 
 		filter = { "project": project, "job": job, "worker": worker, "status": status } # pylint: disable = redefined-builtin
 		filter = { key: value for key, value in filter.items() if value is not None }
+
+		if self.count_cache is not None:
+			return self.count_cache.count(database_client, self.table, filter)
 		return database_client.count(self.table, filter)
 
 
 	def get_list(self, database_client: DatabaseClient, # pylint: disable = too-many-arguments
 			project: Optional[str] = None, job: Optional[str] = None, worker: Optional[str] = None, status: Optional[str] = None,
-			skip: int = 0, limit: Optional[int] = None, order_by: Optional[List[Tuple[str,str]]] = None) -> List[dict]:
+			skip: int = 0, limit: Optional[int] = None, order_by: Optional[List[Tuple[str,str]]] = None, continuation_token: Optional[str] = None) -> List[dict]:
 
 		filter = { "project": project, "job": job, "worker": worker, "status": status } # pylint: disable = redefined-builtin
 		filter = { key: value for key, value in filter.items() if value is not None }
-		run_collection = database_client.find_many(self.table, filter, skip = skip, limit = limit, order_by = order_by)
+		order_by = keyset_pagination.complete_order_by(order_by, [ "project", "identifier" ])
+		start_after = keyset_pagination.parse_continuation_token(continuation_token) if continuation_token is not None else None
+		run_collection = database_client.find_many(self.table, filter,
+			skip = skip, limit = limit, order_by = order_by, fields = self.public_fields, start_after = start_after)
 		return [ self.convert_to_public(run) for run in run_collection ]
 
 
+	def create_continuation_token(self, run: dict, order_by: List[Tuple[str,str]]) -> str:
+		return keyset_pagination.create_continuation_token(run, keyset_pagination.complete_order_by(order_by, [ "project", "identifier" ]))
+
+
 	def get_list_as_documents(self, database_client: DatabaseClient, # pylint: disable = too-many-arguments
-			project: Optional[str] = None, job: Optional[str] = None, worker: Optional[str] = None, status: Optional[str] = None,
+			project: Optional[str] = None, job: Optional[str] = None, worker: Optional[str] = None, status: Optional[str] = None, revision: Optional[str] = None,
 			skip: int = 0, limit: Optional[int] = None, order_by: Optional[List[Tuple[str,str]]] = None) -> List[dict]:
 
-		filter = { "project": project, "job": job, "worker": worker, "status": status } # pylint: disable = redefined-builtin
+		filter = { "project": project, "job": job, "worker": worker, "status": status, "revision": revision } # pylint: disable = redefined-builtin
 		filter = { key: value for key, value in filter.items() if value is not None }
 		return database_client.find_many(self.table, filter, skip = skip, limit = limit, order_by = order_by)
 
 
+	def iterate_as_documents(self, database_client: DatabaseClient, # pylint: disable = too-many-arguments
+			project: Optional[str] = None, job: Optional[str] = None, worker: Optional[str] = None, status: Optional[str] = None, revision: Optional[str] = None,
+			skip: int = 0, limit: Optional[int] = None, order_by: Optional[List[Tuple[str,str]]] = None, fields: Optional[List[str]] = None) -> Iterator[dict]:
+
+		filter = { "project": project, "job": job, "worker": worker, "status": status, "revision": revision } # pylint: disable = redefined-builtin
+		filter = { key: value for key, value in filter.items() if value is not None }
+		return database_client.find_iter(self.table, filter, skip = skip, limit = limit, order_by = order_by, fields = fields)
+
+
 	def get(self, database_client: DatabaseClient, project: str, run_identifier: str) -> Optional[dict]:
-		run = database_client.find_one(self.table, { "project": project, "identifier": run_identifier })
+		run = database_client.find_one(self.table, { "project": project, "identifier": run_identifier }, fields = self.public_fields)
 		return self.convert_to_public(run) if run is not None else None
 
 
@@ -78,6 +110,7 @@ class RunProvider:
 			"start_date": None,
 			"completion_date": None,
 			"results": None,
+			"revision": None,
 			"should_cancel": False,
 			"should_abort": False,
 			"creation_date": now,
@@ -85,13 +118,14 @@ class RunProvider:
 		}
 
 		database_client.insert_one(self.table, run)
+		self._invalidate_counts()
 		return run
 
 
 	def update_status(self, database_client: DatabaseClient, # pylint: disable = too-many-arguments
 			run: dict, worker: Optional[str] = None, status: Optional[str] = None,
 			start_date: Optional[str] = None, completion_date: Optional[str] = None,
-			should_cancel: Optional[bool] = None, should_abort: Optional[bool] = None) -> None:
+			should_cancel: Optional[bool] = None, should_abort: Optional[bool] = None, results: Optional[dict] = None) -> None:
 
 		now = self.date_time_provider.now()
 
@@ -102,18 +136,82 @@ class RunProvider:
 			"completion_date": completion_date,
 			"should_cancel": should_cancel,
 			"should_abort": should_abort,
+			"results": results,
 			"update_date": now,
 		}
 
 		update_data = { key: value for key, value in update_data.items() if value is not None }
 
+		if "results" in update_data:
+			update_data["revision"] = get_revision_from_results(results)
+
+		previous_run = None
+		if "status" in update_data or "revision" in update_data:
+			previous_run = self._get_previous_run(database_client, run)
+
 		run.update(update_data)
 		database_client.update_one(self.table, { "project": run["project"], "identifier": run["identifier"] }, update_data)
 
+		if previous_run is not None:
+			self._update_revision_status(database_client, run["project"], previous_run, update_data)
+		if "worker" in update_data or "status" in update_data:
+			self._invalidate_counts()
+
+
+	def cancel_pending(self, database_client: DatabaseClient) -> None:
+		""" Cancel all pending runs which were requested to be cancelled and are not assigned to a worker yet """
+
+		now = self.date_time_provider.now()
+
+		filter = { "status": "pending", "worker": None, "should_cancel": True } # pylint: disable = redefined-builtin
+		update_data = { "status": "cancelled", "update_date": now }
+
+		all_runs_with_revision = self._list_runs_with_revision(database_client, filter)
+
+		database_client.update_many(self.table, filter, update_data)
+
+		for run in all_runs_with_revision:
+			self._update_revision_status(database_client, run["project"], run, update_data)
+		self._invalidate_counts()
+
+
+	def archive(self, database_client: DatabaseClient, project: str, run_identifier: str, delete_log: bool = False) -> None:
+		""" Move a completed run to the archive table, and compress or delete its log """
+
+		run = database_client.find_one(self.table, { "project": project, "identifier": run_identifier })
+		if run is None:
+			raise ValueError("Run '%s' does not exist" % run_identifier)
+		if run["status"] in [ "pending", "running" ]:
+			raise ValueError("Run '%s' is not completed (Status: '%s')" % (run_identifier, run["status"]))
+
+		# The archive record is saved first and replaced if it exists, so that archiving can be retried after an interruption
+
+		archive_data = { key: value for key, value in run.items() if key not in [ "project", "identifier" ] }
+		archive_data["archive_date"] = self.date_time_provider.now()
+
+		database_client.upsert_one(self.archive_table, { "project": project, "identifier": run_identifier }, archive_data)
+
+		key = "projects/{project}/runs/{run_identifier}/run.log".format(**locals())
+		raw_data = self.data_storage.get(key)
+		if raw_data is not None:
+			if not delete_log:
+				self.data_storage.set(key + ".gz", gzip.compress(raw_data))
+			self.data_storage.delete(key)
+
+		database_client.delete_one(self.table, { "project": project, "identifier": run_identifier })
+		self._update_revision_status(database_client, project, run, { "revision": None, "status": None })
+		self._invalidate_counts()
+
+
+	def get_archived(self, database_client: DatabaseClient, project: str, run_identifier: str) -> Optional[dict]:
+		return database_client.find_one(self.archive_table, { "project": project, "identifier": run_identifier })
+
 
 	def get_log(self, project: str, run_identifier: str) -> Tuple[str,int]: # pylint: disable = unused-argument
 		key = "projects/{project}/runs/{run_identifier}/run.log".format(**locals())
 		raw_data = self.data_storage.get(key)
+		if raw_data is None:
+			raw_data = self._get_compressed_log(key)
 		text_data = raw_data.decode("utf-8").replace(os.linesep, "\n") if raw_data is not None else ""
 		return text_data, len(raw_data) if raw_data is not None else 0
 
@@ -131,7 +229,7 @@ class RunProvider:
 
 
 	def get_results(self, database_client: DatabaseClient, project: str, run_identifier: str) -> dict:
-		return database_client.find_one(self.table, { "project": project, "identifier": run_identifier })["results"]
+		return database_client.find_one(self.table, { "project": project, "identifier": run_identifier }, fields = [ "results" ])["results"]
 
 
 	def set_results(self, database_client: DatabaseClient, run: dict, results: dict) -> None:
@@ -139,12 +237,18 @@ class RunProvider:
 
 		update_data = {
 			"results": results,
+			"revision": get_revision_from_results(results),
 			"update_date": now,
 		}
 
+		previous_run = self._get_previous_run(database_client, run)
+
 		run.update(update_data)
 		database_client.update_one(self.table, { "project": run["project"], "identifier": run["identifier"] }, update_data)
 
+		if previous_run is not None:
+			self._update_revision_status(database_client, run["project"], previous_run, update_data)
+
 
 	def get_archive(self, database_client: DatabaseClient, serializer: Serializer, project: str, run_identifier: str) -> dict:
 		run = database_client.find_one(self.table, { "project": project, "identifier": run_identifier })
@@ -167,10 +271,54 @@ class RunProvider:
 			return { "file_name": file_name, "data": file_object.getvalue(), "type": "zip" }
 
 
+	def _get_compressed_log(self, key: str) -> Optional[bytes]:
+		""" Return the decompressed data for a log compressed by archiving its run, if there is one """
+
+		compressed_data = self.data_storage.get(key + ".gz")
+		return gzip.decompress(compressed_data) if compressed_data is not None else None
+
+
+	def _get_previous_run(self, database_client: DatabaseClient, run: dict) -> Optional[dict]:
+		""" Return the run revision and status before an update, from the provided run if it has them, to update the revision status """
+
+		if self.revision_status_provider is None:
+			return None
+		if "revision" in run and "status" in run:
+			return { "revision": run["revision"], "status": run["status"] }
+		return database_client.find_one(self.table, { "project": run["project"], "identifier": run["identifier"] }, fields = [ "revision", "status" ])
+
+
+	def _list_runs_with_revision(self, database_client: DatabaseClient, filter: dict) -> List[dict]: # pylint: disable = redefined-builtin
+		""" Return the revision and status of the runs matching a filter which have a revision, before an update, to update the revision status """
+
+		if self.revision_status_provider is None:
+			return []
+
+		all_runs = database_client.find_many(self.table, filter, fields = [ "project", "revision", "status" ])
+		return [ run for run in all_runs if run.get("revision", None) is not None ]
+
+
+	def _update_revision_status(self, database_client: DatabaseClient, project: str, previous_run: dict, update_data: dict) -> None:
+		if self.revision_status_provider is None:
+			return
+
+		previous_revision = previous_run.get("revision", None)
+		revision = update_data.get("revision", previous_revision)
+		status = update_data.get("status", previous_run["status"])
+		self.revision_status_provider.update_run(database_client, project, previous_revision, previous_run["status"], revision, status)
+
+
+	def _invalidate_counts(self) -> None:
+		if self.count_cache is not None:
+			self.count_cache.invalidate(self.table)
+
+
 	def convert_to_public(self, run: dict) -> dict:
-		keys_to_return = [
-			"identifier", "project", "job", "worker", "parameters", "source", "status",
-			"start_date", "completion_date", "should_cancel", "should_abort", "creation_date", "update_date",
-		]
+		return { key: value for key, value in run.items() if key in self.public_fields }
+
+
+def get_revision_from_results(results: Optional[dict]) -> Optional[str]:
+	""" Return the source revision reported in the run results, which is saved as a run field to query runs by revision """
 
-		return { key: value for key, value in run.items() if key in keys_to_return }
+	revision = ((results or {}).get("revision_control", None) or {}).get("revision", None)
+	return revision if isinstance(revision, str) else None
@@ -0,0 +1,110 @@
+import datetime
+import logging
+from typing import Iterator, List, Optional
+
+from bhamon_orchestra_model.database.database_client import DatabaseClient
+from bhamon_orchestra_model.date_time_provider import DateTimeProvider
+from bhamon_orchestra_model.job_provider import JobProvider
+from bhamon_orchestra_model.run_provider import RunProvider
+from bhamon_orchestra_model.schedule_provider import ScheduleProvider
+
+
+logger = logging.getLogger("RunRetention")
+
+
+class RunRetention:
+	""" Archive the runs expired according to retention policies, so that the run table and the run logs stay bounded in size.
+
+	A policy sets how many runs to keep for a job (run_limit) and for how many days (age_limit_days).
+	Policies are taken from the job properties, then from the project policies, then from the default policy.
+	Runs exceeding any limit are archived once completed, except for the last run of a schedule which is still referenced.
+
+	"""
+
+
+	def __init__(self, # pylint: disable = too-many-arguments
+			job_provider: JobProvider, run_provider: RunProvider, schedule_provider: ScheduleProvider, date_time_provider: DateTimeProvider,
+			default_policy: Optional[dict] = None, project_policies: Optional[dict] = None, delete_logs: bool = False) -> None:
+
+		self.job_provider = job_provider
+		self.run_provider = run_provider
+		self.schedule_provider = schedule_provider
+		self.date_time_provider = date_time_provider
+		self.default_policy = default_policy if default_policy is not None else {}
+		self.project_policies = project_policies if project_policies is not None else {}
+		self.delete_logs = delete_logs
+
+
+	def apply(self, database_client: DatabaseClient, limit: Optional[int] = None, simulate: bool = False) -> List[dict]:
+		""" Archive the expired runs, up to a limit so that retention can be applied incrementally, and return them """
+
+		now = self.date_time_provider.now()
+		all_archived_runs = []
+
+		for job in self.job_provider.get_list(database_client, order_by = [ ("project", "ascending"), ("identifier", "ascending") ]):
+			run_limit = limit - len(all_archived_runs) if limit is not None else None
+			if run_limit == 0:
+				break
+
+			for run in self.find_expired_runs(database_client, job, now, run_limit):
+				logger.info("Archiving run '%s' for job '%s' in project '%s'" + (" (simulation)" if simulate else ""), # pylint: disable = logging-not-lazy
+					run["identifier"], run["job"], run["project"])
+				if not simulate:
+					self.run_provider.archive(database_client, run["project"], run["identifier"], delete_log = self.delete_logs)
+				all_archived_runs.append(run)
+
+		return all_archived_runs
+
+
+	def get_policy(self, job: dict) -> dict:
+		""" Return the retention policy for a job """
+
+		policy = job["properties"].get("retention", None)
+		if policy is None:
+			policy = self.project_policies.get(job["project"], None)
+		if policy is None:
+			policy = self.default_policy
+		return policy
+
+
+	def find_expired_runs(self, database_client: DatabaseClient, job: dict, now: datetime.datetime, limit: Optional[int] = None) -> List[dict]:
+		""" Find the completed runs for a job which exceed its retention policy, from the most recent """
+
+		policy = self.get_policy(job)
+		run_limit = policy.get("run_limit", None)
+		age_limit = datetime.timedelta(days = policy["age_limit_days"]) if policy.get("age_limit_days", None) is not None else None
+
+		if run_limit is None and age_limit is None:
+			return []
+
+		all_protected_runs = self._list_protected_runs(database_client, job)
+
+		# Without an age limit, the runs to keep can be skipped by the database
+		skip = run_limit if age_limit is None else 0
+		all_expired_runs = []
+
+		for run_index, run in enumerate(self._iterate_runs(database_client, job, skip), start = skip):
+			is_expired = (run_limit is not None and run_index >= run_limit) or (age_limit is not None and run["creation_date"] < now - age_limit)
+			if not is_expired or run["status"] in [ "pending", "running" ] or run["identifier"] in all_protected_runs:
+				continue
+
+			all_expired_runs.append(run)
+			if limit is not None and len(all_expired_runs) >= limit:
+				break
+
+		return all_expired_runs
+
+
+	def _list_protected_runs(self, database_client: DatabaseClient, job: dict) -> List[str]:
+		""" Return the identifiers of the runs for a job which are still referenced by its schedules """
+
+		all_schedules = self.schedule_provider.get_list(database_client, project = job["project"], job = job["identifier"])
+		return [ schedule["last_run"] for schedule in all_schedules if schedule["last_run"] is not None ]
+
+
+	def _iterate_runs(self, database_client: DatabaseClient, job: dict, skip: int) -> Iterator[dict]:
+		""" Iterate over the runs for a job, from the most recent, with only the fields needed to check their expiration """
+
+		fields = [ "project", "identifier", "job", "status", "creation_date" ]
+		return self.run_provider.iterate_as_documents(database_client, project = job["project"], job = job["identifier"],
+			skip = skip, order_by = [ ("creation_date", "descending") ], fields = fields)
@@ -40,37 +40,23 @@ class ScheduleProvider:
 			schedule_identifier: str, project: str, display_name: str, job: str, parameters: dict, expression: str) -> dict:
 
 		now = self.date_time_provider.now()
-		schedule = self.get(database_client, project, schedule_identifier)
-
-		if schedule is None:
-			schedule = {
-				"project": project,
-				"identifier": schedule_identifier,
-				"display_name": display_name,
-				"job": job,
-				"parameters": parameters,
-				"expression": expression,
-				"is_enabled": False,
-				"last_run": None,
-				"creation_date": now,
-				"update_date": now,
-			}
-
-			database_client.insert_one(self.table, schedule)
-
-		else:
-			update_data = {
-				"display_name": display_name,
-				"job": job,
-				"parameters": parameters,
-				"expression": expression,
-				"update_date": now,
-			}
-
-			schedule.update(update_data)
-			database_client.update_one(self.table, { "project": project, "identifier": schedule_identifier }, update_data)
-
-		return schedule
+
+		update_data = {
+			"display_name": display_name,
+			"job": job,
+			"parameters": parameters,
+			"expression": expression,
+			"update_date": now,
+		}
+
+		insert_data = {
+			"is_enabled": False,
+			"last_run": None,
+			"creation_date": now,
+		}
+
+		database_client.upsert_one(self.table, { "project": project, "identifier": schedule_identifier }, update_data, insert_data)
+		return self.get(database_client, project, schedule_identifier)
 
 
 	def update_status(self, database_client: DatabaseClient,
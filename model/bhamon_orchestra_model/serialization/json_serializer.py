@@ -2,7 +2,8 @@ import datetime
 import json
 import os
 import re
-from typing import Any, Optional
+import textwrap
+from typing import Any, Iterable, Optional
 
 import dateutil.parser
 
@@ -33,6 +34,28 @@ class JsonSerializer(Serializer):
 		os.replace(path + ".tmp", path)
 
 
+	def serialize_collection_to_file(self, path: str, value_collection: Iterable[Any]) -> None:
+		""" Serialize a collection as a list, writing its items one at a time, with the same output as for a list """
+
+		if self.indent is None:
+			list_start, separator, list_end, prefix = "[", ", ", "]", ""
+		else:
+			list_start, separator, list_end = "[\n", ",\n", "\n]"
+			prefix = " " * self.indent if isinstance(self.indent, int) else self.indent
+
+		with open(path + ".tmp", mode = "w", encoding = "utf-8") as data_file:
+			is_empty = True
+
+			for value in value_collection:
+				data_file.write(list_start if is_empty else separator)
+				data_file.write(textwrap.indent(self.serialize_to_string(value), prefix, lambda line: True))
+				is_empty = False
+
+			data_file.write("[]" if is_empty else list_end)
+
+		os.replace(path + ".tmp", path)
+
+
 	def deserialize_from_file(self, path: str) -> Optional[Any]:
 		with open(path, mode = "r", encoding = "utf-8") as data_file:
 			return json.load(data_file, cls = JsonDecoder)
@@ -1,5 +1,5 @@
 import abc
-from typing import Any, Optional
+from typing import Any, Iterable, Optional
 
 
 class Serializer(abc.ABC):
@@ -20,6 +20,11 @@ class Serializer(abc.ABC):
 		pass
 
 
+	@abc.abstractmethod
+	def serialize_collection_to_file(self, path: str, value_collection: Iterable[Any]) -> None:
+		pass
+
+
 	@abc.abstractmethod
 	def deserialize_from_file(self, path: str) -> Optional[Any]:
 		pass
@@ -0,0 +1,107 @@
+import datetime
+import threading
+from typing import Any, Callable, Optional
+
+from bhamon_orchestra_model.date_time_provider import DateTimeProvider
+
+
+class TableCache:
+	""" Base class for in-process caches of values read from database tables, by key.
+
+	Keys are tuples whose first item is the table the value was read from. Entries are invalidated by table,
+	and expire after a short time since other processes can write to the same tables. Each table has a generation,
+	incremented when it is invalidated, so that a value read before a change does not replace the newer one.
+	The number of entries is limited, removing the expired ones first. The cache can be shared between threads.
+
+	"""
+
+
+	def __init__(self, date_time_provider: DateTimeProvider,
+			time_to_live: datetime.timedelta = datetime.timedelta(seconds = 10), entry_limit: int = 1000) -> None:
+		self.date_time_provider = date_time_provider
+		self.time_to_live = time_to_live
+		self.entry_limit = entry_limit
+
+		self._entries = {}
+		self._generations = {}
+		self._lock = threading.Lock()
+
+
+	def get(self, key: tuple) -> Optional[Any]:
+		""" Return the cached value for a key, if it did not expire """
+
+		with self._lock:
+			entry = self._entries.get(key, None)
+
+		if entry is None or entry[0] < self.date_time_provider.now():
+			return None
+		return self._copy_value(entry[1])
+
+
+	def set(self, key: tuple, value: Any, generation: Optional[int] = None) -> None:
+		""" Save the value for a key.
+
+		If a generation is provided, the value is saved only if the table was not invalidated since then,
+		so that a value read from the database before a change does not replace the newer one.
+
+		"""
+
+		entry = (self.date_time_provider.now() + self.time_to_live, self._copy_value(value))
+
+		with self._lock:
+			if generation is not None and generation != self._generations.get(key[0], 0):
+				return
+
+			if len(self._entries) >= self.entry_limit:
+				self._remove_expired_entries()
+			if len(self._entries) >= self.entry_limit:
+				self._entries.clear()
+
+			self._entries[key] = entry
+
+
+	def invalidate(self, table: str) -> None:
+		""" Remove the cached values for a table """
+
+		with self._lock:
+			self._generations[table] = self._generations.get(table, 0) + 1
+			for key in [ key for key in self._entries if key[0] == table ]:
+				self._entries.pop(key, None)
+
+
+	def clear(self) -> None:
+		""" Remove all cached values """
+
+		with self._lock:
+			for table in self._generations:
+				self._generations[table] += 1
+			self._entries.clear()
+
+
+	def _read_through(self, key: tuple, read_function: Callable[[], Any]) -> Any:
+		""" Return the cached value for a key, or read it from the database and save it, unless it is none """
+
+		value = self.get(key)
+		if value is None:
+			generation = self._get_generation(key[0])
+			value = read_function()
+			if value is not None:
+				self.set(key, value, generation)
+		return value
+
+
+	def _copy_value(self, value: Any) -> Any:
+		""" Copy a value saved to or returned from the cache, if callers could modify it """
+		return value
+
+
+	def _get_generation(self, table: str) -> int:
+		with self._lock:
+			return self._generations.setdefault(table, 0)
+
+
+	def _remove_expired_entries(self) -> None:
+		now = self.date_time_provider.now()
+		for key, entry in list(self._entries.items()):
+			if entry[0] < now:
+				self._entries.pop(key, None)
@@ -2,19 +2,22 @@ import logging
 
 from typing import List, Optional, Tuple
 
+from bhamon_orchestra_model import keyset_pagination
 from bhamon_orchestra_model.database.database_client import DatabaseClient
 from bhamon_orchestra_model.date_time_provider import DateTimeProvider
+from bhamon_orchestra_model.record_cache import RecordCache, RecordCacheMixin
 from bhamon_orchestra_model.run_provider import RunProvider
 
 
 logger = logging.getLogger("WorkerProvider")
 
 
-class WorkerProvider:
+class WorkerProvider(RecordCacheMixin):
 
 
-	def __init__(self, date_time_provider: DateTimeProvider) -> None:
+	def __init__(self, date_time_provider: DateTimeProvider, record_cache: Optional[RecordCache] = None) -> None:
 		self.date_time_provider = date_time_provider
+		self.record_cache = record_cache
 		self.table = "worker"
 
 
@@ -25,15 +28,22 @@ class WorkerProvider:
 
 
 	def get_list(self, database_client: DatabaseClient, # pylint: disable = too-many-arguments
-			owner: Optional[str] = None, skip: int = 0, limit: Optional[int] = None, order_by: Optional[List[Tuple[str,str]]] = None) -> List[dict]:
+			owner: Optional[str] = None, skip: int = 0, limit: Optional[int] = None,
+			order_by: Optional[List[Tuple[str,str]]] = None, continuation_token: Optional[str] = None) -> List[dict]:
 
 		filter = { "owner": owner } # pylint: disable = redefined-builtin
 		filter = { key: value for key, value in filter.items() if value is not None }
-		return database_client.find_many(self.table, filter, skip = skip, limit = limit, order_by = order_by)
+		order_by = keyset_pagination.complete_order_by(order_by, [ "identifier" ])
+		start_after = keyset_pagination.parse_continuation_token(continuation_token) if continuation_token is not None else None
+		return self._find_many(database_client, filter, skip = skip, limit = limit, order_by = order_by, start_after = start_after)
+
+
+	def create_continuation_token(self, worker: dict, order_by: List[Tuple[str,str]]) -> str:
+		return keyset_pagination.create_continuation_token(worker, keyset_pagination.complete_order_by(order_by, [ "identifier" ]))
 
 
 	def get(self, database_client: DatabaseClient, worker_identifier: str) -> Optional[dict]:
-		return database_client.find_one(self.table, { "identifier": worker_identifier })
+		return self._find_one(database_client, { "identifier": worker_identifier })
 
 
 	def create(self, database_client: DatabaseClient, # pylint: disable = too-many-arguments
@@ -55,6 +65,7 @@ class WorkerProvider:
 		}
 
 		database_client.insert_one(self.table, worker)
+		self._invalidate_records()
 		return worker
 
 
@@ -74,6 +85,7 @@ class WorkerProvider:
 
 		worker.update(update_data)
 		database_client.update_one(self.table, { "identifier": worker["identifier"] }, update_data)
+		self._invalidate_records()
 
 
 	def update_properties(self, database_client: DatabaseClient, # pylint: disable = too-many-arguments
@@ -92,6 +104,20 @@ class WorkerProvider:
 
 		worker.update(update_data)
 		database_client.update_one(self.table, { "identifier": worker["identifier"] }, update_data)
+		self._invalidate_records()
+
+
+	def deactivate_all(self, database_client: DatabaseClient) -> None:
+		now = self.date_time_provider.now()
+
+		update_data = {
+			"is_active": False,
+			"should_disconnect": False,
+			"update_date": now,
+		}
+
+		database_client.update_many(self.table, { "is_active": True }, update_data)
+		self._invalidate_records()
 
 
 	def delete(self, database_client: DatabaseClient, worker_identifier: str, run_provider: RunProvider) -> None:
@@ -110,3 +136,4 @@ class WorkerProvider:
 			raise ValueError("Worker '%s' has running runs" % worker_identifier)
 
 		database_client.delete_one(self.table, { "identifier": worker_identifier })
+		self._invalidate_records()
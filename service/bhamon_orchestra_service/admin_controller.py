@@ -1,9 +1,10 @@
 import logging
 import platform
-from typing import Any
+from typing import Any, Optional
 
 import flask
 
+from bhamon_orchestra_model.database.database_statistics import DatabaseStatistics
 from bhamon_orchestra_service.response_builder import ResponseBuilder
 
 
@@ -13,9 +14,10 @@ logger = logging.getLogger("AdminController")
 class AdminController:
 
 
-	def __init__(self, response_builder: ResponseBuilder, external_services: dict) -> None:
+	def __init__(self, response_builder: ResponseBuilder, external_services: dict, database_statistics: Optional[DatabaseStatistics] = None) -> None:
 		self._response_builder = response_builder
 		self._external_services = external_services
+		self._database_statistics = database_statistics
 
 
 	def information(self) -> Any:
@@ -52,3 +54,10 @@ class AdminController:
 
 		service_status = service.get_status()
 		return self._response_builder.create_data_response(service_status)
+
+
+	def get_database_statistics(self) -> Any:
+		if self._database_statistics is None:
+			flask.abort(404)
+
+		return self._response_builder.create_data_response(self._database_statistics.get_snapshot())
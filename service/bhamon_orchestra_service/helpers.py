@@ -1,3 +1,10 @@
+from typing import Callable, List, Optional
+
+import flask
+
+from bhamon_orchestra_model import keyset_pagination
+
+
 def get_error_message(status_code: int) -> str: # pylint: disable = too-many-return-statements
 	if status_code == 400:
 		return "Bad request"
@@ -20,3 +27,29 @@ def get_error_message(status_code: int) -> str: # pylint: disable = too-many-ret
 	if 500 <= status_code < 600:
 		return "Server error"
 	return "Unknown error"
+
+
+def get_continuation_token() -> Optional[str]:
+	""" Return the token to continue listing items after the previous page, it can only be used with an order-by expression """
+
+	continuation_token = flask.request.args.get("continuation_token", default = None)
+
+	if continuation_token is not None:
+		if len(flask.request.args.getlist("order_by")) == 0:
+			flask.abort(400)
+
+		try:
+			keyset_pagination.parse_continuation_token(continuation_token)
+		except ValueError:
+			flask.abort(400)
+
+	return continuation_token
+
+
+def get_continuation_headers(item_collection: List[dict], query_parameters: dict, token_factory: Callable[[dict,list],str]) -> dict:
+	""" Return the headers with the token to request the next page, if the collection is full and ordered """
+
+	if len(query_parameters["order_by"]) == 0 or query_parameters["limit"] == 0 or len(item_collection) < query_parameters["limit"]:
+		return {}
+
+	return { "X-Orchestra-ContinuationToken": token_factory(item_collection[-1], query_parameters["order_by"]) }
@@ -5,6 +5,7 @@ import flask
 
 from bhamon_orchestra_model.job_provider import JobProvider
 from bhamon_orchestra_model.run_provider import RunProvider
+from bhamon_orchestra_service import helpers as service_helpers
 from bhamon_orchestra_service.response_builder import ResponseBuilder
 
 
@@ -35,10 +36,12 @@ class JobController:
 			"skip": max(flask.request.args.get("skip", default = 0, type = int), 0),
 			"limit": max(min(flask.request.args.get("limit", default = 100, type = int), 1000), 0),
 			"order_by": [ tuple(x.split(" ")) for x in flask.request.args.getlist("order_by") ],
+			"continuation_token": service_helpers.get_continuation_token(),
 		}
 
 		job_collection = self._job_provider.get_list(flask.request.database_client(), **query_parameters)
-		return self._response_builder.create_data_response(job_collection)
+		continuation_headers = service_helpers.get_continuation_headers(job_collection, query_parameters, self._job_provider.create_continuation_token)
+		return self._response_builder.create_data_response(job_collection, headers = continuation_headers)
 
 
 	def get(self, project_identifier: str, job_identifier: str) -> Any:
@@ -54,10 +57,12 @@ class JobController:
 			"skip": max(flask.request.args.get("skip", default = 0, type = int), 0),
 			"limit": max(min(flask.request.args.get("limit", default = 100, type = int), 1000), 0),
 			"order_by": [ tuple(x.split(" ")) for x in flask.request.args.getlist("order_by") ],
+			"continuation_token": service_helpers.get_continuation_token(),
 		}
 
 		run_collection = self._run_provider.get_list(flask.request.database_client(), **query_parameters)
-		return self._response_builder.create_data_response(run_collection)
+		continuation_headers = service_helpers.get_continuation_headers(run_collection, query_parameters, self._run_provider.create_continuation_token)
+		return self._response_builder.create_data_response(run_collection, headers = continuation_headers)
 
 
 	def trigger(self, project_identifier: str, job_identifier: str) -> Any:
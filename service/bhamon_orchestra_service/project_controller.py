@@ -1,11 +1,13 @@
 import logging
-from typing import Any
+from typing import Any, Dict, List
 
 import flask
 import requests
 
+from bhamon_orchestra_model.database.database_client import DatabaseClient
 from bhamon_orchestra_model.project_provider import ProjectProvider
 from bhamon_orchestra_model.revision_control.github_client import GitHubClient
+from bhamon_orchestra_model.revision_status_provider import RevisionStatusProvider, compute_revision_status
 from bhamon_orchestra_model.run_provider import RunProvider
 from bhamon_orchestra_model.serialization.json_serializer import JsonSerializer
 from bhamon_orchestra_service.response_builder import ResponseBuilder
@@ -17,12 +19,13 @@ logger = logging.getLogger("ProjectController")
 class ProjectController:
 
 
-	def __init__(self, application: flask.Flask, response_builder: ResponseBuilder,
-			project_provider: ProjectProvider, run_provider: RunProvider) -> None:
+	def __init__(self, application: flask.Flask, response_builder: ResponseBuilder, # pylint: disable = too-many-arguments
+			project_provider: ProjectProvider, revision_status_provider: RevisionStatusProvider, run_provider: RunProvider) -> None:
 
 		self._application = application
 		self._response_builder = response_builder
 		self._project_provider = project_provider
+		self._revision_status_provider = revision_status_provider
 		self._run_provider = run_provider
 
 
@@ -111,8 +114,6 @@ class ProjectController:
 		repository = project["services"]["revision_control"]["repository"]
 		revision_control_client = self._create_revision_control_client(project["services"]["revision_control"])
 		revision = revision_control_client.get_revision(repository, reference)
-		revision_runs = []
-		revision_status = "unknown"
 
 		run_query_parameters = {
 			"project": project_identifier,
@@ -120,38 +121,21 @@ class ProjectController:
 			"order_by": [("update_date", "descending")],
 		}
 
-		run_collection = self._run_provider.get_list_as_documents(database_client, **run_query_parameters)
-
-		for run in run_collection:
-			revision_identifier = None
-
-			if revision_identifier is None and run["results"] is not None:
-				revision_identifier = run["results"].get("revision_control", {}).get("revision", None)
+		unresolved_runs = self._resolve_active_runs(database_client, revision_control_client, project_identifier, repository)
+		revision_status = self._get_revision_status(database_client, project_identifier, revision["identifier"], unresolved_runs)
 
-			if revision_identifier is None and run["status"] in [ "pending", "running" ]:
-				try:
-					revision_identifier = revision_control_client.get_revision(repository, run["parameters"]["revision"])["identifier"]
-				except requests.HTTPError:
-					logger.warning("Failed to resolve project '%s' revision '%s'", project_identifier, run["parameters"]["revision"], exc_info = True)
-
-			if revision_identifier == revision["identifier"]:
-				revision_runs.append(run)
-
-		if len(revision_runs) == 0:
-			revision_status = "unknown"
-		elif any(run["status"] in [ "failed", "aborted", "exception" ] for run in revision_runs):
-			revision_status = "failed"
-		elif any(run["status"] in [ "pending", "running" ] for run in revision_runs):
-			revision_status = "pending"
-		elif all(run["status"] in [ "succeeded" ] for run in revision_runs):
-			revision_status = "succeeded"
+		revision_runs = []
+		if revision_status["has_runs"]:
+			revision_runs = list(self._run_provider.iterate_as_documents(database_client, revision = revision["identifier"], **run_query_parameters))
+			revision_runs = self._merge_runs(revision_runs, unresolved_runs.get(revision["identifier"], []))
 
 		response_data = {
 			"reference": reference,
 			"identifier": revision["identifier"],
 			"identifier_short": revision["identifier_short"],
 			"runs": revision_runs,
-			"status": revision_status,
+			"status": revision_status["status"],
+			"status_counts": revision_status["status_counts"],
 		}
 
 		return self._response_builder.create_data_response(response_data)
@@ -176,29 +160,70 @@ class ProjectController:
 		}
 
 		revision_collection = revision_control_client.get_revision_list(**revision_query_parameters)
-		run_collection = self._run_provider.get_list_as_documents(database_client, **run_query_parameters)
+		unresolved_runs = self._resolve_active_runs(database_client, revision_control_client, project_identifier, repository)
 
-		revision_dictionary = { revision["identifier"]: revision for revision in revision_collection }
 		for revision in revision_collection:
+			revision_status = self._get_revision_status(database_client, project_identifier, revision["identifier"], unresolved_runs)
+			revision["status"] = revision_status["status"]
+			revision["status_counts"] = revision_status["status_counts"]
 			revision["runs"] = []
 
-		for run in run_collection:
-			revision_identifier = None
+			if revision_status["has_runs"]:
+				revision_runs = list(self._run_provider.iterate_as_documents(database_client, revision = revision["identifier"], **run_query_parameters))
+				revision["runs"] = self._merge_runs(revision_runs, unresolved_runs.get(revision["identifier"], []))
 
-			if revision_identifier is None and run["results"] is not None:
-				revision_identifier = run["results"].get("revision_control", {}).get("revision", None)
+		return self._response_builder.create_data_response(revision_collection)
 
-			if revision_identifier is None and run["status"] in [ "pending", "running" ]:
-				try:
-					revision_identifier = revision_control_client.get_revision(repository, run["parameters"]["revision"])["identifier"]
-				except requests.HTTPError:
-					logger.warning("Failed to resolve project '%s' revision '%s'", project_identifier, run["parameters"]["revision"], exc_info = True)
 
-			revision = revision_dictionary.get(revision_identifier)
-			if revision is not None:
-				revision["runs"].append(run)
+	def _get_revision_status(self, database_client: DatabaseClient,
+			project_identifier: str, revision_identifier: str, unresolved_runs: Dict[str,List[dict]]) -> dict:
 
-		return self._response_builder.create_data_response(revision_collection)
+		""" Return the status for a revision from the maintained revision status, including the active runs which did not report their revision yet """
+
+		revision_status = self._revision_status_provider.get(database_client, project_identifier, revision_identifier)
+		status_counts = dict(revision_status["status_counts"]) if revision_status is not None else {}
+
+		for run in unresolved_runs.get(revision_identifier, []):
+			status_counts[run["status"]] = status_counts.get(run["status"], 0) + 1
+
+		return {
+			"status": compute_revision_status(status_counts),
+			"status_counts": status_counts,
+			"has_runs": len(status_counts) > 0,
+		}
+
+
+	def _resolve_active_runs(self, database_client: DatabaseClient,
+			revision_control_client: GitHubClient, project_identifier: str, repository: str) -> Dict[str,List[dict]]:
+
+		""" Return the active runs which did not report their revision yet, by the revision resolved from their parameters """
+
+		resolved_revisions = {}
+		unresolved_runs = {}
+
+		for status in [ "pending", "running" ]:
+			for run in self._run_provider.iterate_as_documents(database_client, project = project_identifier, status = status):
+				if run.get("revision", None) is not None or "revision" not in run["parameters"]:
+					continue
+
+				reference = run["parameters"]["revision"]
+				if reference not in resolved_revisions:
+					try:
+						resolved_revisions[reference] = revision_control_client.get_revision(repository, reference)["identifier"]
+					except requests.HTTPError:
+						logger.warning("Failed to resolve project '%s' revision '%s'", project_identifier, reference, exc_info = True)
+						resolved_revisions[reference] = None
+
+				if resolved_revisions[reference] is not None:
+					unresolved_runs.setdefault(resolved_revisions[reference], []).append(run)
+
+		return unresolved_runs
+
+
+	def _merge_runs(self, revision_runs: List[dict], unresolved_runs: List[dict]) -> List[dict]:
+		if len(unresolved_runs) == 0:
+			return revision_runs
+		return sorted(revision_runs + unresolved_runs, key = lambda run: run["update_date"], reverse = True)
 
 
 	def _create_revision_control_client(self, service: str) -> GitHubClient:
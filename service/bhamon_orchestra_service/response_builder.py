@@ -18,9 +18,9 @@ class ResponseBuilder:
 		return self._application.response_class("", status = 204)
 
 
-	def create_data_response(self, data: Optional[Any], status_code = 200) -> Any:
+	def create_data_response(self, data: Optional[Any], status_code = 200, headers: Optional[dict] = None) -> Any:
 		serialized_data = self._serializer.serialize_to_string(data)
-		return self._application.response_class(serialized_data, status = status_code, mimetype = self._serializer.get_content_type())
+		return self._application.response_class(serialized_data, status = status_code, headers = headers, mimetype = self._serializer.get_content_type())
 
 
 	def create_error_response(self, status_code: int) -> Any:
@@ -5,6 +5,7 @@ import flask
 
 from bhamon_orchestra_model.run_provider import RunProvider
 from bhamon_orchestra_model.serialization.serializer import Serializer
+from bhamon_orchestra_service import helpers as service_helpers
 from bhamon_orchestra_service.response_builder import ResponseBuilder
 
 
@@ -42,11 +43,13 @@ class RunController:
 			"skip": max(flask.request.args.get("skip", default = 0, type = int), 0),
 			"limit": max(min(flask.request.args.get("limit", default = 100, type = int), 1000), 0),
 			"order_by": [ tuple(x.split(" ")) for x in flask.request.args.getlist("order_by") ],
+			"continuation_token": service_helpers.get_continuation_token(),
 		}
 
 		database_client = flask.request.database_client()
 		run_collection = self._run_provider.get_list(database_client, **query_parameters)
-		return self._response_builder.create_data_response(run_collection)
+		continuation_headers = service_helpers.get_continuation_headers(run_collection, query_parameters, self._run_provider.create_continuation_token)
+		return self._response_builder.create_data_response(run_collection, headers = continuation_headers)
 
 
 	def get(self, project_identifier: str, run_identifier: str) -> Any:
@@ -6,11 +6,15 @@ import flask
 import werkzeug.exceptions
 
 import bhamon_orchestra_service
+from bhamon_orchestra_model.count_cache import CountCache
 from bhamon_orchestra_model.database.database_client import DatabaseClient
+from bhamon_orchestra_model.database.database_statistics import DatabaseStatistics
 from bhamon_orchestra_model.database.file_data_storage import FileDataStorage
+from bhamon_orchestra_model.database.instrumented_database_client import InstrumentedDatabaseClient
 from bhamon_orchestra_model.date_time_provider import DateTimeProvider
 from bhamon_orchestra_model.job_provider import JobProvider
 from bhamon_orchestra_model.project_provider import ProjectProvider
+from bhamon_orchestra_model.revision_status_provider import RevisionStatusProvider
 from bhamon_orchestra_model.run_provider import RunProvider
 from bhamon_orchestra_model.schedule_provider import ScheduleProvider
 from bhamon_orchestra_model.serialization.json_serializer import JsonSerializer
@@ -33,11 +37,15 @@ from bhamon_orchestra_service.worker_controller import WorkerController
 logger = logging.getLogger("ServiceSetup")
 
 
-def create_application( # pylint: disable = too-many-locals
-		flask_import_name: str, database_client_factory: Callable[[], DatabaseClient], file_storage_path: str, external_services: dict) -> Service:
+def create_application( # pylint: disable = too-many-arguments, too-many-locals
+		flask_import_name: str, database_client_factory: Callable[[], DatabaseClient], file_storage_path: str, external_services: dict,
+		database_statistics: Optional[DatabaseStatistics] = None) -> Service:
 
 	application = flask.Flask(flask_import_name)
 
+	if database_statistics is not None:
+		database_client_factory = InstrumentedDatabaseClient.wrap_factory(database_client_factory, database_statistics)
+
 	data_storage = FileDataStorage(file_storage_path)
 	date_time_provider = DateTimeProvider()
 	serializer = JsonSerializer()
@@ -47,7 +55,8 @@ def create_application( # pylint: disable = too-many-locals
 	authorization_provider = AuthorizationProvider()
 	job_provider = JobProvider(date_time_provider)
 	project_provider = ProjectProvider(date_time_provider)
-	run_provider = RunProvider(data_storage, date_time_provider)
+	revision_status_provider = RevisionStatusProvider(date_time_provider)
+	run_provider = RunProvider(data_storage, date_time_provider, CountCache(date_time_provider), revision_status_provider)
 	schedule_provider = ScheduleProvider(date_time_provider)
 	user_provider = UserProvider(date_time_provider)
 	worker_provider = WorkerProvider(date_time_provider)
@@ -64,9 +73,10 @@ def create_application( # pylint: disable = too-many-locals
 	configure(application)
 	register_handlers(application, service)
 	register_root_routes(application, service)
-	register_admin_controllers_and_routes(application, response_builder, external_services)
+	register_admin_controllers_and_routes(application, response_builder, external_services, database_statistics)
 	register_user_controllers_and_routes(application, response_builder, authentication_provider, user_provider)
-	register_project_controllers_and_routes(application, response_builder, job_provider, run_provider, project_provider, schedule_provider)
+	register_project_controllers_and_routes(application, response_builder,
+		job_provider, run_provider, project_provider, revision_status_provider, schedule_provider)
 	register_worker_controllers_and_routes(application, response_builder, job_provider, run_provider, worker_provider)
 
 	return service
@@ -99,14 +109,15 @@ def register_root_routes(application: flask.Flask, service: Service) -> None:
 
 
 def register_admin_controllers_and_routes(
-		application: flask.Flask, response_builder: ResponseBuilder, external_services: dict) -> None:
+		application: flask.Flask, response_builder: ResponseBuilder, external_services: dict, database_statistics: Optional[DatabaseStatistics]) -> None:
 
-	admin_controller = AdminController(response_builder, external_services)
+	admin_controller = AdminController(response_builder, external_services, database_statistics)
 
 	add_url_rule(application, "/admin/information", [ "GET" ], admin_controller.information)
 	add_url_rule(application, "/admin/service_collection", [ "GET" ], admin_controller.get_service_collection)
 	add_url_rule(application, "/admin/service/<service_identifier>", [ "GET" ], admin_controller.get_service)
 	add_url_rule(application, "/admin/service/<service_identifier>/status", [ "GET" ], admin_controller.get_service_status)
+	add_url_rule(application, "/admin/database_statistics", [ "GET" ], admin_controller.get_database_statistics)
 
 
 def register_user_controllers_and_routes(
@@ -143,12 +154,13 @@ def register_user_controllers_and_routes(
 
 def register_project_controllers_and_routes( # pylint: disable = too-many-arguments
 		application: flask.Flask, response_builder: ResponseBuilder,
-		job_provider: JobProvider, run_provider: RunProvider, project_provider: ProjectProvider, schedule_provider: ScheduleProvider) -> None:
+		job_provider: JobProvider, run_provider: RunProvider, project_provider: ProjectProvider,
+		revision_status_provider: RevisionStatusProvider, schedule_provider: ScheduleProvider) -> None:
 
 	run_controller_serializer = JsonSerializer(indent = 4)
 
 	job_controller = JobController(response_builder, job_provider, run_provider)
-	project_controller = ProjectController(application, response_builder, project_provider, run_provider)
+	project_controller = ProjectController(application, response_builder, project_provider, revision_status_provider, run_provider)
 	run_controller = RunController(response_builder, run_controller_serializer, run_provider)
 	schedule_controller = ScheduleController(response_builder, schedule_provider)
 
@@ -6,6 +6,7 @@ import flask
 from bhamon_orchestra_model.job_provider import JobProvider
 from bhamon_orchestra_model.run_provider import RunProvider
 from bhamon_orchestra_model.worker_provider import WorkerProvider
+from bhamon_orchestra_service import helpers as service_helpers
 from bhamon_orchestra_service.response_builder import ResponseBuilder
 
 
@@ -35,11 +36,13 @@ class WorkerController:
 			"skip": max(flask.request.args.get("skip", default = 0, type = int), 0),
 			"limit": max(min(flask.request.args.get("limit", default = 100, type = int), 1000), 0),
 			"order_by": [ tuple(x.split(" ")) for x in flask.request.args.getlist("order_by") ],
+			"continuation_token": service_helpers.get_continuation_token(),
 		}
 
 		database_client = flask.request.database_client()
 		worker_collection = self._worker_provider.get_list(database_client, **query_parameters)
-		return self._response_builder.create_data_response(worker_collection)
+		continuation_headers = service_helpers.get_continuation_headers(worker_collection, query_parameters, self._worker_provider.create_continuation_token)
+		return self._response_builder.create_data_response(worker_collection, headers = continuation_headers)
 
 
 	def get(self, worker_identifier: str) -> Any:
@@ -53,11 +56,13 @@ class WorkerController:
 			"skip": max(flask.request.args.get("skip", default = 0, type = int), 0),
 			"limit": max(min(flask.request.args.get("limit", default = 100, type = int), 1000), 0),
 			"order_by": [ tuple(x.split(" ")) for x in flask.request.args.getlist("order_by") ],
+			"continuation_token": service_helpers.get_continuation_token(),
 		}
 
 		database_client = flask.request.database_client()
 		job_collection = self._job_provider.get_list(database_client, **query_parameters)
-		return self._response_builder.create_data_response(job_collection)
+		continuation_headers = service_helpers.get_continuation_headers(job_collection, query_parameters, self._job_provider.create_continuation_token)
+		return self._response_builder.create_data_response(job_collection, headers = continuation_headers)
 
 
 	def get_run_count(self, worker_identifier: str) -> Any:
@@ -80,11 +85,13 @@ class WorkerController:
 			"skip": max(flask.request.args.get("skip", default = 0, type = int), 0),
 			"limit": max(min(flask.request.args.get("limit", default = 100, type = int), 1000), 0),
 			"order_by": [ tuple(x.split(" ")) for x in flask.request.args.getlist("order_by") ],
+			"continuation_token": service_helpers.get_continuation_token(),
 		}
 
 		database_client = flask.request.database_client()
 		run_collection = self._run_provider.get_list(database_client, **query_parameters)
-		return self._response_builder.create_data_response(run_collection)
+		continuation_headers = service_helpers.get_continuation_headers(run_collection, query_parameters, self._run_provider.create_continuation_token)
+		return self._response_builder.create_data_response(run_collection, headers = continuation_headers)
 
 
 	def disconnect(self, worker_identifier: str) -> Any:
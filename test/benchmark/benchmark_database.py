@@ -0,0 +1,128 @@
+import contextlib
+import logging
+import os
+from typing import Callable, Iterator, Optional
+
+import sqlalchemy
+import sqlalchemy.pool
+
+from bhamon_orchestra_model.database import sql_database_model
+from bhamon_orchestra_model.database.database_client import DatabaseClient
+from bhamon_orchestra_model.database.json_database_administration import JsonDatabaseAdministration
+from bhamon_orchestra_model.database.json_database_client import JsonDatabaseClient
+from bhamon_orchestra_model.database.memory_database_client import MemoryDatabaseClient
+from bhamon_orchestra_model.database.sql_database_client_factory import SqlDatabaseClientFactory
+from bhamon_orchestra_model.serialization.json_serializer import JsonSerializer
+
+
+logger = logging.getLogger("Benchmark")
+
+all_database_types = [ "memory", "json", "sqlite", "mongo", "postgresql" ]
+default_mongo_uri = "mongodb://localhost:27017/orchestra_benchmark"
+
+
+def check_database_availability(database_type: str, database_uri: Optional[str] = None) -> Optional[str]:
+	""" Check if a database can be used for benchmarks, and return the reason if it cannot """
+
+	if database_type == "mongo":
+		return check_mongo_availability(database_uri or default_mongo_uri)
+	if database_type == "postgresql":
+		return check_postgresql_availability(database_uri)
+	return None
+
+
+def check_mongo_availability(database_uri: str) -> Optional[str]:
+	try:
+		import pymongo # pylint: disable = import-outside-toplevel
+	except ImportError:
+		return "pymongo is not installed"
+
+	try:
+		with pymongo.MongoClient(database_uri, serverSelectionTimeoutMS = 1000) as mongo_client:
+			mongo_client.server_info()
+	except pymongo.errors.PyMongoError as exception:
+		return "MongoDB is not available (%s)" % type(exception).__name__
+
+	return None
+
+
+def check_postgresql_availability(database_uri: Optional[str]) -> Optional[str]:
+	if database_uri is None:
+		return "No PostgreSQL database uri was provided"
+
+	# The database is used as is and its tables are dropped, so it must be a throwaway database, checked to be empty beforehand
+
+	try:
+		engine = sqlalchemy.create_engine(database_uri, poolclass = sqlalchemy.pool.NullPool)
+	except ImportError:
+		return "PostgreSQL driver is not installed"
+
+	try:
+		if len(sqlalchemy.inspect(engine).get_table_names()) > 0:
+			return "PostgreSQL database is not empty, an empty throwaway database is required"
+	except sqlalchemy.exc.SQLAlchemyError as exception:
+		return "PostgreSQL is not available (%s)" % type(exception).__name__
+	finally:
+		engine.dispose()
+
+	return None
+
+
+@contextlib.contextmanager
+def open_database(database_type: str, temporary_directory: str, suffix: str, database_uri: Optional[str] = None) -> Iterator[Callable[[],DatabaseClient]]:
+	""" Create an empty database for benchmarks, with its indexes, and yield a client factory for it """
+
+	if database_type == "memory":
+		database_client = MemoryDatabaseClient()
+		yield lambda: database_client
+
+	elif database_type == "json":
+		serializer = JsonSerializer()
+		data_directory = os.path.join(temporary_directory, "json_" + suffix)
+		with JsonDatabaseAdministration(serializer, data_directory) as database_administration:
+			database_administration.initialize()
+		yield lambda: JsonDatabaseClient(serializer, data_directory)
+
+	elif database_type == "sqlite":
+		database_path = os.path.join(temporary_directory, "database_" + suffix + ".sqlite")
+		database_client_factory = SqlDatabaseClientFactory("sqlite:///" + database_path, sql_database_model.metadata)
+		with database_client_factory.create_administration() as database_administration:
+			database_administration.initialize()
+
+		try:
+			yield database_client_factory
+		finally:
+			database_client_factory.dispose()
+
+	elif database_type == "postgresql":
+		# The throwaway database is reused for each suffix, since it is emptied after each run
+		database_client_factory = SqlDatabaseClientFactory(database_uri, sql_database_model.metadata)
+		with database_client_factory.create_administration() as database_administration:
+			database_administration.initialize()
+
+		try:
+			yield database_client_factory
+		finally:
+			sql_database_model.metadata.drop_all(database_client_factory.engine)
+			database_client_factory.dispose()
+
+	elif database_type == "mongo":
+		import pymongo # pylint: disable = import-outside-toplevel
+		from bhamon_orchestra_model.database.mongo_database_administration import MongoDatabaseAdministration # pylint: disable = import-outside-toplevel
+		from bhamon_orchestra_model.database.mongo_database_client import MongoDatabaseClient # pylint: disable = import-outside-toplevel
+
+		database_uri = (database_uri or default_mongo_uri) + "_" + suffix
+
+		with pymongo.MongoClient(database_uri) as mongo_client:
+			mongo_client.drop_database(mongo_client.get_database())
+		with MongoDatabaseAdministration(pymongo.MongoClient(database_uri)) as database_administration:
+			database_administration.initialize()
+
+		try:
+			yield lambda: MongoDatabaseClient(pymongo.MongoClient(database_uri))
+		finally:
+			with pymongo.MongoClient(database_uri) as mongo_client:
+				mongo_client.drop_database(mongo_client.get_database())
+
+	else:
+		raise ValueError("Unsupported database type '%s'" % database_type)
@@ -0,0 +1,149 @@
+import datetime
+import random
+import uuid
+
+from bhamon_orchestra_model.revision_status_provider import compute_revision_status
+
+
+def generate_dataset( # pylint: disable = too-many-arguments, too-many-locals
+		run_count: int, pending_run_count: int, running_run_count: int,
+		project_count: int = 5, job_count: int = 10, worker_count: int = 10, seed: int = 0) -> dict:
+
+	""" Generate a dataset with projects, jobs, schedules, workers and runs, resembling a long-lived instance """
+
+	generator = random.Random(seed)
+	now = datetime.datetime.now(datetime.timezone.utc).replace(microsecond = 0)
+	creation_date = now - datetime.timedelta(days = 365)
+
+	all_projects = [ "project_%s" % project_index for project_index in range(project_count) ]
+	all_workers = [ "worker_%s" % worker_index for worker_index in range(worker_count) ]
+	all_revisions = { project: [ "%040x" % generator.getrandbits(160) for revision_index in range(100) ] for project in all_projects }
+
+	dataset = {
+		"user": [
+			{
+				"identifier": "benchmark_user",
+				"display_name": "Benchmark User",
+				"roles": [ "Administrator" ],
+				"is_enabled": True,
+				"creation_date": creation_date,
+				"update_date": creation_date,
+			},
+		],
+
+		"user_authentication": [],
+	}
+
+	dataset["project"] = [
+		{
+			"identifier": project,
+			"display_name": project.replace("_", " ").title(),
+			"services": { "revision_control": { "type": "github", "repository": "owner/" + project } },
+			"creation_date": creation_date,
+			"update_date": creation_date,
+		}
+		for project in all_projects
+	]
+
+	dataset["job"] = [
+		{
+			"project": project,
+			"identifier": "job_%s" % job_index,
+			"display_name": "Job %s" % job_index,
+			"description": "Job generated for benchmarks",
+			"definition": { "commands": [ [ "{environment[python3_executable]}", "-c", "print('Step %s')" % step_index ] for step_index in range(5) ] },
+			"parameters": [ { "key": "revision", "description": "Revision for the source repository" } ],
+			"properties": { "is_controller": False, "operating_system": [ "linux" ] },
+			"is_enabled": True,
+			"creation_date": creation_date,
+			"update_date": creation_date,
+		}
+		for project in all_projects for job_index in range(job_count)
+	]
+
+	dataset["schedule"] = [
+		{
+			"project": project,
+			"identifier": "schedule_%s" % job_index,
+			"display_name": "Schedule %s" % job_index,
+			"job": "job_%s" % job_index,
+			"parameters": { "revision": "main" },
+			"expression": "0 0 * * *",
+			"is_enabled": job_index % 2 == 0,
+			"last_run": None,
+			"creation_date": creation_date,
+			"update_date": creation_date,
+		}
+		for project in all_projects for job_index in range(job_count)
+	]
+
+	dataset["worker"] = [
+		{
+			"identifier": worker,
+			"owner": "benchmark_user",
+			"version": "0.0.0",
+			"display_name": worker.replace("_", " ").title(),
+			"properties": { "is_controller": False, "operating_system": "linux", "executor_limit": 1 },
+			"is_enabled": True,
+			"is_active": True,
+			"should_disconnect": False,
+			"creation_date": creation_date,
+			"update_date": creation_date,
+		}
+		for worker in all_workers
+	]
+
+	dataset["run"] = []
+
+	for run_index in range(run_count):
+		project = all_projects[run_index % project_count]
+		revision = generator.choice(all_revisions[project])
+		run_creation_date = creation_date + datetime.timedelta(seconds = (run_index * 365 * 24 * 3600) // max(run_count, 1))
+
+		if run_index >= run_count - pending_run_count:
+			status, worker, results = "pending", None, None
+		elif run_index >= run_count - pending_run_count - running_run_count:
+			status, worker, results = "running", generator.choice(all_workers), None
+		else:
+			status = generator.choices([ "succeeded", "failed", "exception", "aborted", "cancelled" ], [ 80, 12, 3, 3, 2 ])[0]
+			worker = generator.choice(all_workers) if status != "cancelled" else None
+			results = { "revision_control": { "revision": revision, "branch": "main" }, "artifacts": [ "package_%s.zip" % run_index ] }
+
+		dataset["run"].append({
+			"identifier": str(uuid.UUID(int = generator.getrandbits(128))),
+			"project": project,
+			"job": "job_%s" % generator.randrange(job_count),
+			"parameters": { "revision": revision },
+			"source": { "type": "schedule", "identifier": "schedule_0" },
+			"worker": worker,
+			"status": status,
+			"start_date": run_creation_date if status not in [ "pending", "cancelled" ] else None,
+			"completion_date": run_creation_date + datetime.timedelta(minutes = 5) if status not in [ "pending", "running", "cancelled" ] else None,
+			"results": results,
+			"revision": revision if results is not None else None,
+			"should_cancel": False,
+			"should_abort": False,
+			"creation_date": run_creation_date,
+			"update_date": run_creation_date + datetime.timedelta(minutes = 5),
+		})
+
+	all_status_counts = {}
+
+	for run in dataset["run"]:
+		if run["revision"] is not None:
+			status_counts = all_status_counts.setdefault((run["project"], run["revision"]), {})
+			status_counts[run["status"]] = status_counts.get(run["status"], 0) + 1
+
+	dataset["revision_status"] = [
+		{
+			"project": project,
+			"revision": revision,
+			"status_counts": status_counts,
+			"status": compute_revision_status(status_counts),
+			"creation_date": now,
+			"update_date": now,
+		}
+		for (project, revision), status_counts in all_status_counts.items()
+	]
+
+	return dataset
@@ -0,0 +1,324 @@
+""" Benchmark for database clients, replaying the operations performed by the master and the service.
+
+Run it from the repository root, with the components on the python path, for example:
+
+	python -m test.benchmark.database_benchmark --database memory sqlite --output benchmark_results.json
+
+"""
+
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, List, Optional
+
+import bhamon_orchestra_model
+import bhamon_orchestra_model.database.import_export as database_import_export
+from bhamon_orchestra_model.database.database_client import DatabaseClient
+from bhamon_orchestra_model.database.memory_data_storage import MemoryDataStorage
+from bhamon_orchestra_model.date_time_provider import DateTimeProvider
+from bhamon_orchestra_model.job_provider import JobProvider
+from bhamon_orchestra_model.revision_status_provider import RevisionStatusProvider
+from bhamon_orchestra_model.run_provider import RunProvider
+from bhamon_orchestra_model.schedule_provider import ScheduleProvider
+from bhamon_orchestra_model.serialization.json_serializer import JsonSerializer
+
+from . import benchmark_database
+from . import benchmark_dataset
+
+
+logger = logging.getLogger("Benchmark")
+
+all_workloads = [ "scheduler_tick", "run_listing", "project_status_scan", "status_update_storm", "export", "import" ]
+
+default_parameters = {
+	"run_count": 5000,
+	"pending_run_count": 100,
+	"running_run_count": 20,
+	"iterations": 20,
+	"page_size": 20,
+	"page_count": 50,
+	"update_count": 500,
+	"seed": 0,
+}
+
+
+def main() -> None:
+	arguments = parse_arguments()
+	logging.basicConfig(level = logging.INFO, format = "{asctime} [{levelname}][{name}] {message}", style = "{")
+
+	parameters = { key: getattr(arguments, key) for key in default_parameters }
+	all_databases = arguments.database or [ "memory", "json", "sqlite", "mongo" ]
+	all_database_uris = { "mongo": arguments.mongo_uri, "postgresql": arguments.postgresql_uri }
+
+	with tempfile.TemporaryDirectory(prefix = "orchestra_benchmark_") as temporary_directory:
+		report = run_benchmarks(all_databases, arguments.workload or all_workloads, parameters, temporary_directory, all_database_uris)
+
+	report["label"] = arguments.label
+
+	if arguments.output is None:
+		json.dump(report, sys.stdout, indent = 4)
+		sys.stdout.write("\n")
+	else:
+		with open(arguments.output, mode = "w", encoding = "utf-8") as output_file:
+			json.dump(report, output_file, indent = 4)
+			output_file.write("\n")
+
+
+def parse_arguments() -> argparse.Namespace:
+	argument_parser = argparse.ArgumentParser(description = "Benchmark database clients with the workloads from the master and the service")
+	argument_parser.add_argument("--database", nargs = "+", choices = benchmark_database.all_database_types,
+		help = "set the databases to benchmark (default: memory, json, sqlite and mongo if available)")
+	argument_parser.add_argument("--workload", nargs = "+", choices = all_workloads, help = "set the workloads to run (default: all)")
+	argument_parser.add_argument("--mongo-uri", help = "set the MongoDB uri, a database with a suffix is created and dropped for each run")
+	argument_parser.add_argument("--postgresql-uri",
+		help = "set the PostgreSQL uri, to an empty throwaway database which is used as is, its tables being created and dropped for each run")
+	argument_parser.add_argument("--label", help = "set a label to identify the results, for example a version or a revision")
+	argument_parser.add_argument("--output", metavar = "<path>", help = "set the file path where to save the results as JSON (default: standard output)")
+
+	for key, value in default_parameters.items():
+		argument_parser.add_argument("--" + key.replace("_", "-"), type = int, default = value, metavar = "<count>", help = "set the %s" % key.replace("_", " "))
+
+	return argument_parser.parse_args()
+
+
+def run_benchmarks(all_databases: List[str], all_selected_workloads: List[str], # pylint: disable = too-many-arguments
+		parameters: dict, temporary_directory: str, all_database_uris: Optional[dict] = None) -> dict:
+
+	""" Run workloads for each database and return a report with their timings """
+
+	all_database_uris = all_database_uris or {}
+	dataset = benchmark_dataset.generate_dataset(
+		parameters["run_count"], parameters["pending_run_count"], parameters["running_run_count"], seed = parameters["seed"])
+
+	report = {
+		"version": bhamon_orchestra_model.__version__,
+		"date": datetime.datetime.now(datetime.timezone.utc).replace(microsecond = 0).isoformat(),
+		"python": platform.python_version(),
+		"platform": platform.platform(),
+		"parameters": parameters,
+		"results": [],
+		"skipped": [],
+	}
+
+	for database_type in all_databases:
+		skip_reason = benchmark_database.check_database_availability(database_type, all_database_uris.get(database_type))
+		if skip_reason is not None:
+			logger.warning("Skipping database '%s': %s", database_type, skip_reason)
+			report["skipped"].append({ "database": database_type, "reason": skip_reason })
+			continue
+
+		database_uri = all_database_uris.get(database_type)
+		report["results"] += run_database_benchmarks(database_type, all_selected_workloads, dataset, parameters, temporary_directory, database_uri)
+
+	return report
+
+
+def run_database_benchmarks(database_type: str, all_selected_workloads: List[str], # pylint: disable = too-many-arguments
+		dataset: dict, parameters: dict, temporary_directory: str, database_uri: Optional[str]) -> List[dict]:
+
+	all_results = []
+	export_directory = os.path.join(temporary_directory, "export_" + database_type)
+
+	with benchmark_database.open_database(database_type, temporary_directory, "source", database_uri) as database_client_factory:
+		logger.info("Importing dataset into database '%s'", database_type)
+		insert_dataset(database_client_factory, dataset)
+
+		context = create_context(database_client_factory, parameters)
+
+		for workload in all_selected_workloads:
+			if workload == "import":
+				continue
+
+			logger.info("Running workload '%s' on database '%s'", workload, database_type)
+			workload_function = globals()["run_" + workload]
+			durations = workload_function(context, export_directory) if workload == "export" else workload_function(context)
+			all_results.append(summarize(database_type, workload, durations))
+
+	if "import" in all_selected_workloads:
+		if not os.path.exists(export_directory):
+			with benchmark_database.open_database("memory", temporary_directory, "import") as database_client_factory:
+				insert_dataset(database_client_factory, dataset)
+				database_import_export.export_database(database_client_factory, JsonSerializer(), export_directory)
+
+		logger.info("Running workload 'import' on database '%s'", database_type)
+		with benchmark_database.open_database(database_type, temporary_directory, "target", database_uri) as database_client_factory:
+			context = create_context(database_client_factory, parameters)
+			all_results.append(summarize(database_type, "import", run_import(context, export_directory)))
+
+	return all_results
+
+
+def insert_dataset(database_client_factory: Callable[[],DatabaseClient], dataset: dict) -> None:
+	with database_client_factory() as database_client:
+		for table, rows in dataset.items():
+			if len(rows) > 0:
+				database_client.insert_many(table, rows)
+
+
+def create_context(database_client_factory: Callable[[],DatabaseClient], parameters: dict) -> dict:
+	date_time_provider = DateTimeProvider()
+
+	return {
+		"database_client_factory": database_client_factory,
+		"job_provider": JobProvider(date_time_provider),
+		"run_provider": RunProvider(MemoryDataStorage(), date_time_provider, revision_status_provider = RevisionStatusProvider(date_time_provider)),
+		"schedule_provider": ScheduleProvider(date_time_provider),
+		"parameters": parameters,
+		"random": random.Random(parameters["seed"]),
+	}
+
+
+def summarize(database_type: str, workload: str, durations: List[float]) -> dict:
+	sorted_durations = sorted(durations)
+
+	return {
+		"database": database_type,
+		"workload": workload,
+		"iterations": len(durations),
+		"total_seconds": sum(durations),
+		"mean_seconds": statistics.mean(durations),
+		"median_seconds": statistics.median(durations),
+		"p95_seconds": sorted_durations[min(int(len(sorted_durations) * 0.95), len(sorted_durations) - 1)],
+		"min_seconds": sorted_durations[0],
+		"max_seconds": sorted_durations[-1],
+	}
+
+
+def run_scheduler_tick(context: dict) -> List[float]:
+	""" Replay the database operations from a job scheduler update, without triggering runs """
+
+	job_provider = context["job_provider"]
+	run_provider = context["run_provider"]
+	schedule_provider = context["schedule_provider"]
+	durations = []
+
+	for _ in range(context["parameters"]["iterations"]):
+		start_time = time.perf_counter()
+
+		with context["database_client_factory"]() as database_client:
+			all_schedules = [ schedule for schedule in schedule_provider.get_list(database_client) if schedule["is_enabled"] ]
+			for schedule in all_schedules:
+				if schedule["last_run"] is not None:
+					run_provider.get(database_client, schedule["project"], schedule["last_run"])
+
+			all_pending_runs = run_provider.get_list(database_client, status = "pending", order_by = [ ("creation_date", "ascending") ])
+			for run in all_pending_runs:
+				if run["worker"] is None and not run["should_cancel"]:
+					job_provider.get(database_client, run["project"], run["job"])
+
+			run_provider.get_list(database_client, status = "running")
+
+		durations.append(time.perf_counter() - start_time)
+
+	return durations
+
+
+def run_run_listing(context: dict) -> List[float]:
+	""" Replay the service listing runs by pages, with a count and continuation tokens """
+
+	run_provider = context["run_provider"]
+	page_size = context["parameters"]["page_size"]
+	order_by = [ ("creation_date", "descending") ]
+	durations = []
+
+	continuation_token = None
+
+	for _ in range(context["parameters"]["page_count"]):
+		start_time = time.perf_counter()
+
+		with context["database_client_factory"]() as database_client:
+			run_provider.count(database_client)
+			all_runs = run_provider.get_list(database_client, limit = page_size, order_by = order_by, continuation_token = continuation_token)
+
+		durations.append(time.perf_counter() - start_time)
+
+		continuation_token = run_provider.create_continuation_token(all_runs[-1], order_by) if len(all_runs) == page_size else None
+
+	return durations
+
+
+def run_project_status_scan(context: dict) -> List[float]:
+	""" Replay the service computing the project status, by reading the status of each recent revision and querying its runs """
+
+	run_provider = context["run_provider"]
+	order_by = [ ("update_date", "descending") ]
+	durations = []
+
+	with context["database_client_factory"]() as database_client:
+		all_projects = [ project["identifier"] for project in database_client.find_many("project", {}, order_by = [ ("identifier", "ascending") ]) ]
+
+		all_revisions = {}
+		for project in all_projects:
+			for run in run_provider.iterate_as_documents(database_client, project = project, limit = 1000, order_by = order_by):
+				if run["revision"] is not None and run["revision"] not in all_revisions.setdefault(project, []) and len(all_revisions[project]) < 20:
+					all_revisions[project].append(run["revision"])
+
+	for iteration in range(context["parameters"]["iterations"]):
+		project = all_projects[iteration % len(all_projects)]
+		start_time = time.perf_counter()
+
+		with context["database_client_factory"]() as database_client:
+			for status in [ "pending", "running" ]:
+				list(run_provider.iterate_as_documents(database_client, project = project, status = status))
+			for revision in all_revisions.get(project, []):
+				if run_provider.revision_status_provider.get(database_client, project, revision) is not None:
+					list(run_provider.iterate_as_documents(database_client, project = project, revision = revision, limit = 1000, order_by = order_by))
+
+		durations.append(time.perf_counter() - start_time)
+
+	return durations
+
+
+def run_status_update_storm(context: dict) -> List[float]:
+	""" Replay workers reporting updates for active runs, each update being saved separately """
+
+	run_provider = context["run_provider"]
+	durations = []
+
+	with context["database_client_factory"]() as database_client:
+		all_runs = run_provider.get_list(database_client, status = "running") + run_provider.get_list(database_client, status = "pending")
+
+	if len(all_runs) == 0:
+		return [ 0.0 ]
+
+	for update_index in range(context["parameters"]["update_count"]):
+		run = context["random"].choice(all_runs)
+		results = { "progress": update_index, "revision_control": { "revision": run["parameters"]["revision"], "branch": "main" } }
+
+		start_time = time.perf_counter()
+
+		with context["database_client_factory"]() as database_client:
+			run_provider.update_status(database_client, run, status = "running", results = results)
+
+		durations.append(time.perf_counter() - start_time)
+
+	return durations
+
+
+def run_export(context: dict, export_directory: str) -> List[float]:
+	""" Export the whole database """
+
+	start_time = time.perf_counter()
+	database_import_export.export_database(context["database_client_factory"], JsonSerializer(), export_directory)
+	return [ time.perf_counter() - start_time ]
+
+
+def run_import(context: dict, export_directory: str) -> List[float]:
+	""" Import an exported database into an empty one """
+
+	start_time = time.perf_counter()
+	with context["database_client_factory"]() as database_client:
+		database_import_export.import_database(database_client, JsonSerializer(), export_directory)
+	return [ time.perf_counter() - start_time ]
+
+
+if __name__ == "__main__":
+	main()
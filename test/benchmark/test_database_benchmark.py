@@ -0,0 +1,20 @@
+""" Smoke tests for the database benchmark """
+
+import pytest
+
+from . import database_benchmark
+
+
+@pytest.mark.parametrize("database_type", [ "memory", "json", "sqlite" ])
+def test_run_benchmarks(tmpdir, database_type):
+	""" Test running all workloads on a small dataset """
+
+	parameters = dict(database_benchmark.default_parameters)
+	parameters.update({ "run_count": 50, "pending_run_count": 5, "running_run_count": 2, "iterations": 2, "page_count": 3, "update_count": 5 })
+
+	report = database_benchmark.run_benchmarks([ database_type ], database_benchmark.all_workloads, parameters, str(tmpdir))
+
+	assert not report["skipped"]
+	assert [ result["workload"] for result in report["results"] ] == database_benchmark.all_workloads
+	assert all(result["database"] == database_type for result in report["results"])
+	assert all(result["min_seconds"] <= result["median_seconds"] <= result["max_seconds"] for result in report["results"])
@@ -7,6 +7,7 @@ from bhamon_orchestra_model.database.file_data_storage import FileDataStorage
 from bhamon_orchestra_model.date_time_provider import DateTimeProvider
 from bhamon_orchestra_model.job_provider import JobProvider
 from bhamon_orchestra_model.project_provider import ProjectProvider
+from bhamon_orchestra_model.revision_status_provider import RevisionStatusProvider
 from bhamon_orchestra_model.run_provider import RunProvider
 from bhamon_orchestra_model.schedule_provider import ScheduleProvider
 from bhamon_orchestra_model.serialization.json_serializer import JsonSerializer
@@ -65,11 +66,13 @@ def create_application(arguments):
 	application = types.SimpleNamespace()
 	application.database_administration_factory = database_administration_factory
 	application.database_client_factory = database_client_factory
+	application.date_time_provider = date_time_provider_instance
 	application.authentication_provider = AuthenticationProvider(date_time_provider_instance)
 	application.authorization_provider = AuthorizationProvider()
 	application.job_provider = JobProvider(date_time_provider_instance)
 	application.project_provider = ProjectProvider(date_time_provider_instance)
-	application.run_provider = RunProvider(data_storage_instance, date_time_provider_instance)
+	application.revision_status_provider = RevisionStatusProvider(date_time_provider_instance)
+	application.run_provider = RunProvider(data_storage_instance, date_time_provider_instance, revision_status_provider = application.revision_status_provider)
 	application.schedule_provider = ScheduleProvider(date_time_provider_instance)
 	application.user_provider = UserProvider(date_time_provider_instance)
 	application.worker_provider = WorkerProvider(date_time_provider_instance)
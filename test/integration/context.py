@@ -15,6 +15,7 @@ from bhamon_orchestra_model.database.file_data_storage import FileDataStorage
 from bhamon_orchestra_model.date_time_provider import DateTimeProvider
 from bhamon_orchestra_model.job_provider import JobProvider
 from bhamon_orchestra_model.project_provider import ProjectProvider
+from bhamon_orchestra_model.revision_status_provider import RevisionStatusProvider
 from bhamon_orchestra_model.run_provider import RunProvider
 from bhamon_orchestra_model.schedule_provider import ScheduleProvider
 from bhamon_orchestra_model.serialization.json_serializer import JsonSerializer
@@ -110,7 +111,8 @@ class OrchestraContext: # pylint: disable = too-many-instance-attributes
 			self.authorization_provider = AuthorizationProvider()
 			self.job_provider = JobProvider(date_time_provider_instance)
 			self.project_provider = ProjectProvider(date_time_provider_instance)
-			self.run_provider = RunProvider(self.data_storage, date_time_provider_instance)
+			self.revision_status_provider = RevisionStatusProvider(date_time_provider_instance)
+			self.run_provider = RunProvider(self.data_storage, date_time_provider_instance, revision_status_provider = self.revision_status_provider)
 			self.schedule_provider = ScheduleProvider(date_time_provider_instance)
 			self.user_provider = UserProvider(date_time_provider_instance)
 			self.worker_provider = WorkerProvider(date_time_provider_instance)
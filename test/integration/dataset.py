@@ -77,6 +77,7 @@ simple_dataset = {
 			"start_date": datetime.datetime(2020, 1, 1, 0, 0, 0, tzinfo = datetime.timezone.utc),
 			"completion_date": datetime.datetime(2020, 1, 1, 0, 0, 0, tzinfo = datetime.timezone.utc),
 			"results": {},
+			"revision": None,
 			"should_cancel": False,
 			"should_abort": False,
 			"creation_date": datetime.datetime(2020, 1, 1, 0, 0, 0, tzinfo = datetime.timezone.utc),
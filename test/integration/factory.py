@@ -1,6 +1,7 @@
 import os
 import platform
 import re
+import urllib.parse
 from typing import Callable, Optional
 
 import pymongo
@@ -12,8 +13,7 @@ from bhamon_orchestra_model.database.json_database_administration import JsonDat
 from bhamon_orchestra_model.database.json_database_client import JsonDatabaseClient
 from bhamon_orchestra_model.database.mongo_database_administration import MongoDatabaseAdministration
 from bhamon_orchestra_model.database.mongo_database_client import MongoDatabaseClient
-from bhamon_orchestra_model.database.sql_database_administration import SqlDatabaseAdministration
-from bhamon_orchestra_model.database.sql_database_client import SqlDatabaseClient
+from bhamon_orchestra_model.database.sql_database_client_factory import SqlDatabaseClientFactory
 from bhamon_orchestra_model.serialization.json_serializer import JsonSerializer
 
 
@@ -29,8 +29,7 @@ def create_database_administration_factory(
 		return lambda: MongoDatabaseAdministration(pymongo.MongoClient(database_uri))
 
 	if database_uri.startswith("postgresql://"):
-		database_engine = sqlalchemy.create_engine(database_uri)
-		return lambda: SqlDatabaseAdministration(database_engine.connect(), database_metadata)
+		return SqlDatabaseClientFactory(database_uri, database_metadata).create_administration
 
 	raise ValueError("Unsupported database uri '%s'" % database_uri)
 
@@ -41,19 +40,23 @@ def create_database_client_factory(
 	if database_uri.startswith("json://"):
 		serializer = JsonSerializer(indent = 4)
 		data_directory = _convert_uri_to_local_path(database_uri)
-		return lambda: JsonDatabaseClient(serializer, data_directory)
+		use_journal = _get_boolean_uri_option(database_uri, "journal", False)
+		return lambda: JsonDatabaseClient(serializer, data_directory, use_journal = use_journal)
 
 	if database_uri.startswith("mongodb://"):
 		return lambda: MongoDatabaseClient(pymongo.MongoClient(database_uri))
 
 	if database_uri.startswith("postgresql://"):
-		database_engine = sqlalchemy.create_engine(database_uri)
-		return lambda: SqlDatabaseClient(database_engine.connect(), database_metadata)
+		notify_changes = _get_boolean_uri_option(database_uri, "notify_changes", False)
+		database_uri = _remove_uri_option(database_uri, "notify_changes")
+		return SqlDatabaseClientFactory(database_uri, database_metadata, notify_changes = notify_changes)
 
 	raise ValueError("Unsupported database uri '%s'" % database_uri)
 
 
 def _convert_uri_to_local_path(database_uri: str) -> str:
+	database_uri = database_uri.split("?", 1)[0]
+
 	database_uri_regex = re.compile(r"^json://(?P<path>/[a-zA-Z0-9_\-\./%]+)$")
 	if platform.system() == "Windows":
 		database_uri_regex = re.compile(r"^json:///(?P<path>[a-zA-Z]:[a-zA-Z0-9_\-\./%]+)$")
@@ -63,3 +66,24 @@ def _convert_uri_to_local_path(database_uri: str) -> str:
 		raise ValueError("URI is invalid or unsupported: '%s'" % database_uri)
 
 	return os.path.normpath(database_uri_match.group("path"))
+
+
+def _get_boolean_uri_option(database_uri: str, option: str, default_value: bool) -> bool:
+	query_parameters = urllib.parse.parse_qs(urllib.parse.urlsplit(database_uri).query)
+	if option not in query_parameters:
+		return default_value
+
+	option_value = query_parameters[option][-1].lower()
+	if option_value not in [ "true", "false" ]:
+		raise ValueError("URI option '%s' must be 'true' or 'false': '%s'" % (option, database_uri))
+
+	return option_value == "true"
+
+
+def _remove_uri_option(database_uri: str, option: str) -> str:
+	if "?" not in database_uri:
+		return database_uri
+
+	database_uri, query = database_uri.split("?", 1)
+	query_parameters = [ (key, value) for key, value in urllib.parse.parse_qsl(query) if key != option ]
+	return database_uri + ("?" + urllib.parse.urlencode(query_parameters) if len(query_parameters) > 0 else "")
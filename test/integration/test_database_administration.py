@@ -61,7 +61,7 @@ def test_upgrade(tmpdir, database_type, base_version, simulate):
 def test_import_export(tmpdir, database_type_source, database_type_target):
 	""" Test exporting and re-importing a database """
 
-	serializer = JsonSerializer(indent = 4)
+	serializer = JsonSerializer()
 	metadata_factory = lambda: importlib.import_module("bhamon_orchestra_model.database.sql_database_model").metadata
 	intermediate_directory = os.path.join(str(tmpdir), "export")
 	dataset_source = dataset.simple_dataset
@@ -69,7 +69,7 @@ def test_import_export(tmpdir, database_type_source, database_type_target):
 	with context.DatabaseContext(tmpdir, database_type_source, database_suffix = "source", metadata_factory = metadata_factory) as context_instance:
 		with context_instance.database_client_factory() as database_client:
 			dataset.import_dataset(database_client, dataset_source)
-			database_import_export.export_database(database_client, serializer, intermediate_directory)
+		database_import_export.export_database(context_instance.database_client_factory, serializer, intermediate_directory)
 
 	with context.DatabaseContext(tmpdir, database_type_target, database_suffix = "target", metadata_factory = metadata_factory) as context_instance:
 		with context_instance.database_client_factory() as database_client:
@@ -77,3 +77,25 @@ def test_import_export(tmpdir, database_type_source, database_type_target):
 			dataset_target = dataset.export_dataset(database_client)
 
 	assert dataset_source == dataset_target
+
+
+@pytest.mark.parametrize("file_format, compression", [ ("json", None), ("ndjson", None), ("ndjson", "gzip") ])
+def test_import_export_formats(tmpdir, file_format, compression):
+	""" Test exporting and re-importing a database with each file format """
+
+	serializer = JsonSerializer()
+	intermediate_directory = os.path.join(str(tmpdir), "export")
+	dataset_source = dataset.simple_dataset
+
+	with context.DatabaseContext(tmpdir, "json", database_suffix = "source") as context_instance:
+		with context_instance.database_client_factory() as database_client:
+			dataset.import_dataset(database_client, dataset_source)
+		database_import_export.export_database(context_instance.database_client_factory, serializer, intermediate_directory,
+			file_format = file_format, compression = compression)
+
+	with context.DatabaseContext(tmpdir, "json", database_suffix = "target") as context_instance:
+		with context_instance.database_client_factory() as database_client:
+			database_import_export.import_database(database_client, serializer, intermediate_directory, batch_size = 2)
+			dataset_target = dataset.export_dataset(database_client)
+
+	assert dataset_source == dataset_target
@@ -1,10 +1,13 @@
 """ Integration tests for database operations """
 
+import threading
+
 import pytest
 import sqlalchemy.schema
 import sqlalchemy.types
 
 from . import context
+from . import factory
 from . import environment
 
 
@@ -83,6 +86,161 @@ def test_many(tmpdir, database_type):
 			assert database_client.find_many(table, {}) == [ first_record, second_record ]
 
 
+@pytest.mark.parametrize("database_type", environment.get_all_database_types())
+def test_single_with_several_matches(tmpdir, database_type):
+	""" Test single record operations with a filter matching several records """
+
+	table = "record_simple"
+	first_record = { "id": 1, "key": "value" }
+	second_record = { "id": 2, "key": "value" }
+
+	with context.DatabaseContext(tmpdir, database_type, metadata_factory = create_database_metadata) as context_instance:
+		with context_instance.database_client_factory() as database_client:
+
+			database_client.insert_many(table, [ first_record, second_record ])
+
+			database_client.update_one(table, { "key": "value" }, { "key": "updated" })
+			assert database_client.count(table, { "key": "updated" }) == 1
+			assert database_client.count(table, { "key": "value" }) == 1
+
+			database_client.delete_one(table, { "key": "value" })
+			assert database_client.count(table, {}) == 1
+
+			database_client.delete_one(table, { "id": 1, "key": "value" })
+			assert database_client.count(table, {}) == 1
+
+
+@pytest.mark.parametrize("database_type", environment.get_all_database_types())
+def test_find_with_fields(tmpdir, database_type):
+	""" Test finding records with a selection of fields """
+
+	table = "record_complex"
+	first_record = { "id": 1, "key_1": "first", "key_2": "value", "key_3": "value" }
+	second_record = { "id": 2, "key_1": "second", "key_2": "value", "key_3": "value" }
+
+	with context.DatabaseContext(tmpdir, database_type, metadata_factory = create_database_metadata) as context_instance:
+		with context_instance.database_client_factory() as database_client:
+
+			database_client.insert_many(table, [ first_record, second_record ])
+
+			assert database_client.find_one(table, { "id": 2 }, fields = [ "id", "key_1" ]) == { "id": 2, "key_1": "second" }
+			assert database_client.find_many(table, {}, fields = [ "key_1" ]) == [ { "key_1": "first" }, { "key_1": "second" } ]
+			assert list(database_client.find_iter(table, {}, fields = [ "id" ])) == [ { "id": 1 }, { "id": 2 } ]
+
+
+@pytest.mark.parametrize("database_type", environment.get_all_database_types())
+def test_find_with_start_after(tmpdir, database_type):
+	""" Test finding records page by page, using the last record of each page as the start """
+
+	table = "record_simple"
+	all_records = [ { "id": index, "key": "value_%s" % (index % 3) if index % 4 != 0 else None } for index in range(10) ]
+
+	with context.DatabaseContext(tmpdir, database_type, metadata_factory = create_database_metadata) as context_instance:
+		with context_instance.database_client_factory() as database_client:
+
+			database_client.insert_many(table, all_records)
+
+			for order_by in [ [ ("key", "ascending"), ("id", "ascending") ], [ ("key", "descending"), ("id", "ascending") ] ]:
+				expected_records = database_client.find_many(table, {}, order_by = order_by)
+				all_pages = []
+				start_after = None
+
+				while True:
+					page = database_client.find_many(table, {}, limit = 3, order_by = order_by, start_after = start_after)
+					all_pages += page
+					if len(page) < 3:
+						break
+					start_after = { "key": page[-1]["key"], "id": page[-1]["id"] }
+
+				assert all_pages == expected_records
+
+
+@pytest.mark.parametrize("database_type", environment.get_all_database_types())
+def test_find_iter(tmpdir, database_type):
+	""" Test iterating over records by batches """
+
+	table = "record_simple"
+	all_records = [ { "id": index, "key": "value_%s" % (index % 3) } for index in range(10) ]
+
+	with context.DatabaseContext(tmpdir, database_type, metadata_factory = create_database_metadata) as context_instance:
+		with context_instance.database_client_factory() as database_client:
+
+			database_client.insert_many(table, all_records)
+
+			assert list(database_client.find_iter(table, {}, batch_size = 3)) == all_records
+			assert list(database_client.find_iter(table, { "key": "value_1" }, batch_size = 3)) == [ all_records[1], all_records[4], all_records[7] ]
+			assert list(database_client.find_iter(table, {}, skip = 2, limit = 5, order_by = [ "id" ], batch_size = 2)) == all_records[2:7]
+			assert not list(database_client.find_iter(table, {}, limit = 0))
+
+
+@pytest.mark.parametrize("database_type", environment.get_all_database_types())
+def test_bulk(tmpdir, database_type):
+	""" Test database bulk operations """
+
+	table = "record_simple"
+	first_record = { "id": 1, "key": "first" }
+	second_record = { "id": 2, "key": "second" }
+	third_record = { "id": 3, "key": "first" }
+
+	with context.DatabaseContext(tmpdir, database_type, metadata_factory = create_database_metadata) as context_instance:
+		with context_instance.database_client_factory() as database_client:
+
+			database_client.insert_many(table, [ first_record, second_record, third_record ])
+
+			database_client.update_many(table, { "key": "first" }, { "key": "updated" })
+			assert database_client.count(table, { "key": "updated" }) == 2
+			assert database_client.find_one(table, { "id": 2 }) == second_record
+
+			database_client.delete_many(table, { "key": "updated" })
+			assert database_client.find_many(table, {}) == [ second_record ]
+
+			database_client.delete_many(table, {})
+			assert database_client.count(table, {}) == 0
+
+
+@pytest.mark.parametrize("database_type", environment.get_all_database_types())
+def test_upsert(tmpdir, database_type):
+	""" Test database upsert operations """
+
+	table = "record_complex"
+
+	with context.DatabaseContext(tmpdir, database_type, metadata_factory = create_database_metadata) as context_instance:
+		with context_instance.database_client_factory() as database_client:
+
+			database_client.upsert_one(table, { "id": 1 }, { "key_1": "inserted" }, { "key_2": "insert_only" })
+			record = database_client.find_one(table, { "id": 1 })
+			assert database_client.count(table, {}) == 1
+			assert (record["key_1"], record["key_2"]) == ("inserted", "insert_only")
+
+			database_client.upsert_one(table, { "id": 1 }, { "key_1": "updated" }, { "key_2": "ignored" })
+			record = database_client.find_one(table, { "id": 1 })
+			assert database_client.count(table, {}) == 1
+			assert (record["key_1"], record["key_2"]) == ("updated", "insert_only")
+
+			database_client.upsert_one(table, { "key_1": "updated" }, { "key_3": "updated" })
+			record = database_client.find_one(table, { "id": 1 })
+			assert database_client.count(table, {}) == 1
+			assert (record["key_1"], record["key_2"], record["key_3"]) == ("updated", "insert_only", "updated")
+
+
+@pytest.mark.parametrize("database_type", environment.get_all_database_types())
+def test_increment(tmpdir, database_type):
+	""" Test database increment operations """
+
+	table = "record_document"
+
+	with context.DatabaseContext(tmpdir, database_type, metadata_factory = create_database_metadata) as context_instance:
+		with context_instance.database_client_factory() as database_client:
+
+			record = database_client.increment_one(table, { "id": 1 }, { "data.first": 1 })
+			assert record == { "id": 1, "data": { "first": 1 } }
+
+			record = database_client.increment_one(table, { "id": 1 }, { "data.first": -1, "data.second": 2 })
+			assert record == { "id": 1, "data": { "first": 0, "second": 2 } }
+			assert database_client.find_one(table, { "id": 1 }) == record
+			assert database_client.count(table, {}) == 1
+
+
 @pytest.mark.parametrize("database_type", environment.get_all_database_types())
 def test_find_with_inner_key(tmpdir, database_type):
 	""" Test finding a record using an inner key """
@@ -235,3 +393,31 @@ def test_index(tmpdir, database_type):
 			with pytest.raises(Exception):
 				database_client.insert_many(table, [ first_record, second_record, third_record ])
 			assert database_client.count(table, {}) == 1
+
+
+@pytest.mark.parametrize("database_type", environment.get_all_database_types())
+def test_watch(tmpdir, database_type):
+	""" Test watching changes made by another database client """
+
+	if database_type == "mongo":
+		pytest.skip("Change streams require a replica set")
+
+	table = "record_simple"
+	change_event = threading.Event()
+
+	with context.DatabaseContext(tmpdir, database_type, metadata_factory = create_database_metadata) as context_instance:
+		database_client_factory = context_instance.database_client_factory
+		if database_type == "postgresql":
+			database_uri = context_instance.database_uri + "?notify_changes=true"
+			database_client_factory = factory.create_database_client_factory(database_uri, context_instance.metadata)
+
+		with context_instance.database_client_factory() as watching_database_client:
+			with watching_database_client.watch(table, { "key": "value" }, lambda change: change_event.set()):
+				with database_client_factory() as database_client:
+
+					database_client.insert_one(table, { "id": 1, "key": "value" })
+					assert change_event.wait(5)
+					change_event.clear()
+
+					database_client.delete_one(table, { "id": 1 })
+					assert change_event.wait(5)
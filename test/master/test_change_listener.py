@@ -0,0 +1,128 @@
+""" Unit tests for ChangeListener """
+
+import asyncio
+
+import pytest
+
+from bhamon_orchestra_master.change_listener import ChangeListener
+from bhamon_orchestra_model.database.memory_database_client import MemoryDatabaseClient
+
+
+@pytest.mark.asyncio
+async def test_wait():
+	""" Test waiting for changes made from another thread """
+
+	database_client_instance = MemoryDatabaseClient()
+	change_listener = ChangeListener(lambda: database_client_instance)
+
+	try:
+		await change_listener.start([ ("run", { "status": "pending" }) ])
+
+		assert not await change_listener.wait(0.1)
+
+		loop = asyncio.get_running_loop()
+		await loop.run_in_executor(None, database_client_instance.insert_one, "run", { "identifier": "my_run", "status": "running" })
+		assert not await change_listener.wait(0.1)
+
+		await loop.run_in_executor(None, database_client_instance.insert_one, "run", { "identifier": "my_other_run", "status": "pending" })
+		assert await change_listener.wait(1)
+		assert not await change_listener.wait(0.1)
+
+	finally:
+		change_listener.dispose()
+
+
+@pytest.mark.asyncio
+async def test_wait_without_support():
+	""" Test waiting for changes falls back to waiting for the timeout if the database does not support watching """
+
+	class UnsupportedDatabaseClient(MemoryDatabaseClient):
+		def watch(self, table, filter, callback): # pylint: disable = redefined-builtin
+			raise NotImplementedError
+
+	change_listener = ChangeListener(UnsupportedDatabaseClient)
+
+	try:
+		await change_listener.start([ ("run", {}) ])
+		assert not await change_listener.wait(0.1)
+	finally:
+		change_listener.dispose()
+
+
+@pytest.mark.asyncio
+async def test_change_callback():
+	""" Test the change callback is called for each change """
+
+	database_client_instance = MemoryDatabaseClient()
+	all_changes = []
+	change_listener = ChangeListener(lambda: database_client_instance, change_callback = all_changes.append)
+
+	try:
+		await change_listener.start([ ("job", {}), ("worker", {}) ])
+
+		loop = asyncio.get_running_loop()
+		await loop.run_in_executor(None, database_client_instance.insert_one, "job", { "identifier": "my_job" })
+		await loop.run_in_executor(None, database_client_instance.update_one, "worker", { "identifier": "my_worker" }, { "is_enabled": False })
+		await loop.run_in_executor(None, database_client_instance.insert_one, "worker", { "identifier": "my_worker" })
+		assert await change_listener.wait(1)
+
+		assert all_changes == [ { "table": "job", "operation": "insert" }, { "table": "worker", "operation": "insert" } ]
+
+	finally:
+		change_listener.dispose()
+
+
+@pytest.mark.asyncio
+async def test_ignore_own_changes():
+	""" Test ignoring the changes made through the same factory """
+
+	class WatchRecordingDatabaseClient(MemoryDatabaseClient):
+		def __init__(self):
+			super().__init__()
+			self.all_watches = []
+
+		def watch(self, table, filter, callback): # pylint: disable = redefined-builtin
+			watch = super().watch(table, filter, callback)
+			self.all_watches.append(watch)
+			return watch
+
+	database_client_instance = WatchRecordingDatabaseClient()
+	change_listener = ChangeListener(lambda: database_client_instance, ignore_own_changes = True)
+
+	try:
+		await change_listener.start([ ("run", { "status": "pending" }) ])
+		watch = database_client_instance.all_watches[0]
+
+		loop = asyncio.get_running_loop()
+		await loop.run_in_executor(None, lambda: watch.notify("insert", is_own_change = True))
+		assert not await change_listener.wait(0.1)
+
+		await loop.run_in_executor(None, lambda: watch.notify("update", is_own_change = False))
+		assert await change_listener.wait(1)
+
+	finally:
+		change_listener.dispose()
+
+
+@pytest.mark.asyncio
+async def test_wait_rate_limit():
+	""" Test wakeups for changes are separated by the minimum interval """
+
+	database_client_instance = MemoryDatabaseClient()
+	change_listener = ChangeListener(lambda: database_client_instance)
+	change_listener.minimum_wakeup_interval_seconds = 0.5
+
+	try:
+		await change_listener.start([ ("run", {}) ])
+
+		loop = asyncio.get_running_loop()
+		await loop.run_in_executor(None, database_client_instance.insert_one, "run", { "identifier": "my_run" })
+		assert await change_listener.wait(1)
+		first_wakeup_time = loop.time()
+
+		await loop.run_in_executor(None, database_client_instance.insert_one, "run", { "identifier": "my_other_run" })
+		assert await change_listener.wait(1)
+		assert loop.time() - first_wakeup_time >= 0.5
+
+	finally:
+		change_listener.dispose()
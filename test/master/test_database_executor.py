@@ -0,0 +1,129 @@
+""" Unit tests for DatabaseExecutor """
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from bhamon_orchestra_master.database_executor import DatabaseExecutor
+from bhamon_orchestra_model.database.memory_database_client import MemoryDatabaseClient
+
+
+@pytest.mark.asyncio
+async def test_run():
+	""" Test running database operations in the executor """
+
+	database_executor = DatabaseExecutor(MemoryDatabaseClient)
+
+	try:
+		await database_executor.run(lambda database_client, record: database_client.insert_one("record", record), { "id": 1 })
+		assert await database_executor.run(lambda database_client: database_client.count("record", {})) == 1
+	finally:
+		database_executor.dispose()
+
+
+@pytest.mark.asyncio
+async def test_event_loop_lag():
+	""" Test slow database operations do not block the event loop """
+
+	database_executor = DatabaseExecutor(MemoryDatabaseClient, thread_limit = 1)
+	maximum_lag = 0
+
+	async def measure_lag():
+		nonlocal maximum_lag
+		for _ in range(20):
+			start_time = time.perf_counter()
+			await asyncio.sleep(0.01)
+			maximum_lag = max(maximum_lag, time.perf_counter() - start_time - 0.01)
+
+	try:
+		await asyncio.gather(database_executor.run(lambda database_client: time.sleep(0.2)), measure_lag())
+	finally:
+		database_executor.dispose()
+
+	assert maximum_lag < 0.1
+
+
+class FailingDatabaseClient(MemoryDatabaseClient):
+	""" Memory database client treating OSError as a database error """
+
+
+	def is_database_error(self, exception: Exception) -> bool:
+		return isinstance(exception, OSError)
+
+
+@pytest.mark.asyncio
+async def test_discard_client():
+	""" Test the client is replaced after an operation raised a database error, but not after other exceptions """
+
+	all_clients = []
+
+	def create_client():
+		all_clients.append(FailingDatabaseClient())
+		return all_clients[-1]
+
+	def fail_with_database_error(database_client): # pylint: disable = unused-argument
+		raise OSError("Database connection failed")
+
+	def fail_with_other_error(database_client): # pylint: disable = unused-argument
+		raise ValueError("Invalid request")
+
+	database_executor = DatabaseExecutor(create_client, thread_limit = 1)
+
+	try:
+		await database_executor.run(lambda database_client: None)
+		await database_executor.run(lambda database_client: None)
+		assert len(all_clients) == 1
+
+		with pytest.raises(ValueError):
+			await database_executor.run(fail_with_other_error)
+
+		await database_executor.run(lambda database_client: None)
+		assert len(all_clients) == 1
+
+		with pytest.raises(OSError):
+			await database_executor.run(fail_with_database_error)
+
+		await database_executor.run(lambda database_client: None)
+		assert len(all_clients) == 2
+
+	finally:
+		database_executor.dispose()
+
+
+class ThreadSafeDatabaseClient(MemoryDatabaseClient):
+	""" Memory database client declared as thread safe """
+
+
+	def is_thread_safe(self) -> bool:
+		return True
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("database_client_type, is_concurrent", [ (MemoryDatabaseClient, False), (ThreadSafeDatabaseClient, True) ])
+async def test_thread_safety(database_client_type, is_concurrent):
+	""" Test operations are run one at a time for clients which are not thread safe """
+
+	database_client_instance = database_client_type()
+	lock = threading.Lock()
+	active_count = 0
+	all_active_counts = []
+
+	def run_operation(database_client): # pylint: disable = unused-argument
+		nonlocal active_count
+		with lock:
+			active_count += 1
+			all_active_counts.append(active_count)
+		time.sleep(0.1)
+		with lock:
+			active_count -= 1
+
+	database_executor = DatabaseExecutor(lambda: database_client_instance, thread_limit = 4)
+
+	try:
+		await asyncio.gather(*[ database_executor.run(run_operation) for _ in range(4) ])
+	finally:
+		database_executor.dispose()
+
+	assert (max(all_active_counts) > 1) == is_concurrent
@@ -4,11 +4,13 @@
 
 import pytest
 
+from bhamon_orchestra_master.database_executor import DatabaseExecutor
 from bhamon_orchestra_master.job_scheduler import JobScheduler
 from bhamon_orchestra_master.supervisor import Supervisor
 from bhamon_orchestra_master.worker import Worker
 from bhamon_orchestra_model.database.memory_database_client import MemoryDatabaseClient
 from bhamon_orchestra_model.run_provider import RunProvider
+from bhamon_orchestra_model.schedule_provider import ScheduleProvider
 
 from ..fakes.fake_date_time_provider import FakeDateTimeProvider
 
@@ -22,7 +24,7 @@ def test_abort_run_pending():
 	supervisor_instance = Supervisor(None, None, None, None)
 
 	job_scheduler_instance = JobScheduler(
-		database_client_factory = lambda: database_client_instance,
+		database_executor = DatabaseExecutor(lambda: database_client_instance),
 		job_provider = None,
 		run_provider = run_provider_instance,
 		schedule_provider = None,
@@ -43,17 +45,18 @@ def test_abort_run_pending():
 	assert run["status"] == "pending"
 
 
-def test_abort_run_running_connected():
+@pytest.mark.asyncio
+async def test_abort_run_running_connected():
 	""" Test aborting an in progress run on a connected worker """
 
 	database_client_instance = MemoryDatabaseClient()
 	date_time_provider_instance = FakeDateTimeProvider()
 	run_provider_instance = RunProvider(None, date_time_provider_instance)
-	worker_instance = Worker("worker_test", None, lambda: database_client_instance, run_provider_instance, None)
+	worker_instance = Worker("worker_test", None, DatabaseExecutor(lambda: database_client_instance), run_provider_instance, None)
 	supervisor_instance = Supervisor(None, None, None, None)
 
 	job_scheduler_instance = JobScheduler(
-		database_client_factory = lambda: database_client_instance,
+		database_executor = DatabaseExecutor(lambda: database_client_instance),
 		job_provider = None,
 		run_provider = run_provider_instance,
 		schedule_provider = None,
@@ -66,7 +69,7 @@ def test_abort_run_running_connected():
 
 	job = { "project": "examples", "identifier": "empty" }
 	run = run_provider_instance.create(database_client_instance, job["project"], job["identifier"], {}, None)
-	worker_instance.assign_run(job, run)
+	await worker_instance.assign_run(job, run)
 	run_provider_instance.update_status(database_client_instance, run, status = "running")
 
 	assert run["status"] == "running"
@@ -81,17 +84,18 @@ def test_abort_run_running_connected():
 	assert worker_instance.executors[0]["should_abort"] is True
 
 
-def test_abort_run_running_disconnected():
+@pytest.mark.asyncio
+async def test_abort_run_running_disconnected():
 	""" Test aborting an in progress run on a disconnected worker """
 
 	database_client_instance = MemoryDatabaseClient()
 	date_time_provider_instance = FakeDateTimeProvider()
 	run_provider_instance = RunProvider(None, date_time_provider_instance)
-	worker_instance = Worker("worker_test", None, lambda: database_client_instance, run_provider_instance, None)
+	worker_instance = Worker("worker_test", None, DatabaseExecutor(lambda: database_client_instance), run_provider_instance, None)
 	supervisor_instance = Supervisor(None, None, None, None)
 
 	job_scheduler_instance = JobScheduler(
-		database_client_factory = lambda: database_client_instance,
+		database_executor = DatabaseExecutor(lambda: database_client_instance),
 		job_provider = None,
 		run_provider = run_provider_instance,
 		schedule_provider = None,
@@ -102,7 +106,7 @@ def test_abort_run_running_disconnected():
 
 	job = { "project": "examples", "identifier": "empty" }
 	run = run_provider_instance.create(database_client_instance, job["project"], job["identifier"], {}, None)
-	worker_instance.assign_run(job, run)
+	await worker_instance.assign_run(job, run)
 	run_provider_instance.update_status(database_client_instance, run, status = "running")
 
 	assert run["status"] == "running"
@@ -126,7 +130,7 @@ def test_abort_run_completed():
 	supervisor_instance = Supervisor(None, None, None, None)
 
 	job_scheduler_instance = JobScheduler(
-		database_client_factory = lambda: database_client_instance,
+		database_executor = DatabaseExecutor(lambda: database_client_instance),
 		job_provider = None,
 		run_provider = run_provider_instance,
 		schedule_provider = None,
@@ -146,3 +150,37 @@ def test_abort_run_completed():
 		job_scheduler_instance.abort_run(run)
 
 	assert run["status"] == "succeeded"
+
+
+@pytest.mark.asyncio
+async def test_update_cancel():
+	""" Test cancelling pending runs during an update """
+
+	database_client_instance = MemoryDatabaseClient()
+	date_time_provider_instance = FakeDateTimeProvider()
+	run_provider_instance = RunProvider(None, date_time_provider_instance)
+	schedule_provider_instance = ScheduleProvider(date_time_provider_instance)
+
+	job_scheduler_instance = JobScheduler(
+		database_executor = DatabaseExecutor(lambda: database_client_instance),
+		job_provider = None,
+		run_provider = run_provider_instance,
+		schedule_provider = schedule_provider_instance,
+		supervisor = None,
+		worker_selector = None,
+		date_time_provider = date_time_provider_instance,
+	)
+
+	async def trigger_run(run): # pylint: disable = unused-argument
+		return False
+
+	job_scheduler_instance.trigger_run = trigger_run
+
+	first_run = run_provider_instance.create(database_client_instance, "examples", "empty", {}, None)
+	second_run = run_provider_instance.create(database_client_instance, "examples", "empty", {}, None)
+	run_provider_instance.update_status(database_client_instance, first_run, should_cancel = True)
+
+	await job_scheduler_instance.update()
+
+	assert run_provider_instance.get(database_client_instance, "examples", first_run["identifier"])["status"] == "cancelled"
+	assert run_provider_instance.get(database_client_instance, "examples", second_run["identifier"])["status"] == "pending"
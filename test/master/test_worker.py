@@ -4,9 +4,12 @@
 
 from unittest.mock import Mock
 
+from bhamon_orchestra_model.database.database_statistics import DatabaseStatistics
+from bhamon_orchestra_model.database.instrumented_database_client import InstrumentedDatabaseClient
 from bhamon_orchestra_model.database.memory_database_client import MemoryDatabaseClient
 from bhamon_orchestra_model.database.memory_data_storage import MemoryDataStorage
 from bhamon_orchestra_model.run_provider import RunProvider
+from bhamon_orchestra_master.database_executor import DatabaseExecutor
 from bhamon_orchestra_master.worker import Worker as LocalWorker
 from bhamon_orchestra_worker.executor_watcher import ExecutorWatcher
 from bhamon_orchestra_worker.worker import Worker as RemoteWorker
@@ -40,7 +43,7 @@ async def test_start_execution_success():
 
 	worker_remote_instance = FakeRemoteWorker(worker_storage_instance)
 	worker_messenger = InProcessMessenger(worker_remote_instance._handle_request)
-	worker_local_instance = LocalWorker("my_worker", worker_messenger, lambda: None, run_provider_instance, None)
+	worker_local_instance = LocalWorker("my_worker", worker_messenger, None, run_provider_instance, None)
 
 	job = { "project": "my_project", "identifier": "my_job", "definition": {} }
 	run = { "project": "my_project", "identifier": "my_run", "job": "my_job", "status": "pending", "parameters": {} }
@@ -56,7 +59,7 @@ async def test_abort_execution_success():
 
 	worker_remote_instance = FakeRemoteWorker(worker_storage_instance)
 	worker_messenger = InProcessMessenger(worker_remote_instance._handle_request)
-	worker_local_instance = LocalWorker("my_worker", worker_messenger, lambda: None, run_provider_instance, None)
+	worker_local_instance = LocalWorker("my_worker", worker_messenger, None, run_provider_instance, None)
 
 	run = { "project": "my_project", "identifier": "my_run", "job": "my_job", "status": "running" }
 
@@ -73,7 +76,7 @@ async def test_finish_execution_success():
 
 	worker_remote_instance = FakeRemoteWorker(worker_storage_instance)
 	worker_messenger = InProcessMessenger(worker_remote_instance._handle_request)
-	worker_local_instance = LocalWorker("my_worker", worker_messenger, lambda: None, run_provider_instance, None)
+	worker_local_instance = LocalWorker("my_worker", worker_messenger, None, run_provider_instance, None)
 
 	run = { "project": "my_project", "identifier": "my_run", "job": "my_job", "status": "succeeded" }
 
@@ -93,7 +96,7 @@ async def test_process_success():
 	run_provider_instance = RunProvider(data_storage_instance, date_time_provider_instance)
 	worker_remote_instance = FakeRemoteWorker(worker_storage_instance)
 	worker_messenger = InProcessMessenger(worker_remote_instance._handle_request)
-	worker_local_instance = LocalWorker("my_worker", worker_messenger, lambda: database_client_instance, run_provider_instance, None)
+	worker_local_instance = LocalWorker("my_worker", worker_messenger, DatabaseExecutor(lambda: database_client_instance), run_provider_instance, None)
 
 	job = { "project": "my_project", "identifier": "my_job", "definition": {} }
 	run = run_provider_instance.create(database_client_instance, job["project"], job["identifier"], {}, None)
@@ -101,7 +104,7 @@ async def test_process_success():
 	assert run["status"] == "pending"
 	assert len(worker_local_instance.executors) == 0
 
-	worker_local_instance.assign_run(job, run)
+	await worker_local_instance.assign_run(job, run)
 	local_executor = worker_local_instance.executors[0]
 
 	assert local_executor["local_status"] == "pending"
@@ -109,7 +112,7 @@ async def test_process_success():
 	assert len(worker_local_instance.executors) == 1
 
 	# pending => running (_start_execution)
-	await worker_local_instance._process_executor(database_client_instance, local_executor)
+	await worker_local_instance._process_executor(local_executor)
 
 	assert local_executor["local_status"] == "running"
 	assert run["status"] == "pending"
@@ -117,7 +120,7 @@ async def test_process_success():
 	remote_executor = worker_remote_instance._find_executor(run["identifier"])
 
 	await worker_local_instance.receive_update({ "run": run["identifier"], "status": remote_executor.status })
-	await worker_local_instance._process_executor(database_client_instance, local_executor)
+	await worker_local_instance._process_executor(local_executor)
 
 	assert local_executor["local_status"] == "running"
 	assert run["status"] == "running"
@@ -125,28 +128,28 @@ async def test_process_success():
 	remote_executor.succeed()
 
 	await worker_local_instance.receive_update({ "run": run["identifier"], "status": remote_executor.status })
-	await worker_local_instance._process_executor(database_client_instance, local_executor)
+	await worker_local_instance._process_executor(local_executor)
 
 	assert local_executor["local_status"] == "running"
 	assert run["status"] == "succeeded"
 
 	# running => verifying
-	await worker_local_instance._process_executor(database_client_instance, local_executor)
+	await worker_local_instance._process_executor(local_executor)
 
 	assert local_executor["local_status"] == "verifying"
 	assert run["status"] == "succeeded"
 
 	await worker_local_instance.receive_update({ "run": run["identifier"], "event": "synchronization_completed" })
-	await worker_local_instance._process_executor(database_client_instance, local_executor)
+	await worker_local_instance._process_executor(local_executor)
 
 	# verifying => finishing
-	await worker_local_instance._process_executor(database_client_instance, local_executor)
+	await worker_local_instance._process_executor(local_executor)
 
 	assert local_executor["local_status"] == "finishing"
 	assert run["status"] == "succeeded"
 
 	# finishing => done (_finish_execution)
-	await worker_local_instance._process_executor(database_client_instance, local_executor)
+	await worker_local_instance._process_executor(local_executor)
 
 	assert local_executor["local_status"] == "done"
 	assert run["status"] == "succeeded"
@@ -164,7 +167,7 @@ async def test_process_abort():
 	run_provider_instance = RunProvider(data_storage_instance, date_time_provider_instance)
 	worker_remote_instance = FakeRemoteWorker(worker_storage_instance)
 	worker_messenger = InProcessMessenger(worker_remote_instance._handle_request)
-	worker_local_instance = LocalWorker("my_worker", worker_messenger, lambda: database_client_instance, run_provider_instance, None)
+	worker_local_instance = LocalWorker("my_worker", worker_messenger, DatabaseExecutor(lambda: database_client_instance), run_provider_instance, None)
 
 	job = { "project": "my_project", "identifier": "my_job", "definition": {} }
 	run = run_provider_instance.create(database_client_instance, job["project"], job["identifier"], {}, None)
@@ -172,7 +175,7 @@ async def test_process_abort():
 	assert run["status"] == "pending"
 	assert len(worker_local_instance.executors) == 0
 
-	worker_local_instance.assign_run(job, run)
+	await worker_local_instance.assign_run(job, run)
 	local_executor = worker_local_instance.executors[0]
 
 	assert local_executor["local_status"] == "pending"
@@ -180,7 +183,7 @@ async def test_process_abort():
 	assert len(worker_local_instance.executors) == 1
 
 	# pending => running (_start_execution)
-	await worker_local_instance._process_executor(database_client_instance, local_executor)
+	await worker_local_instance._process_executor(local_executor)
 
 	assert local_executor["local_status"] == "running"
 	assert run["status"] == "pending"
@@ -188,7 +191,7 @@ async def test_process_abort():
 	remote_executor = worker_remote_instance._find_executor(run["identifier"])
 
 	await worker_local_instance.receive_update({ "run": run["identifier"], "status": remote_executor.status })
-	await worker_local_instance._process_executor(database_client_instance, local_executor)
+	await worker_local_instance._process_executor(local_executor)
 
 	assert local_executor["local_status"] == "running"
 	assert run["status"] == "running"
@@ -199,34 +202,34 @@ async def test_process_abort():
 	assert run["status"] == "running"
 
 	# running => aborting (_abort_execution)
-	await worker_local_instance._process_executor(database_client_instance, local_executor)
+	await worker_local_instance._process_executor(local_executor)
 
 	assert local_executor["local_status"] == "aborting"
 	assert run["status"] == "running"
 
 	await worker_local_instance.receive_update({ "run": run["identifier"], "status": remote_executor.status })
-	await worker_local_instance._process_executor(database_client_instance, local_executor)
+	await worker_local_instance._process_executor(local_executor)
 
 	assert local_executor["local_status"] == "aborting"
 	assert run["status"] == "aborted"
 
 	# aborting => verifying
-	await worker_local_instance._process_executor(database_client_instance, local_executor)
+	await worker_local_instance._process_executor(local_executor)
 
 	assert local_executor["local_status"] == "verifying"
 	assert run["status"] == "aborted"
 
 	await worker_local_instance.receive_update({ "run": run["identifier"], "event": "synchronization_completed" })
-	await worker_local_instance._process_executor(database_client_instance, local_executor)
+	await worker_local_instance._process_executor(local_executor)
 
 	# verifying => finishing
-	await worker_local_instance._process_executor(database_client_instance, local_executor)
+	await worker_local_instance._process_executor(local_executor)
 
 	assert local_executor["local_status"] == "finishing"
 	assert run["status"] == "aborted"
 
 	# finishing => done (_finish_execution)
-	await worker_local_instance._process_executor(database_client_instance, local_executor)
+	await worker_local_instance._process_executor(local_executor)
 
 	assert local_executor["local_status"] == "done"
 	assert run["status"] == "aborted"
@@ -244,7 +247,7 @@ async def test_process_recovery_during_execution(): # pylint: disable = too-many
 	run_provider_instance = RunProvider(data_storage_instance, date_time_provider_instance)
 	worker_remote_instance = FakeRemoteWorker(worker_storage_instance)
 	worker_messenger = InProcessMessenger(worker_remote_instance._handle_request)
-	worker_local_instance = LocalWorker("my_worker", worker_messenger, lambda: database_client_instance, run_provider_instance, None)
+	worker_local_instance = LocalWorker("my_worker", worker_messenger, DatabaseExecutor(lambda: database_client_instance), run_provider_instance, None)
 
 	job = { "project": "my_project", "identifier": "my_job", "definition": {} }
 	run = run_provider_instance.create(database_client_instance, job["project"], job["identifier"], {}, None)
@@ -255,7 +258,7 @@ async def test_process_recovery_during_execution(): # pylint: disable = too-many
 	assert run["status"] == "pending"
 	assert len(worker_local_instance.executors) == 0
 
-	worker_local_instance.assign_run(job, run)
+	await worker_local_instance.assign_run(job, run)
 	local_executor = worker_local_instance.executors[0]
 
 	assert local_executor["local_status"] == "pending"
@@ -263,7 +266,7 @@ async def test_process_recovery_during_execution(): # pylint: disable = too-many
 	assert len(worker_local_instance.executors) == 1
 
 	# pending => running (_start_execution)
-	await worker_local_instance._process_executor(database_client_instance, local_executor)
+	await worker_local_instance._process_executor(local_executor)
 
 	assert local_executor["local_status"] == "running"
 	assert run["status"] == "pending"
@@ -272,20 +275,20 @@ async def test_process_recovery_during_execution(): # pylint: disable = too-many
 	remote_executor = worker_remote_instance._find_executor(run["identifier"])
 
 	await worker_local_instance.receive_update({ "run": run["identifier"], "status": remote_executor.status })
-	await worker_local_instance._process_executor(database_client_instance, local_executor)
+	await worker_local_instance._process_executor(local_executor)
 
 	assert local_executor["local_status"] == "running"
 	assert run["status"] == "running"
 	assert len(worker_local_instance.executors) == 1
 
 	# New worker to simulate disconnection
-	worker_local_instance = LocalWorker("my_worker", worker_messenger, lambda: database_client_instance, run_provider_instance, None)
+	worker_local_instance = LocalWorker("my_worker", worker_messenger, DatabaseExecutor(lambda: database_client_instance), run_provider_instance, None)
 
 	assert run["status"] == "running"
 	assert len(worker_local_instance.executors) == 0
 
 	# none => running (_recover_execution)
-	worker_local_instance.executors = await worker_local_instance._recover_executors(database_client_instance)
+	worker_local_instance.executors = await worker_local_instance._recover_executors()
 	local_executor = worker_local_instance.executors[0]
 	run = local_executor["run"]
 
@@ -294,7 +297,7 @@ async def test_process_recovery_during_execution(): # pylint: disable = too-many
 	assert len(worker_local_instance.executors) == 1
 
 	await worker_local_instance.receive_update({ "run": run["identifier"], "status": remote_executor.status })
-	await worker_local_instance._process_executor(database_client_instance, local_executor)
+	await worker_local_instance._process_executor(local_executor)
 
 	assert local_executor["local_status"] == "running"
 	assert run["status"] == "running"
@@ -302,28 +305,28 @@ async def test_process_recovery_during_execution(): # pylint: disable = too-many
 	remote_executor.succeed()
 
 	await worker_local_instance.receive_update({ "run": run["identifier"], "status": remote_executor.status })
-	await worker_local_instance._process_executor(database_client_instance, local_executor)
+	await worker_local_instance._process_executor(local_executor)
 
 	assert local_executor["local_status"] == "running"
 	assert run["status"] == "succeeded"
 
 	# running => verifying
-	await worker_local_instance._process_executor(database_client_instance, local_executor)
+	await worker_local_instance._process_executor(local_executor)
 
 	assert local_executor["local_status"] == "verifying"
 	assert run["status"] == "succeeded"
 
 	await worker_local_instance.receive_update({ "run": run["identifier"], "event": "synchronization_completed" })
-	await worker_local_instance._process_executor(database_client_instance, local_executor)
+	await worker_local_instance._process_executor(local_executor)
 
 	# verifying => finishing
-	await worker_local_instance._process_executor(database_client_instance, local_executor)
+	await worker_local_instance._process_executor(local_executor)
 
 	assert local_executor["local_status"] == "finishing"
 	assert run["status"] == "succeeded"
 
 	# finishing => done (_finish_execution)
-	await worker_local_instance._process_executor(database_client_instance, local_executor)
+	await worker_local_instance._process_executor(local_executor)
 
 	assert local_executor["local_status"] == "done"
 	assert run["status"] == "succeeded"
@@ -341,7 +344,7 @@ async def test_process_recovery_after_execution(): # pylint: disable = too-many-
 	run_provider_instance = RunProvider(data_storage_instance, date_time_provider_instance)
 	worker_remote_instance = FakeRemoteWorker(worker_storage_instance)
 	worker_messenger = InProcessMessenger(worker_remote_instance._handle_request)
-	worker_local_instance = LocalWorker("my_worker", worker_messenger, lambda: database_client_instance, run_provider_instance, None)
+	worker_local_instance = LocalWorker("my_worker", worker_messenger, DatabaseExecutor(lambda: database_client_instance), run_provider_instance, None)
 
 	job = { "project": "my_project", "identifier": "my_job", "definition": {} }
 	run = run_provider_instance.create(database_client_instance, job["project"], job["identifier"], {}, None)
@@ -352,7 +355,7 @@ async def test_process_recovery_after_execution(): # pylint: disable = too-many-
 	assert run["status"] == "pending"
 	assert len(worker_local_instance.executors) == 0
 
-	worker_local_instance.assign_run(job, run)
+	await worker_local_instance.assign_run(job, run)
 	local_executor = worker_local_instance.executors[0]
 
 	assert local_executor["local_status"] == "pending"
@@ -360,7 +363,7 @@ async def test_process_recovery_after_execution(): # pylint: disable = too-many-
 	assert len(worker_local_instance.executors) == 1
 
 	# pending => running (_start_execution)
-	await worker_local_instance._process_executor(database_client_instance, local_executor)
+	await worker_local_instance._process_executor(local_executor)
 
 	assert local_executor["local_status"] == "running"
 	assert run["status"] == "pending"
@@ -369,14 +372,14 @@ async def test_process_recovery_after_execution(): # pylint: disable = too-many-
 	remote_executor = worker_remote_instance._find_executor(run["identifier"])
 
 	await worker_local_instance.receive_update({ "run": run["identifier"], "status": remote_executor.status })
-	await worker_local_instance._process_executor(database_client_instance, local_executor)
+	await worker_local_instance._process_executor(local_executor)
 
 	assert local_executor["local_status"] == "running"
 	assert run["status"] == "running"
 	assert len(worker_local_instance.executors) == 1
 
 	# New worker to simulate disconnection
-	worker_local_instance = LocalWorker("my_worker", worker_messenger, lambda: database_client_instance, run_provider_instance, None)
+	worker_local_instance = LocalWorker("my_worker", worker_messenger, DatabaseExecutor(lambda: database_client_instance), run_provider_instance, None)
 
 	assert run["status"] == "running"
 	assert len(worker_local_instance.executors) == 0
@@ -384,36 +387,115 @@ async def test_process_recovery_after_execution(): # pylint: disable = too-many-
 	remote_executor.succeed()
 
 	# none => running (_recover_execution)
-	worker_local_instance.executors = await worker_local_instance._recover_executors(database_client_instance)
+	worker_local_instance.executors = await worker_local_instance._recover_executors()
 	local_executor = worker_local_instance.executors[0]
 	run = local_executor["run"]
 
 	assert local_executor["local_status"] == "running"
 
 	await worker_local_instance.receive_update({ "run": run["identifier"], "status": remote_executor.status })
-	await worker_local_instance._process_executor(database_client_instance, local_executor)
+	await worker_local_instance._process_executor(local_executor)
 
 	assert local_executor["local_status"] == "running"
 	assert run["status"] == "succeeded"
 
 	# running => verifying
-	await worker_local_instance._process_executor(database_client_instance, local_executor)
+	await worker_local_instance._process_executor(local_executor)
 
 	assert local_executor["local_status"] == "verifying"
 	assert run["status"] == "succeeded"
 
 	await worker_local_instance.receive_update({ "run": run["identifier"], "event": "synchronization_completed" })
-	await worker_local_instance._process_executor(database_client_instance, local_executor)
+	await worker_local_instance._process_executor(local_executor)
 
 	# verifying => finishing
-	await worker_local_instance._process_executor(database_client_instance, local_executor)
+	await worker_local_instance._process_executor(local_executor)
 
 	assert local_executor["local_status"] == "finishing"
 	assert run["status"] == "succeeded"
 
 	# finishing => done (_finish_execution)
-	await worker_local_instance._process_executor(database_client_instance, local_executor)
+	await worker_local_instance._process_executor(local_executor)
 
 	assert local_executor["local_status"] == "done"
 	assert run["status"] == "succeeded"
 	assert len(worker_local_instance.executors) == 1
+
+
+async def test_process_update_batch():
+	""" Test processing several updates received for a run with a single database write """
+
+	database_statistics_instance = DatabaseStatistics()
+	database_client_instance = InstrumentedDatabaseClient(MemoryDatabaseClient(), database_statistics_instance)
+	data_storage_instance = MemoryDataStorage()
+	date_time_provider_instance = FakeDateTimeProvider()
+
+	run_provider_instance = RunProvider(data_storage_instance, date_time_provider_instance)
+	worker_local_instance = LocalWorker("my_worker", None, DatabaseExecutor(lambda: database_client_instance), run_provider_instance, None)
+
+	job = { "project": "my_project", "identifier": "my_job", "definition": {} }
+	run = run_provider_instance.create(database_client_instance, job["project"], job["identifier"], {}, None)
+	data_storage_instance.set("projects/my_project/runs/%s/run.log" % run["identifier"], b"")
+
+	local_executor = { "job": job, "run": run, "local_status": "verifying", "synchronization": "unknown", "received_updates": [], "should_abort": False }
+	worker_local_instance.executors.append(local_executor)
+
+	await worker_local_instance.receive_update({ "run": run["identifier"], "status": { "status": "running", "start_date": "2020-01-01T00:00:00Z" } })
+	await worker_local_instance.receive_update({ "run": run["identifier"], "log_chunk": "first\n" })
+	await worker_local_instance.receive_update({ "run": run["identifier"], "results": { "step": 1 } })
+	await worker_local_instance.receive_update({ "run": run["identifier"], "log_chunk": "second\n" })
+	await worker_local_instance.receive_update({ "run": run["identifier"], "results": { "step": 2 } })
+	await worker_local_instance.receive_update({ "run": run["identifier"], "status": { "status": "succeeded", "completion_date": "2020-01-01T00:01:00Z" } })
+	await worker_local_instance.receive_update({ "run": run["identifier"], "event": "synchronization_completed" })
+
+	database_statistics_instance.reset()
+	await worker_local_instance._process_executor(local_executor)
+
+	assert [ (aggregate["operation"], aggregate["call_count"]) for aggregate in database_statistics_instance.get_snapshot() ] == [ ("update_one", 1) ]
+	assert local_executor["synchronization"] == "done"
+	assert len(local_executor["received_updates"]) == 0
+
+	run = run_provider_instance.get(database_client_instance, job["project"], run["identifier"])
+	assert run["status"] == "succeeded"
+	assert run["start_date"] == "2020-01-01T00:00:00Z"
+	assert run["completion_date"] == "2020-01-01T00:01:00Z"
+	assert run_provider_instance.get_results(database_client_instance, job["project"], run["identifier"]) == { "step": 2 }
+	assert run_provider_instance.get_log(job["project"], run["identifier"])[0] == "first\nsecond\n"
+
+
+async def test_process_update_batch_with_event():
+	""" Test events are handled after the updates received before them and before the ones received after them """
+
+	database_statistics_instance = DatabaseStatistics()
+	database_client_instance = InstrumentedDatabaseClient(MemoryDatabaseClient(), database_statistics_instance)
+	data_storage_instance = MemoryDataStorage()
+	date_time_provider_instance = FakeDateTimeProvider()
+
+	run_provider_instance = RunProvider(data_storage_instance, date_time_provider_instance)
+	worker_local_instance = LocalWorker("my_worker", None, DatabaseExecutor(lambda: database_client_instance), run_provider_instance, None)
+
+	job = { "project": "my_project", "identifier": "my_job", "definition": {} }
+	run = run_provider_instance.create(database_client_instance, job["project"], job["identifier"], {}, None)
+
+	local_executor = { "job": job, "run": run, "local_status": "verifying", "synchronization": "unknown", "received_updates": [], "should_abort": False }
+	worker_local_instance.executors.append(local_executor)
+
+	all_event_statuses = []
+	handle_event = worker_local_instance._handle_event
+
+	def record_event(executor, event):
+		all_event_statuses.append((event, executor["run"]["status"]))
+		handle_event(executor, event)
+
+	worker_local_instance._handle_event = record_event
+
+	await worker_local_instance.receive_update({ "run": run["identifier"], "status": { "status": "running" } })
+	await worker_local_instance.receive_update({ "run": run["identifier"], "event": "synchronization_completed" })
+	await worker_local_instance.receive_update({ "run": run["identifier"], "status": { "status": "succeeded" } })
+
+	database_statistics_instance.reset()
+	await worker_local_instance._process_executor(local_executor)
+
+	assert all_event_statuses == [ ("synchronization_completed", "running") ]
+	assert [ (aggregate["operation"], aggregate["call_count"]) for aggregate in database_statistics_instance.get_snapshot() ] == [ ("update_one", 2) ]
+	assert run_provider_instance.get(database_client_instance, job["project"], run["identifier"])["status"] == "succeeded"
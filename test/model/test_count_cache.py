@@ -0,0 +1,34 @@
+""" Unit tests for CountCache """
+
+import datetime
+
+from bhamon_orchestra_model.count_cache import CountCache
+from bhamon_orchestra_model.database.memory_database_client import MemoryDatabaseClient
+
+from ..fakes.fake_date_time_provider import FakeDateTimeProvider
+
+
+def test_count():
+	""" Test counting items with the cache """
+
+	date_time_provider = FakeDateTimeProvider()
+	count_cache = CountCache(date_time_provider, time_to_live = datetime.timedelta(seconds = 10))
+	database_client = MemoryDatabaseClient()
+	table = "record"
+
+	database_client.insert_many(table, [ { "id": 1, "key": "first" }, { "id": 2, "key": "second" } ])
+	assert count_cache.count(database_client, table, {}) == 2
+	assert count_cache.count(database_client, table, { "key": "first" }) == 1
+
+	database_client.insert_one(table, { "id": 3, "key": "first" })
+	assert count_cache.count(database_client, table, {}) == 2
+	assert count_cache.count(database_client, table, { "key": "first" }) == 1
+
+	count_cache.invalidate(table)
+	assert count_cache.count(database_client, table, {}) == 3
+	assert count_cache.count(database_client, table, { "key": "first" }) == 2
+
+	database_client.insert_one(table, { "id": 4, "key": "first" })
+	date_time_provider.now_value += datetime.timedelta(seconds = 20)
+	assert count_cache.count(database_client, table, {}) == 4
+	assert count_cache.count(database_client, table, { "key": "first" }) == 3
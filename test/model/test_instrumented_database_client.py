@@ -0,0 +1,50 @@
+""" Unit tests for InstrumentedDatabaseClient """
+
+import logging
+
+from bhamon_orchestra_model.database.database_statistics import DatabaseStatistics
+from bhamon_orchestra_model.database.instrumented_database_client import InstrumentedDatabaseClient
+from bhamon_orchestra_model.database.memory_database_client import MemoryDatabaseClient
+
+
+def test_statistics():
+	""" Test recording statistics for database operations """
+
+	statistics = DatabaseStatistics()
+	client = InstrumentedDatabaseClient(MemoryDatabaseClient(), statistics)
+	table = "record"
+
+	client.insert_many(table, [ { "id": 1, "key": "first" }, { "id": 2, "key": "second" }, { "id": 3, "key": "first" } ])
+	assert len(client.find_many(table, { "key": "first" })) == 2
+	assert client.find_one(table, { "id": 2 }) is not None
+	assert client.find_one(table, { "id": 4 }) is None
+	assert len(list(client.find_iter(table, {}))) == 3
+	client.update_one(table, { "id": 1 }, { "key": "updated" })
+
+	snapshot = { (aggregate["table"], aggregate["operation"]): aggregate for aggregate in statistics.get_snapshot() }
+
+	assert set(snapshot.keys()) == { (table, "insert_many"), (table, "find_many"), (table, "find_one"), (table, "find_iter"), (table, "update_one") }
+	assert snapshot[(table, "insert_many")]["row_count"] == 3
+	assert snapshot[(table, "find_many")]["row_count"] == 2
+	assert snapshot[(table, "find_one")]["call_count"] == 2
+	assert snapshot[(table, "find_one")]["row_count"] == 1
+	assert snapshot[(table, "find_iter")]["row_count"] == 3
+	assert sum(bucket["count"] for bucket in snapshot[(table, "find_one")]["histogram"]) == 2
+
+	statistics.reset()
+	assert not statistics.get_snapshot()
+
+
+def test_slow_operation(caplog):
+	""" Test logging slow database operations with the shape of their filter """
+
+	statistics = DatabaseStatistics(slow_operation_threshold = 0)
+	client = InstrumentedDatabaseClient(MemoryDatabaseClient(), statistics)
+
+	client.find_many("record", { "key": "secret_value", "id": 1 })
+
+	warning_messages = [ record.getMessage() for record in caplog.records if record.levelno == logging.WARNING ]
+	assert len(warning_messages) == 1
+	assert "find_many on record" in warning_messages[0]
+	assert "['id', 'key']" in warning_messages[0]
+	assert "secret_value" not in warning_messages[0]
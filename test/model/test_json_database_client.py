@@ -0,0 +1,115 @@
+""" Unit tests for JsonDatabaseClient """
+
+import pytest
+
+from bhamon_orchestra_model.database.json_database_administration import JsonDatabaseAdministration
+from bhamon_orchestra_model.database.json_database_client import JsonDatabaseClient
+from bhamon_orchestra_model.database.json_table_cache import JsonTableCache
+from bhamon_orchestra_model.serialization.json_serializer import JsonSerializer
+
+
+def test_cache(tmpdir):
+	""" Test database operations with a cache shared with another process """
+
+	serializer = JsonSerializer(indent = 4)
+	client = JsonDatabaseClient(serializer, str(tmpdir), table_cache = JsonTableCache())
+	other_client = JsonDatabaseClient(serializer, str(tmpdir), table_cache = JsonTableCache())
+	table = "record"
+
+	record = { "id": 1, "key": "value", "data": { "inner_key": "inner_value" } }
+	record_updated = { "id": 1, "key": "value_updated", "data": { "inner_key": "inner_value" } }
+
+	client.insert_one(table, record)
+	assert client.find_one(table, {}) == record
+	assert other_client.find_one(table, {}) == record
+
+	other_client.update_one(table, { "id": 1 }, { "key": "value_updated" })
+	assert client.find_one(table, {}) == record_updated
+
+	result = client.find_one(table, {})
+	result["data"]["inner_key"] = "modified"
+	client.find_many(table, {})[0]["key"] = "modified"
+	assert client.find_one(table, {}) == record_updated
+
+	other_client.delete_one(table, { "id": 1 })
+	assert client.count(table, {}) == 0
+
+
+def test_journal(tmpdir):
+	""" Test database operations with the journal enabled """
+
+	serializer = JsonSerializer(indent = 4)
+	client = JsonDatabaseClient(serializer, str(tmpdir), table_cache = JsonTableCache(), use_journal = True)
+	other_client = JsonDatabaseClient(serializer, str(tmpdir), table_cache = JsonTableCache())
+	table = "record"
+
+	first_record = { "id": 1, "key": "first" }
+	second_record = { "id": 2, "key": "second" }
+	second_record_updated = { "id": 2, "key": "second_updated" }
+	third_record = { "id": 3, "key": "third" }
+
+	client.insert_many(table, [ first_record, second_record ])
+	client.insert_one(table, third_record)
+	client.update_one(table, { "id": 2 }, { "key": "second_updated" })
+	client.delete_one(table, { "id": 1 })
+
+	assert not tmpdir.join(table + ".json").exists()
+	assert tmpdir.join(table + ".journal").exists()
+	assert client.find_many(table, {}) == [ second_record_updated, third_record ]
+	assert other_client.find_many(table, {}) == [ second_record_updated, third_record ]
+
+	client.compact(table)
+
+	assert not tmpdir.join(table + ".journal").exists()
+	assert serializer.deserialize_from_file(str(tmpdir.join(table + ".json"))) == [ second_record_updated, third_record ]
+
+	client.delete_one(table, { "id": 2 })
+	other_client.insert_one(table, first_record)
+
+	assert client.find_many(table, {}) == [ third_record, first_record ]
+	assert other_client.find_many(table, {}) == [ third_record, first_record ]
+
+
+def test_journal_compaction(tmpdir):
+	""" Test the journal is merged into the table file when it reaches its size limit """
+
+	serializer = JsonSerializer(indent = 4)
+	client = JsonDatabaseClient(serializer, str(tmpdir), table_cache = JsonTableCache(), use_journal = True)
+	client.journal_size_limit = 1024
+	table = "record"
+
+	for identifier in range(100):
+		client.insert_one(table, { "id": identifier, "key": "value" })
+
+	assert tmpdir.join(table + ".json").exists()
+	assert client.count(table, {}) == 100
+	assert JsonDatabaseClient(serializer, str(tmpdir), table_cache = JsonTableCache()).count(table, {}) == 100
+
+
+def test_unique_index(tmpdir):
+	""" Test unique index enforcement when inserting records """
+
+	serializer = JsonSerializer(indent = 4)
+	administration = JsonDatabaseAdministration(serializer, str(tmpdir))
+	client = JsonDatabaseClient(serializer, str(tmpdir), table_cache = JsonTableCache())
+	table = "record"
+
+	administration.create_index(table, "id_unique", [ ("id", "ascending") ], is_unique = True)
+
+	first_record = { "id": 1, "key": "first" }
+	second_record = { "id": 2, "key": "second" }
+	third_record = { "id": 3, "key": "third" }
+
+	client.insert_many(table, [ first_record, second_record ])
+
+	with pytest.raises(ValueError, match = "Duplicate key"):
+		client.insert_one(table, first_record)
+	with pytest.raises(ValueError, match = "Duplicate key"):
+		client.insert_many(table, [ third_record, second_record ])
+	with pytest.raises(ValueError, match = "Duplicate key"):
+		client.insert_many(table, [ third_record, third_record ])
+
+	assert client.find_many(table, {}) == [ first_record, second_record ]
+
+	client.insert_many(table, [ third_record ])
+	assert client.count(table, {}) == 3
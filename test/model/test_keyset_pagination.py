@@ -0,0 +1,29 @@
+""" Unit tests for keyset pagination """
+
+import pytest
+
+from bhamon_orchestra_model import keyset_pagination
+
+
+def test_complete_order_by():
+	""" Test completing an order-by expression with the unique keys """
+
+	assert keyset_pagination.complete_order_by(None, [ "identifier" ]) is None
+	assert keyset_pagination.complete_order_by([], [ "identifier" ]) == []
+	assert keyset_pagination.complete_order_by([ ("date", "descending") ], [ "identifier" ]) == [ ("date", "descending"), ("identifier", "ascending") ]
+	assert keyset_pagination.complete_order_by([ ("identifier", "descending") ], [ "identifier" ]) == [ ("identifier", "descending") ]
+
+
+def test_continuation_token():
+	""" Test creating and parsing continuation tokens """
+
+	item = { "identifier": "abc", "date": None, "status": "pending" }
+	order_by = [ ("date", "descending"), ("identifier", "ascending") ]
+
+	continuation_token = keyset_pagination.create_continuation_token(item, order_by)
+	assert keyset_pagination.parse_continuation_token(continuation_token) == { "date": None, "identifier": "abc" }
+
+	with pytest.raises(ValueError):
+		keyset_pagination.parse_continuation_token("invalid")
+	with pytest.raises(ValueError):
+		keyset_pagination.parse_continuation_token(keyset_pagination.create_continuation_token({}, [])[:-1] + "!")
@@ -1,5 +1,11 @@
 """ Unit tests for MemoryDatabaseClient """
 
+import copy
+import datetime
+import json
+
+import pytest
+
 from bhamon_orchestra_model.database.memory_database_client import MemoryDatabaseClient
 
 
@@ -44,3 +50,244 @@ def test_many():
 	client.delete_one(table, third_record)
 	assert client.find_many(table, {}) == [ first_record, second_record ]
 	assert client.count(table, {}) == 2
+
+
+def test_find_iter():
+	""" Test iterating over records """
+
+	client = MemoryDatabaseClient()
+	table = "record"
+
+	all_records = [ { "id": index, "key": "value_%s" % (index % 3) } for index in range(10) ]
+	client.insert_many(table, all_records)
+
+	iterator = client.find_iter(table, {}, batch_size = 3)
+	client.delete_many(table, {})
+
+	assert list(iterator) == all_records
+
+	client.insert_many(table, all_records)
+
+	assert list(client.find_iter(table, { "key": "value_1" })) == client.find_many(table, { "key": "value_1" })
+	assert list(client.find_iter(table, {}, skip = 2, limit = 5, order_by = [ ("key", "descending") ])) \
+		== client.find_many(table, {}, skip = 2, limit = 5, order_by = [ ("key", "descending") ])
+
+
+def test_fields():
+	""" Test selecting fields from records """
+
+	client = MemoryDatabaseClient()
+	table = "record"
+
+	client.insert_many(table, [ { "id": 1, "key": "first", "data": { "value": 1 } }, { "id": 2, "key": "second" } ])
+
+	assert client.find_one(table, { "id": 1 }, fields = [ "id", "data" ]) == { "id": 1, "data": { "value": 1 } }
+	assert client.find_many(table, {}, fields = [ "id", "data" ]) == [ { "id": 1, "data": { "value": 1 } }, { "id": 2 } ]
+	assert list(client.find_iter(table, {}, fields = [ "key" ])) == [ { "key": "first" }, { "key": "second" } ]
+
+
+def test_start_after():
+	""" Test finding records after a position in the order """
+
+	client = MemoryDatabaseClient()
+	table = "record"
+
+	client.insert_many(table, [ { "id": 1, "key": "b" }, { "id": 2, "key": None }, { "id": 3, "key": "a" }, { "id": 4, "key": "b" } ])
+
+	order_by = [ ("key", "ascending"), ("id", "ascending") ]
+	all_rows = client.find_many(table, {}, limit = 2, order_by = order_by, start_after = { "key": "a", "id": 3 })
+	assert all_rows == [ { "id": 1, "key": "b" }, { "id": 4, "key": "b" } ]
+	all_rows = client.find_many(table, {}, order_by = order_by, start_after = { "key": None, "id": 2 })
+	assert all_rows == [ { "id": 3, "key": "a" }, { "id": 1, "key": "b" }, { "id": 4, "key": "b" } ]
+
+	order_by = [ ("key", "descending"), ("id", "descending") ]
+	assert list(client.find_iter(table, {}, order_by = order_by, start_after = { "key": "b", "id": 1 })) == [ { "id": 3, "key": "a" }, { "id": 2, "key": None } ]
+
+	with pytest.raises(ValueError):
+		client.find_many(table, {}, start_after = { "id": 1 })
+	with pytest.raises(ValueError):
+		client.find_many(table, {}, order_by = order_by, start_after = { "id": 1 })
+
+
+def test_order_by():
+	""" Test sorting records with several keys, with and without a limit """
+
+	client = MemoryDatabaseClient()
+	table = "record"
+
+	client.insert_many(table, [ { "id": index, "key": "abc"[index % 3], "data": { "value": index % 2 } } for index in range(20) ])
+	client.insert_one(table, { "id": 20 })
+
+	order_by = [ ("key", "descending"), ("data.value", "ascending"), ("id", "descending") ]
+	all_records = client.find_many(table, {}, order_by = order_by)
+
+	expected_records = sorted(client.find_many(table, {}), key = lambda record: -record["id"])
+	expected_records = sorted(expected_records, key = lambda record: record.get("data", {}).get("value", -1))
+	expected_records = sorted(expected_records, key = lambda record: record.get("key", ""), reverse = True)
+
+	assert all_records == expected_records
+	assert all_records[-1] == { "id": 20 }
+	assert client.find_many(table, {}, limit = 3, order_by = order_by) == expected_records[:3]
+	assert client.find_many(table, {}, skip = 2, limit = 3, order_by = order_by) == expected_records[2:5]
+	assert [ record["id"] for record in client.find_many(table, {}, limit = 3, order_by = [ ("id", "descending") ]) ] == [ 20, 19, 18 ]
+
+
+def test_isolation():
+	""" Test items returned by reads cannot change the stored records, and neither can the items provided to writes """
+
+	client = MemoryDatabaseClient()
+	table = "record"
+
+	record = { "id": 1, "data": { "values": [ 1, 2 ] } }
+	client.insert_one(table, record)
+	record["data"]["values"].append(3)
+
+	result = client.find_one(table, { "id": 1 })
+	assert result == { "id": 1, "data": { "values": [ 1, 2 ] } }
+	assert json.dumps(result) == json.dumps({ "id": 1, "data": { "values": [ 1, 2 ] } })
+
+	result["id"] = 2
+	with pytest.raises(TypeError):
+		result["data"]["key"] = "value"
+	with pytest.raises(TypeError):
+		result["data"]["values"].append(3)
+
+	result_copy = copy.deepcopy(client.find_one(table, { "id": 1 }))
+	result_copy["data"]["values"].append(3)
+	assert client.find_one(table, { "id": 1 }) == { "id": 1, "data": { "values": [ 1, 2 ] } }
+
+	all_results = client.find_iter(table, {})
+	update_data = { "data": { "values": [ 4 ] } }
+	client.update_one(table, { "id": 1 }, update_data)
+	update_data["data"]["values"].append(5)
+
+	assert list(all_results) == [ { "id": 1, "data": { "values": [ 1, 2 ] } } ]
+	assert client.find_one(table, { "id": 1 }) == { "id": 1, "data": { "values": [ 4 ] } }
+
+
+def test_read_sharing():
+	""" Test reading records shares their nested values between reads, rather than copying them, since they cannot be modified """
+
+	client = MemoryDatabaseClient()
+	table = "run"
+
+	now = datetime.datetime.now()
+	steps = [ { "index": index, "name": "step_%s" % index, "status": "succeeded" } for index in range(5) ]
+	results = { "artifacts": [ { "name": "artifact_%s" % index, "path": "path/%s" % index } for index in range(10) ] }
+	all_runs = [ { "project": "project", "identifier": str(index), "creation_date": now, "steps": steps, "results": results } for index in range(10) ]
+	client.insert_many(table, all_runs)
+
+	first_results = client.find_many(table, {})
+	second_results = client.find_many(table, {})
+
+	assert first_results == all_runs
+	assert first_results[0] is not second_results[0]
+	assert first_results[0]["steps"] is second_results[0]["steps"]
+	assert first_results[0]["results"]["artifacts"] is second_results[0]["results"]["artifacts"]
+
+	with pytest.raises(TypeError):
+		first_results[0]["steps"][0]["status"] = "failed"
+	with pytest.raises(TypeError):
+		first_results[0]["results"]["artifacts"].append({ "name": "artifact", "path": "path" })
+
+
+def test_bulk():
+	""" Test database bulk operations """
+
+	client = MemoryDatabaseClient()
+	table = "record"
+
+	client.insert_many(table, [ { "id": 1, "key": "first" }, { "id": 2, "key": "second" }, { "id": 3, "key": "first" } ])
+
+	client.update_many(table, { "key": "first" }, { "key": "updated" })
+	assert client.find_many(table, {}) == [ { "id": 1, "key": "updated" }, { "id": 2, "key": "second" }, { "id": 3, "key": "updated" } ]
+
+	client.upsert_one(table, { "id": 2 }, { "key": "upserted" }, { "created": True })
+	client.upsert_one(table, { "id": 4 }, { "key": "upserted" }, { "created": True })
+	assert client.find_one(table, { "id": 2 }) == { "id": 2, "key": "upserted" }
+	assert client.find_one(table, { "id": 4 }) == { "id": 4, "key": "upserted", "created": True }
+
+	client.delete_many(table, { "key": "upserted" })
+	assert client.find_many(table, {}) == [ { "id": 1, "key": "updated" }, { "id": 3, "key": "updated" } ]
+
+	client.delete_many(table, {})
+	assert client.count(table, {}) == 0
+
+
+def test_increment():
+	""" Test database increment operations """
+
+	client = MemoryDatabaseClient()
+	table = "record"
+
+	record = client.increment_one(table, { "id": 1 }, { "total": 1, "counts.first": 1 }, { "key": "inserted" }, { "created": True })
+	assert record == { "id": 1, "key": "inserted", "created": True, "total": 1, "counts": { "first": 1 } }
+
+	record = client.increment_one(table, { "id": 1 }, { "total": 1, "counts.first": -1, "counts.second": 2 }, { "key": "updated" }, { "created": False })
+	assert record == { "id": 1, "key": "updated", "created": True, "total": 2, "counts": { "first": 0, "second": 2 } }
+	assert client.find_one(table, { "id": 1 }) == record
+
+	with pytest.raises(ValueError):
+		client.increment_one(table, { "id": 1 }, { "counts.first.inner": 1 })
+
+
+def test_index():
+	""" Test database operations on a table with indexes """
+
+	client = MemoryDatabaseClient(index_collection = [])
+	table = "record"
+
+	client.create_index(table, "id_unique", [ ("id", "ascending") ], is_unique = True)
+	client.create_index(table, "key", [ ("key", "ascending") ])
+
+	first_record = { "id": 1, "key": "aaa" }
+	second_record = { "id": 2, "key": "bbb" }
+	third_record = { "id": 3, "key": "aaa" }
+
+	client.insert_many(table, [ first_record, second_record, third_record ])
+	assert client.count(table, { "key": "aaa" }) == 2
+	assert client.find_one(table, { "id": 2 }) == second_record
+	assert client.find_many(table, { "key": "aaa" }) == [ first_record, third_record ]
+	assert client.find_many(table, {}, order_by = [ ("key", "descending") ]) == [ second_record, first_record, third_record ]
+	assert client.find_many(table, {}, skip = 1, limit = 1, order_by = [ ("key", "ascending") ]) == [ third_record ]
+
+	with pytest.raises(ValueError):
+		client.insert_one(table, first_record)
+	with pytest.raises(ValueError):
+		client.insert_many(table, [ { "id": 4, "key": "ccc" }, { "id": 4, "key": "ddd" } ])
+	assert client.count(table, {}) == 3
+
+	client.update_one(table, { "id": 1 }, { "key": "ccc" })
+	assert client.find_many(table, { "key": "aaa" }) == [ third_record ]
+	assert client.find_many(table, { "key": "ccc" }) == [ { "id": 1, "key": "ccc" } ]
+	assert client.find_many(table, {}, order_by = [ "key" ]) == [ third_record, second_record, { "id": 1, "key": "ccc" } ]
+
+	client.delete_one(table, { "key": "aaa" })
+	assert client.count(table, { "key": "aaa" }) == 0
+	assert client.find_one(table, { "id": 3 }) is None
+	assert client.count(table, {}) == 2
+
+
+def test_watch():
+	""" Test watching changes to a table """
+
+	table = "record"
+	client = MemoryDatabaseClient()
+	all_changes = []
+
+	with client.watch(table, { "key": "aaa" }, all_changes.append):
+		client.insert_one(table, { "id": 1, "key": "aaa" })
+		client.insert_one(table, { "id": 2, "key": "bbb" })
+		client.update_one(table, { "id": 2 }, { "key": "aaa" })
+		client.update_one(table, { "id": 1 }, { "key": "ccc" })
+		client.insert_one("other", { "id": 1, "key": "aaa" })
+		client.delete_many(table, { "key": "aaa" })
+
+		assert all_changes == [
+			{ "table": table, "operation": "insert" },
+			{ "table": table, "operation": "update" },
+			{ "table": table, "operation": "delete" },
+		]
+
+	client.insert_one(table, { "id": 3, "key": "aaa" })
+	assert len(all_changes) == 3
@@ -0,0 +1,74 @@
+""" Unit tests for RecordCache """
+
+import datetime
+
+from bhamon_orchestra_model.database.database_statistics import DatabaseStatistics
+from bhamon_orchestra_model.database.instrumented_database_client import InstrumentedDatabaseClient
+from bhamon_orchestra_model.database.memory_database_client import MemoryDatabaseClient
+from bhamon_orchestra_model.job_provider import JobProvider
+from bhamon_orchestra_model.record_cache import RecordCache
+
+from ..fakes.fake_date_time_provider import FakeDateTimeProvider
+
+
+def test_find():
+	""" Test finding records with the cache """
+
+	date_time_provider = FakeDateTimeProvider()
+	record_cache = RecordCache(date_time_provider, time_to_live = datetime.timedelta(seconds = 10))
+	database_client = MemoryDatabaseClient()
+	table = "record"
+
+	database_client.insert_many(table, [ { "id": 1, "key": "first" }, { "id": 2, "key": "second" } ])
+	assert record_cache.find_one(database_client, table, { "id": 1 }) == { "id": 1, "key": "first" }
+	assert record_cache.find_many(database_client, table, {}, order_by = [ ("id", "ascending") ]) == [ { "id": 1, "key": "first" }, { "id": 2, "key": "second" } ]
+
+	database_client.update_one(table, { "id": 1 }, { "key": "updated" })
+	assert record_cache.find_one(database_client, table, { "id": 1 }) == { "id": 1, "key": "first" }
+	assert len(record_cache.find_many(database_client, table, {}, order_by = [ ("id", "ascending") ])) == 2
+
+	record_cache.invalidate(table)
+	assert record_cache.find_one(database_client, table, { "id": 1 }) == { "id": 1, "key": "updated" }
+
+	database_client.insert_one(table, { "id": 3, "key": "third" })
+	date_time_provider.now_value += datetime.timedelta(seconds = 20)
+	assert len(record_cache.find_many(database_client, table, {}, order_by = [ ("id", "ascending") ])) == 3
+
+	assert record_cache.find_one(database_client, table, { "id": 4 }) is None
+	database_client.insert_one(table, { "id": 4, "key": "fourth" })
+	assert record_cache.find_one(database_client, table, { "id": 4 }) == { "id": 4, "key": "fourth" }
+
+
+def test_isolation():
+	""" Test records returned from the cache can be modified without changing the cached ones """
+
+	record_cache = RecordCache(FakeDateTimeProvider())
+	database_client = MemoryDatabaseClient()
+	table = "record"
+
+	database_client.insert_one(table, { "id": 1, "data": { "key": "value" } })
+
+	record = record_cache.find_one(database_client, table, { "id": 1 })
+	record["data"] = { "key": "modified" }
+	assert record_cache.find_one(database_client, table, { "id": 1 }) == { "id": 1, "data": { "key": "value" } }
+
+
+def test_provider():
+	""" Test a provider reads through the cache and invalidates it when writing """
+
+	date_time_provider = FakeDateTimeProvider()
+	database_statistics = DatabaseStatistics()
+	database_client = InstrumentedDatabaseClient(MemoryDatabaseClient(), database_statistics)
+	job_provider = JobProvider(date_time_provider, RecordCache(date_time_provider))
+
+	job_provider.create_or_update(database_client, "my_job", "my_project", "My Job", "", {}, [], {})
+	job = job_provider.get(database_client, "my_project", "my_job")
+	assert job["is_enabled"]
+
+	database_statistics.reset()
+	for _ in range(10):
+		assert job_provider.get(database_client, "my_project", "my_job")["is_enabled"]
+	assert not database_statistics.get_snapshot()
+
+	job_provider.update_status(database_client, job, is_enabled = False)
+	assert not job_provider.get(database_client, "my_project", "my_job")["is_enabled"]
@@ -0,0 +1,99 @@
+""" Unit tests for RevisionStatusProvider """
+
+from bhamon_orchestra_model.database.memory_database_client import MemoryDatabaseClient
+from bhamon_orchestra_model.database.memory_data_storage import MemoryDataStorage
+from bhamon_orchestra_model.revision_status_provider import RevisionStatusProvider, compute_revision_status
+from bhamon_orchestra_model.run_provider import RunProvider
+
+from ..fakes.fake_date_time_provider import FakeDateTimeProvider
+
+
+def test_update_from_runs():
+	""" Test maintaining the revision status when runs change """
+
+	database_client = MemoryDatabaseClient()
+	date_time_provider = FakeDateTimeProvider()
+	revision_status_provider = RevisionStatusProvider(date_time_provider)
+	run_provider = RunProvider(MemoryDataStorage(), date_time_provider, revision_status_provider = revision_status_provider)
+	results = { "revision_control": { "revision": "abc" } }
+
+	first_run = run_provider.create(database_client, "my_project", "my_job", {}, None)
+	second_run = run_provider.create(database_client, "my_project", "my_job", {}, None)
+	assert revision_status_provider.get(database_client, "my_project", "abc") is None
+
+	run_provider.update_status(database_client, first_run, status = "running", results = results)
+	run_provider.set_results(database_client, second_run, results)
+	revision_status = revision_status_provider.get(database_client, "my_project", "abc")
+	assert revision_status["status_counts"] == { "running": 1, "pending": 1 }
+	assert revision_status["status"] == "pending"
+
+	run_provider.update_status(database_client, first_run, status = "succeeded", results = results)
+	run_provider.update_status(database_client, { "project": "my_project", "identifier": second_run["identifier"] }, should_cancel = True)
+	run_provider.cancel_pending(database_client)
+	revision_status = revision_status_provider.get(database_client, "my_project", "abc")
+	assert revision_status["status_counts"] == { "succeeded": 1, "cancelled": 1 }
+	assert revision_status["status"] == "unknown"
+
+	run_provider.archive(database_client, "my_project", second_run["identifier"])
+	revision_status = revision_status_provider.get(database_client, "my_project", "abc")
+	assert revision_status["status_counts"] == { "succeeded": 1 }
+	assert revision_status["status"] == "succeeded"
+
+	run_provider.set_results(database_client, first_run, { "revision_control": { "revision": "def" } })
+	assert revision_status_provider.get(database_client, "my_project", "abc") is None
+	assert revision_status_provider.get(database_client, "my_project", "def")["status_counts"] == { "succeeded": 1 }
+
+
+def test_update_from_several_processes():
+	""" Test the revision status stays consistent when runs are changed by providers from several processes """
+
+	database_client = MemoryDatabaseClient()
+	date_time_provider = FakeDateTimeProvider()
+	first_run_provider = RunProvider(MemoryDataStorage(), date_time_provider, revision_status_provider = RevisionStatusProvider(date_time_provider))
+	second_run_provider = RunProvider(MemoryDataStorage(), date_time_provider, revision_status_provider = RevisionStatusProvider(date_time_provider))
+	results = { "revision_control": { "revision": "abc" } }
+
+	first_run = first_run_provider.create(database_client, "my_project", "my_job", {}, None)
+	second_run = second_run_provider.create(database_client, "my_project", "my_job", {}, None)
+	first_run_provider.update_status(database_client, first_run, status = "succeeded", results = results)
+	second_run_provider.update_status(database_client, second_run, status = "failed", results = results)
+	second_run_provider.archive(database_client, "my_project", first_run["identifier"])
+
+	revision_status = first_run_provider.revision_status_provider.get(database_client, "my_project", "abc")
+	assert revision_status["status_counts"] == { "failed": 1 }
+	assert revision_status["status"] == "failed"
+
+
+def test_rebuild():
+	""" Test rebuilding the revision status from the runs, after they were changed without the provider """
+
+	database_client = MemoryDatabaseClient()
+	date_time_provider = FakeDateTimeProvider()
+	revision_status_provider = RevisionStatusProvider(date_time_provider)
+	run_provider = RunProvider(MemoryDataStorage(), date_time_provider, revision_status_provider = revision_status_provider)
+
+	first_run = run_provider.create(database_client, "my_project", "my_job", {}, None)
+	second_run = run_provider.create(database_client, "my_other_project", "my_job", {}, None)
+	run_provider.update_status(database_client, first_run, status = "succeeded", results = { "revision_control": { "revision": "abc" } })
+	run_provider.update_status(database_client, second_run, status = "succeeded", results = { "revision_control": { "revision": "def" } })
+
+	database_client.update_one("run", { "identifier": first_run["identifier"] }, { "revision": "ghi" })
+	database_client.update_one("run", { "identifier": second_run["identifier"] }, { "status": "failed" })
+
+	assert revision_status_provider.rebuild(database_client, project = "my_project") == 1
+	assert revision_status_provider.get(database_client, "my_project", "abc") is None
+	assert revision_status_provider.get(database_client, "my_project", "ghi")["status_counts"] == { "succeeded": 1 }
+	assert revision_status_provider.get(database_client, "my_other_project", "def")["status"] == "succeeded"
+
+	assert revision_status_provider.rebuild(database_client) == 2
+	assert revision_status_provider.get(database_client, "my_other_project", "def")["status"] == "failed"
+
+
+def test_compute_status():
+	""" Test computing the aggregate status of a revision """
+
+	assert compute_revision_status({}) == "unknown"
+	assert compute_revision_status({ "succeeded": 2 }) == "succeeded"
+	assert compute_revision_status({ "succeeded": 2, "running": 1 }) == "pending"
+	assert compute_revision_status({ "exception": 1, "running": 1 }) == "failed"
+	assert compute_revision_status({ "succeeded": 1, "cancelled": 1 }) == "unknown"
@@ -0,0 +1,54 @@
+""" Unit tests for RunProvider """
+
+from bhamon_orchestra_model.database.memory_database_client import MemoryDatabaseClient
+from bhamon_orchestra_model.database.memory_data_storage import MemoryDataStorage
+from bhamon_orchestra_model.run_provider import RunProvider, get_revision_from_results
+
+from ..fakes.fake_date_time_provider import FakeDateTimeProvider
+
+
+def test_revision():
+	""" Test saving the revision from the run results and querying runs by revision """
+
+	database_client = MemoryDatabaseClient()
+	run_provider = RunProvider(MemoryDataStorage(), FakeDateTimeProvider())
+
+	first_run = run_provider.create(database_client, "my_project", "my_job", { "revision": "main" }, None)
+	second_run = run_provider.create(database_client, "my_project", "my_job", { "revision": "main" }, None)
+	third_run = run_provider.create(database_client, "my_project", "my_job", { "revision": "main" }, None)
+
+	assert first_run["revision"] is None
+	assert not list(run_provider.iterate_as_documents(database_client, project = "my_project", revision = "abc"))
+
+	run_provider.update_status(database_client, first_run, status = "running", results = { "revision_control": { "revision": "abc" } })
+	run_provider.set_results(database_client, second_run, { "revision_control": { "revision": "abc" } })
+	run_provider.set_results(database_client, third_run, { "revision_control": { "revision": "def" } })
+
+	revision_runs = run_provider.get_list_as_documents(database_client, project = "my_project", revision = "abc", order_by = [ ("identifier", "ascending") ])
+	assert [ run["identifier"] for run in revision_runs ] == sorted([ first_run["identifier"], second_run["identifier"] ])
+	assert run_provider.get_list_as_documents(database_client, revision = "def")[0]["identifier"] == third_run["identifier"]
+
+	run_provider.update_status(database_client, first_run, status = "succeeded")
+	assert database_client.find_one("run", { "identifier": first_run["identifier"] })["revision"] == "abc"
+
+	run_provider.set_results(database_client, third_run, {})
+	assert third_run["revision"] is None
+	assert not run_provider.get_list_as_documents(database_client, revision = "def")
+
+
+def test_revision_from_results():
+	""" Test getting the revision from run results missing it or holding invalid values """
+
+	assert get_revision_from_results({ "revision_control": { "revision": "abc" } }) == "abc"
+	assert get_revision_from_results(None) is None
+	assert get_revision_from_results({}) is None
+	assert get_revision_from_results({ "revision_control": None }) is None
+	assert get_revision_from_results({ "revision_control": { "revision": None } }) is None
+	assert get_revision_from_results({ "revision_control": { "revision": 123 } }) is None
+
+	database_client = MemoryDatabaseClient()
+	run_provider = RunProvider(MemoryDataStorage(), FakeDateTimeProvider())
+
+	run = run_provider.create(database_client, "my_project", "my_job", {}, None)
+	run_provider.set_results(database_client, run, { "revision_control": None })
+	assert run["revision"] is None
@@ -0,0 +1,92 @@
+""" Unit tests for RunRetention """
+
+import datetime
+
+from bhamon_orchestra_model.database.memory_database_client import MemoryDatabaseClient
+from bhamon_orchestra_model.database.memory_data_storage import MemoryDataStorage
+from bhamon_orchestra_model.job_provider import JobProvider
+from bhamon_orchestra_model.run_provider import RunProvider
+from bhamon_orchestra_model.run_retention import RunRetention
+from bhamon_orchestra_model.schedule_provider import ScheduleProvider
+
+from ..fakes.fake_date_time_provider import FakeDateTimeProvider
+
+
+def create_retention(date_time_provider, data_storage, **keyword_arguments):
+	job_provider = JobProvider(date_time_provider)
+	run_provider = RunProvider(data_storage, date_time_provider)
+	schedule_provider = ScheduleProvider(date_time_provider)
+	return RunRetention(job_provider, run_provider, schedule_provider, date_time_provider, **keyword_arguments)
+
+
+def create_runs(database_client, run_retention, project, job, run_count):
+	all_runs = []
+
+	for run_index in range(run_count): # pylint: disable = unused-variable
+		run = run_retention.run_provider.create(database_client, project, job, {}, None)
+		run_retention.run_provider.update_status(database_client, run, status = "succeeded")
+		all_runs.append(run)
+		run_retention.date_time_provider.now_value += datetime.timedelta(days = 1)
+
+	return all_runs
+
+
+def test_run_limit():
+	""" Test archiving runs exceeding the run limit """
+
+	database_client = MemoryDatabaseClient()
+	data_storage = MemoryDataStorage()
+	date_time_provider = FakeDateTimeProvider()
+	run_retention = create_retention(date_time_provider, data_storage, default_policy = { "run_limit": 2 })
+
+	run_retention.job_provider.create_or_update(database_client, "my_job", "my_project", "My Job", "", {}, [], {})
+	all_runs = create_runs(database_client, run_retention, "my_project", "my_job", 5)
+	all_runs[-1]["status"] = "running"
+	run_retention.run_provider.update_status(database_client, all_runs[-1], status = "running")
+
+	log_key = "projects/my_project/runs/%s/run.log" % all_runs[0]["identifier"]
+	data_storage.set(log_key, b"my log")
+
+	all_archived_runs = run_retention.apply(database_client, simulate = True)
+	assert [ run["identifier"] for run in all_archived_runs ] == [ run["identifier"] for run in reversed(all_runs[:3]) ]
+	assert run_retention.run_provider.count(database_client) == 5
+
+	all_archived_runs = run_retention.apply(database_client, limit = 2)
+	assert [ run["identifier"] for run in all_archived_runs ] == [ all_runs[2]["identifier"], all_runs[1]["identifier"] ]
+	assert run_retention.run_provider.count(database_client) == 3
+
+	all_archived_runs = run_retention.apply(database_client)
+	assert [ run["identifier"] for run in all_archived_runs ] == [ all_runs[0]["identifier"] ]
+	assert [ run["identifier"] for run in run_retention.run_provider.get_list(database_client) ] == [ run["identifier"] for run in all_runs[3:] ]
+	assert run_retention.run_provider.get_archived(database_client, "my_project", all_runs[0]["identifier"])["status"] == "succeeded"
+
+	assert data_storage.get(log_key) is None
+	assert run_retention.run_provider.get_log("my_project", all_runs[0]["identifier"])[0] == "my log"
+
+	assert not run_retention.apply(database_client)
+
+
+def test_age_limit():
+	""" Test archiving runs exceeding the age limit, with policies for projects and jobs """
+
+	database_client = MemoryDatabaseClient()
+	data_storage = MemoryDataStorage()
+	date_time_provider = FakeDateTimeProvider()
+	run_retention = create_retention(date_time_provider, data_storage, project_policies = { "my_project": { "age_limit_days": 2 } }, delete_logs = True)
+
+	run_retention.job_provider.create_or_update(database_client, "my_job", "my_project", "My Job", "", {}, [], {})
+	run_retention.job_provider.create_or_update(database_client, "my_other_job", "my_project", "My Other Job", "", {}, [], { "retention": {} })
+	all_runs = create_runs(database_client, run_retention, "my_project", "my_job", 4)
+	all_other_runs = create_runs(database_client, run_retention, "my_project", "my_other_job", 4)
+
+	log_key = "projects/my_project/runs/%s/run.log" % all_runs[0]["identifier"]
+	data_storage.set(log_key, b"my log")
+
+	run_retention.schedule_provider.create_or_update(database_client, "my_schedule", "my_project", "My Schedule", "my_job", {}, "0 * * * *")
+	schedule = run_retention.schedule_provider.get(database_client, "my_project", "my_schedule")
+	run_retention.schedule_provider.update_status(database_client, schedule, last_run = all_runs[1]["identifier"])
+
+	all_archived_runs = run_retention.apply(database_client)
+	assert [ run["identifier"] for run in all_archived_runs ] == [ run["identifier"] for run in reversed(all_runs) if run is not all_runs[1] ]
+	assert run_retention.run_provider.count(database_client) == 1 + len(all_other_runs)
+	assert run_retention.run_provider.get_log("my_project", all_runs[0]["identifier"])[0] == ""
@@ -0,0 +1,42 @@
+""" Unit tests for SqlDatabaseClient """
+
+import os
+
+import sqlalchemy.schema
+import sqlalchemy.types
+
+from bhamon_orchestra_model.database.sql_database_client_factory import SqlDatabaseClientFactory
+
+
+def create_database_metadata():
+	metadata = sqlalchemy.schema.MetaData()
+
+	sqlalchemy.schema.Table("record", metadata,
+		sqlalchemy.schema.Column("id", sqlalchemy.types.Integer, nullable = False),
+		sqlalchemy.schema.Column("key", sqlalchemy.types.String, nullable = True),
+		sqlalchemy.schema.Column("total", sqlalchemy.types.Integer, nullable = False),
+		sqlalchemy.schema.Column("counts", sqlalchemy.types.JSON, nullable = False),
+		sqlalchemy.schema.PrimaryKeyConstraint("id"),
+	)
+
+	return metadata
+
+
+def test_sqlite_increment(tmpdir):
+	""" Test incrementing columns and inner json values, from several clients """
+
+	database_uri = "sqlite:///" + os.path.join(str(tmpdir), "database.sqlite")
+	factory = SqlDatabaseClientFactory(database_uri, create_database_metadata())
+	factory.metadata.create_all(factory.engine)
+
+	try:
+		with factory() as first_database_client, factory() as second_database_client:
+			record = first_database_client.increment_one("record", { "id": 1 }, { "total": 1, "counts.first": 1 }, { "key": "inserted" })
+			assert record == { "id": 1, "key": "inserted", "total": 1, "counts": { "first": 1 } }
+
+			second_database_client.increment_one("record", { "id": 1 }, { "total": 1, "counts.first": -1, "counts.second": 2 }, { "key": "updated" })
+			record = first_database_client.increment_one("record", { "id": 1 }, { "total": 1, "counts.second": 1 })
+			assert record == { "id": 1, "key": "updated", "total": 3, "counts": { "first": 0, "second": 3 } }
+
+	finally:
+		factory.dispose()
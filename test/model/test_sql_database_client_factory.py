@@ -0,0 +1,98 @@
+""" Unit tests for SqlDatabaseClientFactory """
+
+import os
+import threading
+
+import sqlalchemy
+import sqlalchemy.schema
+import sqlalchemy.types
+
+from bhamon_orchestra_model.database.sql_database_client_factory import SqlDatabaseClientFactory
+
+
+def create_database_metadata():
+	metadata = sqlalchemy.schema.MetaData()
+
+	sqlalchemy.schema.Table("record", metadata,
+		sqlalchemy.schema.Column("id", sqlalchemy.types.Integer, nullable = False),
+		sqlalchemy.schema.Column("key", sqlalchemy.types.String, nullable = True),
+		sqlalchemy.schema.PrimaryKeyConstraint("id"),
+	)
+
+	sqlalchemy.schema.Table("timed_record", metadata,
+		sqlalchemy.schema.Column("id", sqlalchemy.types.Integer, nullable = False),
+		sqlalchemy.schema.Column("key", sqlalchemy.types.String, nullable = True),
+		sqlalchemy.schema.Column("update_date", sqlalchemy.types.Integer, nullable = False),
+		sqlalchemy.schema.PrimaryKeyConstraint("id"),
+	)
+
+	return metadata
+
+
+def test_pool(tmpdir):
+	""" Test reusing connections from the pool """
+
+	database_uri = "sqlite:///" + os.path.join(str(tmpdir), "database.sqlite")
+	factory = SqlDatabaseClientFactory(database_uri, create_database_metadata(), pool_size = 2, max_overflow = 0)
+	factory.metadata.create_all(factory.engine)
+
+	try:
+		with factory() as database_client:
+			assert factory.get_pool_statistics()["checked_out"] == 1
+
+			database_client.insert_one("record", { "id": 1, "key": "value" })
+
+		assert factory.get_pool_statistics()["checked_out"] == 0
+		assert factory.get_pool_statistics()["checked_in"] == 1
+
+		with factory() as database_client:
+			assert database_client.find_one("record", {}) == { "id": 1, "key": "value" }
+			assert factory.get_pool_statistics()["checked_in"] == 0
+
+		assert factory.get_pool_statistics()["checked_in"] == 1
+
+	finally:
+		factory.dispose()
+
+
+def test_sqlite_pragmas(tmpdir):
+	""" Test applying the SQLite pragmas to new connections """
+
+	database_uri = "sqlite:///" + os.path.join(str(tmpdir), "database.sqlite")
+	factory = SqlDatabaseClientFactory(database_uri, create_database_metadata())
+	factory.metadata.create_all(factory.engine)
+
+	try:
+		with factory.create_administration() as database_administration:
+			assert not database_administration.check_pragmas()
+
+			database_administration.connection.execute(sqlalchemy.text("PRAGMA synchronous = FULL"))
+			assert database_administration.check_pragmas() == { "synchronous": 2 }
+
+	finally:
+		factory.dispose()
+
+
+def test_sqlite_watch(tmpdir):
+	""" Test watching changes, including updates within the same second, using a connection outside of the pool """
+
+	database_uri = "sqlite:///" + os.path.join(str(tmpdir), "database.sqlite")
+	factory = SqlDatabaseClientFactory(database_uri, create_database_metadata())
+	factory.metadata.create_all(factory.engine)
+	change_event = threading.Event()
+
+	try:
+		with factory() as watching_database_client:
+			with watching_database_client.watch("timed_record", { "key": "value" }, lambda change: change_event.set()):
+				with factory() as database_client:
+					assert factory.get_pool_statistics()["checked_out"] == 2
+
+					database_client.insert_one("timed_record", { "id": 1, "key": "value", "update_date": 1 })
+					assert change_event.wait(5)
+					change_event.clear()
+
+					database_client.update_one("timed_record", { "id": 1 }, { "key": "other", "update_date": 1 })
+					assert change_event.wait(5)
+
+	finally:
+		factory.dispose()
@@ -0,0 +1,62 @@
+""" Unit tests for TableCache """
+
+import datetime
+
+from bhamon_orchestra_model.table_cache import TableCache
+
+from ..fakes.fake_date_time_provider import FakeDateTimeProvider
+
+
+def test_expiration():
+	""" Test values expire after their time to live """
+
+	date_time_provider = FakeDateTimeProvider()
+	table_cache = TableCache(date_time_provider, time_to_live = datetime.timedelta(seconds = 10))
+
+	table_cache.set(("record", 1), "value")
+	assert table_cache.get(("record", 1)) == "value"
+
+	date_time_provider.now_value += datetime.timedelta(seconds = 20)
+	assert table_cache.get(("record", 1)) is None
+
+
+def test_entry_limit():
+	""" Test the cache does not grow past its entry limit """
+
+	table_cache = TableCache(FakeDateTimeProvider(), entry_limit = 2)
+
+	table_cache.set(("record", 1), 1)
+	table_cache.set(("record", 2), 1)
+	table_cache.set(("record", 3), 1)
+
+	assert table_cache.get(("record", 3)) == 1
+	assert len([ key for key in [ 1, 2, 3 ] if table_cache.get(("record", key)) is not None ]) <= 2
+
+
+def test_invalidate():
+	""" Test invalidating a table removes its values only """
+
+	table_cache = TableCache(FakeDateTimeProvider())
+
+	table_cache.set(("record", 1), "value")
+	table_cache.set(("other_record", 1), "value")
+	table_cache.invalidate("record")
+
+	assert table_cache.get(("record", 1)) is None
+	assert table_cache.get(("other_record", 1)) == "value"
+
+	table_cache.clear()
+	assert table_cache.get(("other_record", 1)) is None
+
+
+def test_stale_value():
+	""" Test a value read before an invalidation is not saved """
+
+	table_cache = TableCache(FakeDateTimeProvider())
+	key = ("record", 1)
+
+	generation = table_cache._get_generation("record") # pylint: disable = protected-access
+	table_cache.invalidate("record")
+	table_cache.set(key, "value", generation)
+
+	assert table_cache.get(key) is None
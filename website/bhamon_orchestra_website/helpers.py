@@ -61,6 +61,7 @@ def get_pagination(item_total: int, url_arguments: dict) -> dict:
 		"item_count": item_count,
 		"item_total": item_total,
 		"url_arguments": url_arguments,
+		"continuation_token": None,
 	}
 
 
@@ -27,12 +27,18 @@ class RunController:
 		item_total = self._service_client.get("/project/" + project_identifier + "/run_count", parameters = query_parameters)
 		pagination = website_helpers.get_pagination(item_total, { "project_identifier": project_identifier, **query_parameters })
 
+		continuation_token = flask.request.args.get("continuation_token", default = None)
+
 		query_parameters.update({
-			"skip": (pagination["page_number"] - 1) * pagination["item_count"],
+			"skip": (pagination["page_number"] - 1) * pagination["item_count"] if continuation_token is None else 0,
 			"limit": pagination["item_count"],
 			"order_by": [ "update_date descending" ],
+			"continuation_token": continuation_token,
 		})
 
+		run_collection, pagination["continuation_token"] = self._service_client.get_with_continuation_token(
+			"/project/" + project_identifier + "/run_collection", parameters = query_parameters)
+
 		job_query_parameters = { "limit": 1000, "order_by": [ "identifier ascending" ] }
 		worker_query_parameters = { "limit": 1000, "order_by": [ "identifier ascending" ] }
 
@@ -41,7 +47,7 @@ class RunController:
 			"job_collection": self._service_client.get("/project/" + project_identifier + "/job_collection", parameters = job_query_parameters),
 			"worker_collection": self._service_client.get("/worker_collection", parameters = worker_query_parameters),
 			"status_collection": website_helpers.get_run_status_collection(),
-			"run_collection": self._service_client.get("/project/" + project_identifier + "/run_collection", parameters = query_parameters),
+			"run_collection": run_collection,
 			"pagination": pagination,
 		}
 
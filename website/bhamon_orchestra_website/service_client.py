@@ -39,7 +39,18 @@ class ServiceClient:
 		return self.send_request("POST", route, parameters = parameters, data = data)
 
 
+	def get_with_continuation_token(self, route: str, parameters: Optional[dict] = None) -> Tuple[Optional[Any], Optional[str]]:
+		""" Send a GET request for a collection and return it with the token to request the next page, if any """
+		response = self._send_raw_request("GET", route, parameters = parameters)
+		return self._deserialize_response(response), response.headers.get("X-Orchestra-ContinuationToken", None)
+
+
 	def send_request(self, method: str, route: str, parameters: Optional[dict] = None, data: Optional[Any] = None) -> Optional[Any]:
+		response = self._send_raw_request(method, route, parameters = parameters, data = data)
+		return self._deserialize_response(response)
+
+
+	def _send_raw_request(self, method: str, route: str, parameters: Optional[dict] = None, data: Optional[Any] = None) -> requests.Response:
 		logger.debug("%s %s", method, self.service_url + route)
 
 		authentication = self._get_authentication()
@@ -55,6 +66,10 @@ class ServiceClient:
 
 		response.raise_for_status()
 
+		return response
+
+
+	def _deserialize_response(self, response: requests.Response) -> Optional[Any]:
 		if response.status_code == 204:
 			return None
 
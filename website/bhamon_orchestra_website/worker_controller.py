@@ -65,12 +65,18 @@ class WorkerController:
 		item_total = self._service_client.get("/worker/" + worker_identifier + "/run_count", parameters = query_parameters)
 		pagination = website_helpers.get_pagination(item_total, { "worker_identifier": worker_identifier, **query_parameters })
 
+		continuation_token = flask.request.args.get("continuation_token", default = None)
+
 		query_parameters.update({
-			"skip": (pagination["page_number"] - 1) * pagination["item_count"],
+			"skip": (pagination["page_number"] - 1) * pagination["item_count"] if continuation_token is None else 0,
 			"limit": pagination["item_count"],
 			"order_by": [ "update_date descending" ],
+			"continuation_token": continuation_token,
 		})
 
+		run_collection, pagination["continuation_token"] = self._service_client.get_with_continuation_token(
+			"/worker/" + worker_identifier + "/run_collection", parameters = query_parameters)
+
 		project_query_parameters = { "limit": 1000, "order_by": [ "identifier ascending" ] }
 		job_query_parameters = { "limit": 1000, "order_by": [ "identifier ascending" ] }
 
@@ -79,7 +85,7 @@ class WorkerController:
 			"project_collection": self._service_client.get("/project_collection", parameters = project_query_parameters),
 			"job_collection": self._service_client.get("/worker/" + worker_identifier + "/job_collection", parameters = job_query_parameters),
 			"status_collection": website_helpers.get_run_status_collection(),
-			"run_collection": self._service_client.get("/worker/" + worker_identifier + "/run_collection", parameters = query_parameters),
+			"run_collection": run_collection,
 			"pagination": pagination,
 		}
 